@@ -15,18 +15,129 @@ import subprocess
 # Ajout du chemin LeRobot pour les imports
 sys.path.append(os.path.expanduser('~/lerobot'))
 
-# SEULE MODIFICATION : Import déplacé ici au lieu de ligne 59
-from dynamixel_sdk import *
+# Pilote commun du bus (SEM_so101_bus.py, même dossier)
+from SEM_so101_bus import (detect_port, ouvrir_bras, MODELES, ADDR_ID, ADDR_BAUDRATE,
+                           ADDR_LOCK, ADDR_RETURN_DELAY, ADDR_STATUS_LEVEL)
+from SEM_so101_stats import Histogramme
 
-def detect_port():
-    """Détection automatique du port USB"""
-    ports = ['/dev/ttyACM0', '/dev/ttyACM1', '/dev/ttyUSB0', '/dev/ttyUSB1']
-    for port in ports:
-        if os.path.exists(port):
-            # Correction automatique des permissions
-            os.system(f"sudo chmod 666 {port} 2>/dev/null")
-            return port
-    return None
+# Réglages de latence visés (EEPROM)
+DELAI_REPONSE_CIBLE = 0     # unité 2 µs ; 250 (500 µs) en sortie d'usine
+# Niveau 1 = réponse à toutes les instructions (0 = lectures et pings seulement).
+# Gardé à 1 : les écritures individuelles (writeTxRx : verrou EEPROM, couple,
+# transport individuel) attendent un statut et échoueraient en timeout au
+# niveau 0, et ce statut signale un servo qui n'a pas pris l'écriture. Les
+# écritures groupées (sync write) ne reçoivent jamais de réponse : le
+# niveau 1 ne coûte rien à la téléopération.
+NIVEAU_STATUT_CIBLE = 1
+CYCLES_BANC = 200
+
+def nom_modele(modele):
+    """Nom lisible d'un numéro de modèle Feetech"""
+    if modele is None:
+        return "modèle inconnu"
+    return MODELES.get(modele, f"modèle {modele}")
+
+def scanner_chaine():
+    """Liste tous les servos de la chaîne en une seule passe (ping diffusé)"""
+    port = detect_port()
+    if not port:
+        print("❌ Aucun port USB détecté!")
+        return {}
+    
+    bras = ouvrir_bras(port, "CONFIGURATION")
+    if bras is None:
+        print("❌ Impossible d'ouvrir le port ou de configurer le baudrate")
+        return {}
+    
+    print("\n🔍 Scan de la chaîne...")
+    servos = bras.scan()
+    positions, _ = bras.read_positions(servos.keys())
+    bras.disconnect()
+    
+    if not servos:
+        print("❌ Aucun servo ne répond")
+        return servos
+    
+    print(f"✅ {len(servos)} servo(s) détecté(s):")
+    for servo_id, modele in servos.items():
+        position = positions.get(servo_id, "---")
+        print(f"  • ID {servo_id:3}  {nom_modele(modele):10}  position: {position}")
+    return servos
+
+def afficher_latence(bras, ids):
+    """Affiche délai de réponse et niveau de statut de chaque servo"""
+    delais, _ = bras.read_register(ADDR_RETURN_DELAY, 1, ids)
+    niveaux, _ = bras.read_register(ADDR_STATUS_LEVEL, 1, ids)
+    print(f"  {'ID':>4}  {'Délai réponse':>16}  {'Niveau statut':>13}")
+    for servo_id in ids:
+        delai = delais.get(servo_id)
+        texte_delai = f"{delai} ({delai * 2} µs)" if delai is not None else "---"
+        niveau = niveaux.get(servo_id, "---")
+        print(f"  {servo_id:>4}  {texte_delai:>16}  {niveau:>13}")
+    return delais, niveaux
+
+def banc_aller_retour(bras, ids, cycles=CYCLES_BANC):
+    """Chronomètre la lecture groupée des positions (aller-retour complet)"""
+    histo = Histogramme()
+    for _ in range(cycles):
+        debut = time.perf_counter()
+        bras.read_positions(ids)
+        histo.ajouter(time.perf_counter() - debut)
+    return histo
+
+def reglage_latence():
+    """Lit, affiche et uniformise les registres de latence de tous les servos"""
+    port = detect_port()
+    if not port:
+        print("❌ Aucun port USB détecté!")
+        return False
+    
+    bras = ouvrir_bras(port, "CONFIGURATION")
+    if bras is None:
+        print("❌ Impossible d'ouvrir le port ou de configurer le baudrate")
+        return False
+    
+    try:
+        ids = sorted(bras.scan())
+        if not ids:
+            print("❌ Aucun servo ne répond")
+            return False
+        
+        print(f"\n⏱️  Registres de latence ({len(ids)} servo(s)):")
+        delais, niveaux = afficher_latence(bras, ids)
+        avant = banc_aller_retour(bras, ids)
+        print(f"\n📊 Lecture des positions: p50 {avant.percentile(50) * 1000:.2f} ms, "
+              f"p95 {avant.percentile(95) * 1000:.2f} ms")
+        
+        if (all(delais.get(i) == DELAI_REPONSE_CIBLE for i in ids)
+                and all(niveaux.get(i) == NIVEAU_STATUT_CIBLE for i in ids)):
+            print("✅ Tous les servos sont déjà réglés")
+            return True
+        
+        print(f"\nRéglage proposé: délai {DELAI_REPONSE_CIBLE} ({DELAI_REPONSE_CIBLE * 2} µs), "
+              f"niveau de statut {NIVEAU_STATUT_CIBLE}")
+        print("  (le niveau 0 supprimerait aussi l'accusé des écritures")
+        print("   individuelles utilisées par la configuration des IDs)")
+        if input("Appliquer à tous les servos? (O/N): ").strip().upper() != 'O':
+            print("↩️  Aucun changement")
+            return False
+        
+        ok = bras.write_eeprom(ADDR_RETURN_DELAY, 1, {i: DELAI_REPONSE_CIBLE for i in ids})
+        ok = bras.write_eeprom(ADDR_STATUS_LEVEL, 1, {i: NIVEAU_STATUT_CIBLE for i in ids}) and ok
+        time.sleep(0.1)  # Laisser le temps d'écrire l'EEPROM
+        
+        print("\n🔍 Vérification:")
+        delais, niveaux = afficher_latence(bras, ids)
+        ok = ok and all(delais.get(i) == DELAI_REPONSE_CIBLE
+                        and niveaux.get(i) == NIVEAU_STATUT_CIBLE for i in ids)
+        apres = banc_aller_retour(bras, ids)
+        print(f"\n📊 Lecture des positions ({CYCLES_BANC} cycles):")
+        print(f"  Avant : p50 {avant.percentile(50) * 1000:.2f} ms, p95 {avant.percentile(95) * 1000:.2f} ms")
+        print(f"  Après : p50 {apres.percentile(50) * 1000:.2f} ms, p95 {apres.percentile(95) * 1000:.2f} ms")
+        print("✅ Réglage appliqué" if ok else "❌ Certains servos n'ont pas pris le réglage")
+        return ok
+    finally:
+        bras.disconnect()
 
 def configure_servo(servo_id):
     """Configure un servo avec le script officiel LeRobot"""
@@ -40,62 +151,61 @@ def configure_servo(servo_id):
     print(f"Port: {port}")
     print(f"{'='*50}")
     
-    # D'abord, on fait la configuration directement avec dynamixel_sdk
+    # D'abord, on fait la configuration directement avec le pilote commun
     # car configure_motor.py pourrait ne pas exister ou être ailleurs
     try:
-        portHandler = PortHandler(port)
-        packetHandler = PacketHandler(1.0)
-        
-        if not portHandler.openPort():
-            print("❌ Impossible d'ouvrir le port")
-            return False
-            
-        if not portHandler.setBaudRate(1000000):
-            print("❌ Impossible de configurer le baudrate")
+        bras = ouvrir_bras(port, "CONFIGURATION")
+        if bras is None:
+            print("❌ Impossible d'ouvrir le port ou de configurer le baudrate")
             return False
         
         # 1. DÉTECTION du servo branché (peu importe son ID actuel)
+        # Un seul ping diffusé : tous les IDs qui répondent, en une passe
         print("🔍 Recherche du servo...")
-        id_actuel = None
-        for test_id in range(1, 254):
-            pos, result, _ = packetHandler.read2ByteTxRx(portHandler, test_id, 56)
-            if result == 0:  # COMM_SUCCESS
-                id_actuel = test_id
-                print(f"✅ Servo trouvé avec l'ID actuel: {id_actuel}")
-                break
+        servos = bras.scan()
         
-        if id_actuel is None:
+        if not servos:
             print("❌ Aucun servo détecté!")
             print("Vérifiez que:")
             print("  - Le servo est bien branché")
             print("  - L'alimentation 12V est connectée")
-            portHandler.closePort()
+            bras.disconnect()
+            return False
+        
+        if len(servos) > 1:
+            print(f"❌ Plusieurs servos détectés (IDs {list(servos)})!")
+            print("  Branchez UNIQUEMENT le servo à configurer")
+            bras.disconnect()
             return False
         
+        id_actuel, modele = next(iter(servos.items()))
+        print(f"✅ Servo trouvé avec l'ID actuel: {id_actuel} ({nom_modele(modele)})")
+        
         # 2. CHANGEMENT D'ID si nécessaire
         if id_actuel != servo_id:
             print(f"\n📝 Configuration de l'ID...")
             print(f"  ID actuel: {id_actuel}")
             print(f"  Nouvel ID: {servo_id}")
             
-            # IMPORTANT: Écrire dans l'EEPROM (registre 3)
-            result, _ = packetHandler.write1ByteTxRx(portHandler, id_actuel, 3, servo_id)
-            if result == 0:  # COMM_SUCCESS
+            # IMPORTANT: Écrire dans l'EEPROM (registre ADDR_ID), déverrouillée le temps
+            # de l'écriture ; le servo se reverrouille sous son nouvel ID
+            bras.write(id_actuel, ADDR_LOCK, 1, 0)
+            if bras.write(id_actuel, ADDR_ID, 1, servo_id):
+                bras.write(servo_id, ADDR_LOCK, 1, 1)
                 print(f"  ✅ ID changé avec succès!")
                 
                 # SAUVEGARDE dans l'EEPROM (certains servos nécessitent un reboot)
                 time.sleep(1)
                 
                 # Vérifier que le nouvel ID fonctionne
-                pos, result, _ = packetHandler.read2ByteTxRx(portHandler, servo_id, 56)
-                if result == 0:
+                if bras.read_position(servo_id) is not None:
                     print(f"  ✅ Servo répond maintenant à l'ID {servo_id}")
                 else:
                     print("  ⚠️ Le servo nécessite peut-être un redémarrage")
                     print("  Débranchez et rebranchez le servo")
             else:
                 print("❌ Impossible de changer l'ID")
-                portHandler.closePort()
+                bras.disconnect()
                 return False
         else:
             print(f"✅ Le servo a déjà l'ID {servo_id}")
@@ -104,41 +214,41 @@ def configure_servo(servo_id):
         print("\n📋 Vérification de la configuration...")
         
         # Lire l'ID pour confirmer
-        id_lu, result, _ = packetHandler.read1ByteTxRx(portHandler, servo_id, 3)
-        if result == 0 and id_lu == servo_id:
+        id_lu, ok = bras.read(servo_id, ADDR_ID, 1)
+        if ok and id_lu == servo_id:
             print(f"  ✅ ID: {id_lu} [SAUVEGARDÉ]")
         else:
             print(f"  ❌ Problème avec l'ID")
         
-        # Lire le baudrate (registre 4)
-        baud_reg, result, _ = packetHandler.read1ByteTxRx(portHandler, servo_id, 4)
-        print(f"  ℹ️ Baudrate registre: {baud_reg} (3 = 1Mbps)")
+        # Lire le baudrate
+        baud_reg, _ = bras.read(servo_id, ADDR_BAUDRATE, 1)
+        print(f"  ℹ️ Baudrate registre: {baud_reg} (0 = 1Mbps)")
         
         # 4. TEST DE MOUVEMENT
         print("\n🔄 Test de mouvement...")
         
         # Activer le servo
-        packetHandler.write1ByteTxRx(portHandler, servo_id, 40, 1)
+        bras.set_torque(True, [servo_id])
         
         # Mouvement de test
         print("  → Position MIN (1024)")
-        packetHandler.write2ByteTxRx(portHandler, servo_id, 42, 1024)
+        bras.write_goal(servo_id, 1024)
         time.sleep(1)
         
         print("  → Position MAX (3072)")
-        packetHandler.write2ByteTxRx(portHandler, servo_id, 42, 3072)
+        bras.write_goal(servo_id, 3072)
         time.sleep(1)
         
         print("  → Position CENTRE (2048)")
-        packetHandler.write2ByteTxRx(portHandler, servo_id, 42, 2048)
+        bras.write_goal(servo_id, 2048)
         time.sleep(1)
         
         # Bloquer au centre pour le montage
-        packetHandler.write1ByteTxRx(portHandler, servo_id, 40, 1)
+        bras.set_torque(True, [servo_id])
         print("\n✅ Servo bloqué au centre pour montage")
         print("   (Utilisez L dans le menu pour libérer)")
         
-        portHandler.closePort()
+        bras.disconnect()
         
         print("\n" + "="*50)
         print("✅ CONFIGURATION TERMINÉE ET SAUVEGARDÉE")
@@ -196,6 +306,8 @@ FOLLOWER:
         print("T   → Configurer TOUS les servos")
         print("B   → Bloquer le servo au centre")
         print("L   → Libérer le servo")
+        print("S   → Scanner toute la chaîne (tous les servos branchés)")
+        print("R   → Réglage latence (délai de réponse / niveau de statut)")
         print("D   → Détecter à nouveau le port USB")
         print("Q   → Quitter")
         print("="*50)
@@ -208,32 +320,38 @@ FOLLOWER:
         elif choix == 'B':
             # Bloquer le servo branché
             print("\n🔒 Blocage du servo au centre...")
-            portHandler = PortHandler(port)
-            packetHandler = PacketHandler(1.0)
-            if portHandler.openPort() and portHandler.setBaudRate(1000000):
-                # Chercher quel servo est branché
-                for test_id in range(1, 7):
-                    pos, result, _ = packetHandler.read2ByteTxRx(portHandler, test_id, 56)
-                    if result == 0:
-                        packetHandler.write1ByteTxRx(portHandler, test_id, 40, 1)
-                        packetHandler.write2ByteTxRx(portHandler, test_id, 42, 2048)
-                        print(f"✅ Servo {test_id} bloqué au centre")
-                        break
-                portHandler.closePort()
+            bras = ouvrir_bras(port, "CONFIGURATION")
+            if bras:
+                # Chercher quel servo est branché (ping diffusé)
+                servos = bras.scan()
+                if servos:
+                    test_id = min(servos)
+                    bras.set_torque(True, [test_id])
+                    bras.write_goal(test_id, 2048)
+                    print(f"✅ Servo {test_id} bloqué au centre")
+                else:
+                    print("❌ Aucun servo détecté")
+                bras.disconnect()
         elif choix == 'L':
             # Libérer le servo branché
             print("\n🔓 Libération du servo...")
-            portHandler = PortHandler(port)
-            packetHandler = PacketHandler(1.0)
-            if portHandler.openPort() and portHandler.setBaudRate(1000000):
-                # Chercher quel servo est branché
-                for test_id in range(1, 7):
-                    pos, result, _ = packetHandler.read2ByteTxRx(portHandler, test_id, 56)
-                    if result == 0:
-                        packetHandler.write1ByteTxRx(portHandler, test_id, 40, 0)
-                        print(f"✅ Servo {test_id} libéré")
-                        break
-                portHandler.closePort()
+            bras = ouvrir_bras(port, "CONFIGURATION")
+            if bras:
+                # Chercher quel servo est branché (ping diffusé)
+                servos = bras.scan()
+                if servos:
+                    test_id = min(servos)
+                    bras.set_torque(False, [test_id])
+                    print(f"✅ Servo {test_id} libéré")
+                else:
+                    print("❌ Aucun servo détecté")
+                bras.disconnect()
+        elif choix == 'S':
+            # Lister tous les servos de la chaîne en une passe
+            scanner_chaine()
+        elif choix == 'R':
+            # Uniformiser les registres de latence de tous les servos
+            reglage_latence()
         elif choix == 'D':
             port = detect_port()
             if port:
@@ -5,14 +5,27 @@ Service Ecoles Médias - Calibration des servos SO-ARM 101
 
 Ce script permet de calibrer les limites min/max de chaque servo
 et sauvegarde automatiquement après chaque calibration.
+
+Mode balayage (option B) : les 6 servos sont libérés et lus en continu
+(lecture groupée) pendant que l'on parcourt toute la course de chaque
+articulation. Les min/max suivent le mouvement et la calibration se
+termine quand les courses n'augmentent plus.
+
+Points de référence (option P) : un servo est placé successivement à
+des angles repérés (0 %, 25 %, 50 %, 75 %, 100 % de sa course). La
+téléopération interpole alors entre ces points au lieu d'une seule
+droite min/max. Relever les MÊMES repères sur le Leader et le Follower.
 """
 
-import sys, os, time, json, math
+import sys, os, time, json
 
 # Auto-activation de l'environnement lerobot si nécessaire
 try:
     sys.path.append(os.path.expanduser('~/lerobot'))
     from dynamixel_sdk import *
+    # Pilote commun du bus (SEM_so101_bus.py, même dossier)
+    from SEM_so101_bus import detect_port, ouvrir_bras, mouvement_fluide
+    from SEM_so101_calibration import fichier_calibration, Calibration
 except ImportError:
     print("\n🔧 Activation automatique de l'environnement lerobot...")
     import subprocess
@@ -26,49 +39,48 @@ except ImportError:
         print("Solution: conda activate lerobot")
         sys.exit(1)
 
-def detect_port():
-    """Détection automatique du port USB"""
-    for port in ['/dev/ttyACM0', '/dev/ttyACM1', '/dev/ttyUSB0', '/dev/ttyUSB1']:
-        if os.path.exists(port):
-            os.system(f"sudo chmod 666 {port} 2>/dev/null")
-            return port
-    return None
+# Balayage continu : intervalle entre deux lectures groupées (s), course
+# minimale d'un servo (pas), croissance ignorée (pas) et durée sans
+# croissance qui termine la calibration (s)
+INTERVALLE_BALAYAGE = 0.005
+COURSE_MIN_BALAYAGE = 200
+CROISSANCE_BALAYAGE = 2
+STABILITE_BALAYAGE = 3.0
+
+# Points de référence : nombre de repères et lectures moyennées par repère
+NB_POINTS_REFERENCE = 5
+LECTURES_PAR_POINT = 5
 
-def centrage_doux(packetHandler, portHandler, servo_id, pos_min, pos_max):
-    """Centre le servo avec un mouvement fluide"""
+def centrage_doux(bras, servo_id, pos_min, pos_max):
+    """Centre le servo avec un mouvement fluide (None si sa position est illisible)"""
     centre = (pos_min + pos_max) // 2
-    pos_actuelle, _, _ = packetHandler.read2ByteTxRx(portHandler, servo_id, 56)
+    pos_actuelle = bras.read_position(servo_id)
+    if pos_actuelle is None:
+        # Partir d'une position supposée ferait sauter le servo
+        print(f"  ⚠️  Position du servo {servo_id} illisible : centrage ignoré")
+        return None
     
     print(f"  🔄 Centrage fluide vers {centre}...")
     
-    # Mouvement sinusoïdal pour la fluidité
-    steps = 50
-    for step in range(steps + 1):
-        t = step / steps
-        # Courbe sinusoïdale
-        smooth_t = (1 - math.cos(t * math.pi)) / 2
-        pos = int(pos_actuelle + (centre - pos_actuelle) * smooth_t)
-        packetHandler.write2ByteTxRx(portHandler, servo_id, 42, pos)
-        time.sleep(1.5 / steps)  # 1.5 secondes au total
-    
-    return centre
+    # Mouvement sinusoïdal pour la fluidité (1.5 secondes au total)
+    return mouvement_fluide(bras, servo_id, pos_actuelle, centre, 1.5, steps=50)
 
-def calibrer_servo(packetHandler, portHandler, servo_id, servo_name):
-    """Calibre un servo individuellement"""
+def calibrer_servo(bras, servo_id, servo_name):
+    """Calibre un servo individuellement (None si une position n'a pas pu être lue)"""
     print(f"\n{'='*60}")
     print(f"CALIBRATION DU SERVO {servo_id} - {servo_name}")
     print(f"{'='*60}")
     
     # Activer le servo
-    packetHandler.write1ByteTxRx(portHandler, servo_id, 40, 1)
+    bras.set_torque(True, [servo_id])
     
     # Lire position actuelle
-    pos_actuelle, _, _ = packetHandler.read2ByteTxRx(portHandler, servo_id, 56)
+    pos_actuelle = bras.read_position(servo_id)
     print(f"Position actuelle: {pos_actuelle}")
     
     # Relâcher pour manipulation manuelle
     print("\n⚠️  Le servo est maintenant LIBRE")
-    packetHandler.write1ByteTxRx(portHandler, servo_id, 40, 0)
+    bras.set_torque(False, [servo_id])
     
     print("\n📋 Instructions:")
     print("1. Bougez MANUELLEMENT le servo à sa position MINIMALE")
@@ -76,7 +88,10 @@ def calibrer_servo(packetHandler, portHandler, servo_id, servo_name):
     input("\n➡️  Position MIN prête? [ENTRÉE]")
     
     # Lire position MIN
-    pos_min, _, _ = packetHandler.read2ByteTxRx(portHandler, servo_id, 56)
+    pos_min = bras.read_position(servo_id)
+    if pos_min is None:
+        print(f"⚠️  Position MIN illisible : servo {servo_id} non calibré")
+        return None
     print(f"✅ Position MIN enregistrée: {pos_min}")
     
     print("\n3. Bougez MANUELLEMENT le servo à sa position MAXIMALE")
@@ -84,7 +99,10 @@ def calibrer_servo(packetHandler, portHandler, servo_id, servo_name):
     input("\n➡️  Position MAX prête? [ENTRÉE]")
     
     # Lire position MAX
-    pos_max, _, _ = packetHandler.read2ByteTxRx(portHandler, servo_id, 56)
+    pos_max = bras.read_position(servo_id)
+    if pos_max is None:
+        print(f"⚠️  Position MAX illisible : servo {servo_id} non calibré")
+        return None
     print(f"✅ Position MAX enregistrée: {pos_max}")
     
     # Vérification cohérence
@@ -103,13 +121,12 @@ def calibrer_servo(packetHandler, portHandler, servo_id, servo_name):
     print(f"  • Amplitude: {amplitude}")
     
     # Réactiver et centrer avec mouvement fluide
-    packetHandler.write1ByteTxRx(portHandler, servo_id, 40, 1)
-    centrage_doux(packetHandler, portHandler, servo_id, pos_min, pos_max)
-    
-    print(f"✅ Servo {servo_id} centré")
+    bras.set_torque(True, [servo_id])
+    if centrage_doux(bras, servo_id, pos_min, pos_max) is not None:
+        print(f"✅ Servo {servo_id} centré")
     
     # Désactiver le servo
-    packetHandler.write1ByteTxRx(portHandler, servo_id, 40, 0)
+    bras.set_torque(False, [servo_id])
     
     return {
         "min": pos_min,
@@ -118,8 +135,142 @@ def calibrer_servo(packetHandler, portHandler, servo_id, servo_name):
         "amplitude": amplitude
     }
 
-def sauvegarder_calibration(calibration, robot_type):
-    """Sauvegarde la calibration dans un fichier JSON"""
+def calibrer_balayage(bras, servo_names):
+    """
+    Calibre les 6 servos en un seul passage : lecture groupée en continu,
+    min/max courants, fin quand les courses ne grandissent plus.
+    Retourne {servo_id: résultat} pour les servos assez parcourus.
+    """
+    import select
+    
+    print(f"\n{'='*60}")
+    print("CALIBRATION PAR BALAYAGE - 6 SERVOS")
+    print(f"{'='*60}")
+    print("\n⚠️  Tous les servos sont maintenant LIBRES")
+    bras.set_torque(False)
+    
+    print("\n📋 Instructions:")
+    print("1. Parcourez TOUTE la course de chaque articulation, une par une")
+    print("2. Allez jusqu'aux butées, doucement")
+    print(f"3. Fin automatique après {STABILITE_BALAYAGE:.0f} s sans nouvelle limite")
+    print("   (ou ENTRÉE pour terminer plus tôt)")
+    input("\n➡️  Prêt? [ENTRÉE]")
+    
+    mins, maxs, precedentes = {}, {}, {}
+    lectures = 0
+    debut = time.perf_counter()
+    derniere_croissance = debut
+    dernier_affichage = 0.0
+    
+    while True:
+        positions, _ = bras.read_positions()
+        lectures += 1
+        maintenant = time.perf_counter()
+    
+        for servo_id, pos in positions.items():
+            precedente = precedentes.get(servo_id, pos)
+            precedentes[servo_id] = pos
+            # Une limite doit être vue sur deux lectures de suite (un échantillon isolé est ignoré)
+            bas, haut = max(pos, precedente), min(pos, precedente)
+            if servo_id not in mins:
+                mins[servo_id], maxs[servo_id] = bas, haut
+                continue
+            if bas < mins[servo_id] - CROISSANCE_BALAYAGE or haut > maxs[servo_id] + CROISSANCE_BALAYAGE:
+                derniere_croissance = maintenant
+            mins[servo_id] = min(mins[servo_id], bas)
+            maxs[servo_id] = max(maxs[servo_id], haut)
+    
+        courses = {servo_id: maxs[servo_id] - mins[servo_id] for servo_id in mins}
+        parcourus = [servo_id for servo_id in range(1, 7) if courses.get(servo_id, 0) >= COURSE_MIN_BALAYAGE]
+    
+        if maintenant - dernier_affichage >= 0.1:
+            dernier_affichage = maintenant
+            etat = "  ".join(f"{servo_id}:{courses.get(servo_id, 0):4}" for servo_id in range(1, 7))
+            print(f"\r  📏 Courses {etat}  ({len(parcourus)}/6)  ", end="", flush=True)
+    
+        if len(parcourus) == 6 and maintenant - derniere_croissance >= STABILITE_BALAYAGE:
+            print("\n✅ Courses stables")
+            break
+        if sys.stdin in select.select([sys.stdin], [], [], 0)[0]:
+            sys.stdin.readline()
+            print("\n⏹️  Balayage terminé")
+            break
+    
+        time.sleep(INTERVALLE_BALAYAGE)
+    
+    duree = time.perf_counter() - debut
+    print(f"📊 {lectures} lectures groupées en {duree:.1f} s ({lectures / duree:.0f} lectures/s)")
+    
+    resultats = {}
+    for servo_id in range(1, 7):
+        if servo_id not in parcourus:
+            print(f"⚠️  Servo {servo_id} ({servo_names[servo_id]}) trop peu parcouru : non enregistré")
+            continue
+        pos_min, pos_max = mins[servo_id], maxs[servo_id]
+        resultats[servo_id] = {
+            "min": pos_min,
+            "max": pos_max,
+            "center": (pos_min + pos_max) // 2,
+            "amplitude": pos_max - pos_min
+        }
+    return resultats
+
+def lire_position_stable(bras, servo_id, lectures=LECTURES_PAR_POINT):
+    """Médiane de plusieurs lectures (un échantillon bruité ne fausse pas le repère)"""
+    valeurs = []
+    for _ in range(lectures):
+        pos = bras.read_position(servo_id)
+        if pos is not None:
+            valeurs.append(pos)
+        time.sleep(0.01)
+    return sorted(valeurs)[len(valeurs) // 2] if valeurs else None
+
+def calibrer_points(bras, servo_id, servo_name, nb_points=NB_POINTS_REFERENCE):
+    """Relève nb_points positions de référence régulièrement réparties sur la course"""
+    print(f"\n{'='*60}")
+    print(f"POINTS DE RÉFÉRENCE DU SERVO {servo_id} - {servo_name}")
+    print(f"{'='*60}")
+    
+    print("\n⚠️  Le servo est maintenant LIBRE")
+    bras.set_torque(False, [servo_id])
+    
+    print("\n📋 Placez le servo sur chaque repère angulaire, puis ENTRÉE")
+    print("   (mêmes repères sur le Leader et le Follower)")
+    
+    points = []
+    for k in range(nb_points):
+        pct = 100 * k // (nb_points - 1)
+        input(f"\n➡️  Repère {k + 1}/{nb_points} ({pct}% de la course) prêt? [ENTRÉE]")
+        pos = lire_position_stable(bras, servo_id)
+        if pos is None:
+            print("❌ Pas de réponse du servo, points abandonnés")
+            return None
+        points.append(pos)
+        print(f"✅ Repère {pct}% : {pos}")
+    
+    # Même convention que min/max : positions croissantes
+    if points[-1] < points[0]:
+        points.reverse()
+    if any(b <= a for a, b in zip(points, points[1:])):
+        print(f"❌ Repères non ordonnés {points} : recommencez dans l'ordre de la course")
+        return None
+    
+    pos_min, pos_max = points[0], points[-1]
+    print(f"\n📊 Points de référence : {points}")
+    return {
+        "min": pos_min,
+        "max": pos_max,
+        "center": (pos_min + pos_max) // 2,
+        "amplitude": pos_max - pos_min,
+        "points": points
+    }
+
+def sauvegarder_calibration(calibration, robot_type, conservees=None):
+    """
+    Sauvegarde la calibration dans un fichier JSON.
+    conservees : entrées écartées au chargement (charger_calibration),
+    réécrites telles quelles tant qu'elles ne sont pas recalibrées.
+    """
     # Créer le dossier si nécessaire (nouveau chemin)
     calib_dir = os.path.expanduser("~/lerobot/calibration")
     os.makedirs(calib_dir, exist_ok=True)
@@ -127,20 +278,41 @@ def sauvegarder_calibration(calibration, robot_type):
     # Nom du fichier selon le robot
     filename = f"{calib_dir}/{robot_type.lower()}_calibration.json"
     
-    # Sauvegarder
+    # Sauvegarder (entrées écartées au chargement conservées si pas recalibrées)
+    donnees = {cle: entree for cle, entree in (conservees or {}).items() if cle not in calibration}
+    donnees.update(calibration)
     with open(filename, 'w') as f:
-        json.dump(calibration, f, indent=2)
+        json.dump(donnees, f, indent=2)
     
     print(f"\n💾 Calibration sauvegardée: {filename}")
 
 def charger_calibration(robot_type):
-    """Charge une calibration existante"""
-    filename = os.path.expanduser(f"~/lerobot/calibration/{robot_type.lower()}_calibration.json")
-    
-    if os.path.exists(filename):
-        with open(filename, 'r') as f:
-            return json.load(f)
-    return {}
+    """
+    Charge une calibration existante (format JSON).
+    Retourne (servos valides, entrées écartées) : les entrées écartées
+    (invalides ou inconnues) sont à repasser à sauvegarder_calibration.
+    """
+    try:
+        with open(fichier_calibration(robot_type), 'r') as f:
+            brut = json.load(f)
+    except FileNotFoundError:
+        return {}, {}
+    except (OSError, ValueError) as erreur:
+        print(f"⚠️  Calibration {robot_type} illisible : {erreur}")
+        return {}, {}
+    if not isinstance(brut, dict):
+        print(f"⚠️  Calibration {robot_type} illisible : format inattendu")
+        return {}, {}
+    
+    calibration, avertissements = Calibration.depuis_dict(robot_type, brut)
+    valides = calibration.en_dict() if calibration else {}
+    conservees = {cle: entree for cle, entree in brut.items() if cle not in valides}
+    if conservees:
+        print(f"⚠️  Entrées écartées, gardées telles quelles dans le fichier : "
+              f"{', '.join(sorted(conservees))}")
+        for avertissement in avertissements:
+            print(f"   • {avertissement}")
+    return valides, conservees
 
 def afficher_tableau_calibration(calibration):
     """Affiche un tableau récapitulatif de la calibration"""
@@ -207,24 +379,17 @@ IMPORTANT: La calibration est SAUVEGARDÉE après chaque servo!
     print(f"\n✅ Calibration du {robot_type}")
     
     # Charger calibration existante si disponible
-    calibration = charger_calibration(robot_type)
+    calibration, conservees = charger_calibration(robot_type)
     if calibration:
         print("📁 Calibration existante chargée")
         afficher_tableau_calibration(calibration)
     
     # Connexion - UN SEUL PORT !
-    BAUDRATE = 1000000
-    portHandler = PortHandler(PORT)
-    packetHandler = PacketHandler(1.0)
-    
-    if not portHandler.openPort():
+    bras = ouvrir_bras(PORT, robot_type)
+    if bras is None:
         print("❌ Impossible d'ouvrir le port")
         return
     
-    if not portHandler.setBaudRate(BAUDRATE):
-        print("❌ Impossible de configurer le baudrate")
-        return
-    
     print("✅ Connexion établie")
     
     servo_names = {
@@ -242,6 +407,8 @@ IMPORTANT: La calibration est SAUVEGARDÉE après chaque servo!
         print("="*60)
         print("1-6 → Calibrer un servo spécifique")
         print("  T → Calibrer TOUS les servos")
+        print("  B → Balayage : tous les servos en un passage")
+        print("  P → Points de référence d'un servo (multi-points)")
         print("  V → Voir calibration actuelle")
         print("  Q → Quitter")
         print("="*60)
@@ -256,35 +423,55 @@ IMPORTANT: La calibration est SAUVEGARDÉE après chaque servo!
             # Calibrer tous les servos
             print("\n🔄 CALIBRATION COMPLÈTE")
             for servo_id in range(1, 7):
-                result = calibrer_servo(packetHandler, portHandler, 
-                                      servo_id, servo_names[servo_id])
+                result = calibrer_servo(bras, servo_id, servo_names[servo_id])
+                if not result:
+                    continue
                 calibration[f"servo_{servo_id}"] = result
                 
                 # SAUVEGARDE APRÈS CHAQUE SERVO
-                sauvegarder_calibration(calibration, robot_type)
+                sauvegarder_calibration(calibration, robot_type, conservees)
                 print(f"💾 Servo {servo_id} sauvegardé!")
             
             print("\n✅ CALIBRATION COMPLÈTE TERMINÉE")
             afficher_tableau_calibration(calibration)
             
+        elif choix == 'B':
+            resultats = calibrer_balayage(bras, servo_names)
+            for servo_id, result in resultats.items():
+                calibration[f"servo_{servo_id}"] = result
+            if resultats:
+                sauvegarder_calibration(calibration, robot_type, conservees)
+            afficher_tableau_calibration(calibration)
+            
+        elif choix == 'P':
+            choix_servo = input("Servo (1-6) : ").strip()
+            if choix_servo not in ['1', '2', '3', '4', '5', '6']:
+                print("❌ Choix invalide")
+                continue
+            servo_id = int(choix_servo)
+            result = calibrer_points(bras, servo_id, servo_names[servo_id])
+            if result:
+                calibration[f"servo_{servo_id}"] = result
+                sauvegarder_calibration(calibration, robot_type, conservees)
+                print(f"💾 Points du servo {servo_id} sauvegardés!")
+            
         elif choix in ['1', '2', '3', '4', '5', '6']:
             servo_id = int(choix)
-            result = calibrer_servo(packetHandler, portHandler, 
-                                  servo_id, servo_names[servo_id])
-            calibration[f"servo_{servo_id}"] = result
-            
-            # SAUVEGARDE IMMÉDIATE
-            sauvegarder_calibration(calibration, robot_type)
-            print(f"💾 Calibration du servo {servo_id} sauvegardée!")
+            result = calibrer_servo(bras, servo_id, servo_names[servo_id])
+            if result:
+                calibration[f"servo_{servo_id}"] = result
+                
+                # SAUVEGARDE IMMÉDIATE
+                sauvegarder_calibration(calibration, robot_type, conservees)
+                print(f"💾 Calibration du servo {servo_id} sauvegardée!")
         else:
             print("❌ Choix invalide")
     
     # Libération finale
     print("\n🏁 Libération des servos...")
-    for i in range(1, 7):
-        packetHandler.write1ByteTxRx(portHandler, i, 40, 0)
-    
-    portHandler.closePort()
+    bras.set_torque(False)
+    bras.afficher_erreurs()
+    bras.disconnect()
     print("\n✅ Calibration terminée")
     print(f"📁 Fichier: ~/lerobot/calibration/{robot_type.lower()}_calibration.json")
 
@@ -11,6 +11,17 @@ import sys, os, time, json, math
 try:
     sys.path.append(os.path.expanduser('~/lerobot'))
     from dynamixel_sdk import *
+    # Pilote commun du bus (SEM_so101_bus.py, même dossier)
+    from SEM_so101_bus import detect_port, detect_ports, ouvrir_bras, charger_calibration
+    from SEM_so101_bus import charger_config_teleoperation, centrage_parallele, position_repos_parallele
+    from SEM_so101_identification import identification_rapide
+    from SEM_so101_teleop import BoucleTeleop, FiltreConsignes
+    from SEM_so101_mapping import MappingTeleop
+    from SEM_so101_stats import EcartsSuivi
+    from SEM_so101_planificateur import PlanificateurBus, decoder_charge
+    from SEM_so101_etat import EtatPartage
+    from SEM_so101_ecran import Ecran, effacer_ecran, FREQUENCE_AFFICHAGE
+    from SEM_so101_capture import Capture, lire_etat_complet, fichier_capture
 except ImportError:
     print("\n🔧 Activation automatique de l'environnement lerobot...")
     import subprocess
@@ -24,37 +35,23 @@ except ImportError:
         print("Solution: conda activate lerobot")
         sys.exit(1)
 
+# Lectures par seconde visées (l'affichage suit à sa propre fréquence)
+FREQUENCE_LECTURE = 100
+
 def clear_screen():
-    """Efface l'écran"""
-    os.system('clear')
-
-def detect_port():
-    """Détection automatique du port USB"""
-    for port in ['/dev/ttyACM0', '/dev/ttyACM1', '/dev/ttyUSB0', '/dev/ttyUSB1']:
-        if os.path.exists(port):
-            os.system(f"sudo chmod 666 {port} 2>/dev/null")
-            return port
-    return None
-
-def arret_urgence(packetHandler, portHandler):
+    """Efface l'écran (séquence ANSI, sans lancer de shell)"""
+    effacer_ecran()
+
+def arret_urgence(bras):
     """Arrêt d'urgence - libère tous les servos"""
     print("\n⚠️  ARRÊT D'URGENCE ACTIVÉ!")
-    for i in range(1, 7):
-        try:
-            packetHandler.write1ByteTxRx(portHandler, i, 40, 0)
-        except:
-            pass
+    try:
+        bras.set_torque(False)
+    except:
+        pass
     print("✅ Tous les servos libérés")
     return True
 
-def charger_calibration(robot_type='leader'):
-    """Charge la calibration d'un robot"""
-    calib_file = os.path.expanduser(f"~/lerobot/calibration/{robot_type}_calibration.json")
-    if os.path.exists(calib_file):
-        with open(calib_file, 'r') as f:
-            return json.load(f)
-    return None
-
 def calculer_barre_progression(valeur, min_val, max_val, largeur=20):
     """Crée une barre de progression visuelle"""
     if max_val <= min_val:
@@ -66,8 +63,9 @@ def calculer_barre_progression(valeur, min_val, max_val, largeur=20):
     rempli = int(position * largeur)
     return "█" * rempli + "░" * (largeur - rempli)
 
-def afficher_tableau_temps_reel(positions, calibration, stats=None):
-    """Affiche un tableau formaté avec les positions en temps réel"""
+def lignes_tableau(positions, calibration, stats=None, instrumentation=None,
+                   telemetrie=None):
+    """Lignes du tableau des positions en temps réel (rendues par l'Ecran)"""
     
     # Noms des servos (sans accents pour l'alignement)
     servo_names = {
@@ -75,45 +73,320 @@ def afficher_tableau_temps_reel(positions, calibration, stats=None):
         4: "POIGN-F", 5: "POIGN-R", 6: "PINCE"
     }
     
-    # Clear complet à chaque fois
-    clear_screen()
-    
     # En-tête
-    print("╔══════════════════════════════════════════════════════════╗")
-    print("║     MONITORING TEMPS REEL - POSITIONS SERVOS            ║")
-    print("╚══════════════════════════════════════════════════════════╝")
-    print()
+    lignes = [
+        "╔══════════════════════════════════════════════════════════╗",
+        "║     MONITORING TEMPS REEL - POSITIONS SERVOS            ║",
+        "╚══════════════════════════════════════════════════════════╝",
+        "",
+    ]
     
     # Tableau principal
-    print("╔═════════╦═══════╦═══════╦═══════╦═══════╦══════════════════════╗")
-    print("║ SERVO   ║  POS  ║  MIN  ║ CENTRE║  MAX  ║     GRAPHIQUE        ║")
-    print("╠═════════╬═══════╬═══════╬═══════╬═══════╬══════════════════════╣")
+    lignes.append("╔═════════╦═══════╦═══════╦═══════╦═══════╦══════════════════════╗")
+    lignes.append("║ SERVO   ║  POS  ║  MIN  ║ CENTRE║  MAX  ║     GRAPHIQUE        ║")
+    lignes.append("╠═════════╬═══════╬═══════╬═══════╬═══════╬══════════════════════╣")
     
     for i in range(1, 7):
         nom = f"{i}:{servo_names[i]}"
         pos = positions.get(i, 0)
         
-        if calibration and f"servo_{i}" in calibration:
-            cal = calibration[f"servo_{i}"]
-            min_val = cal.get('min', 0)
-            center = cal.get('center', 2048)
-            max_val = cal.get('max', 4095)
+        if calibration and i in calibration:
+            min_val = calibration.min[i]
+            center = calibration.center[i]
+            max_val = calibration.max[i]
         else:
             min_val, center, max_val = 0, 2048, 4095
         
         barre = calculer_barre_progression(pos, min_val, max_val, 20)
         
-        # Format fixe pour éviter les décalages
-        print(f"║ {nom:<7} ║ {pos:5} ║ {min_val:5} ║ {center:5} ║ {max_val:5} ║ {barre} ║")
+        # Format fixe : seules les cases qui changent sont réécrites
+        lignes.append(f"║ {nom:<7} ║ {pos:5} ║ {min_val:5} ║ {center:5} ║ {max_val:5} ║ {barre} ║")
     
-    print("╚═════════╩═══════╩═══════╩═══════╩═══════╩══════════════════════╝")
+    lignes.append("╚═════════╩═══════╩═══════╩═══════╩═══════╩══════════════════════╝")
+    
+    # Télémétrie (lue à cadence réduite entre deux lectures de positions)
+    if telemetrie:
+        lignes += ["", "🌡️  Télémétrie :", "   SERVO   CHARGE   TEMP   TENSION"]
+        for i in range(1, 7):
+            charge = telemetrie["charge"].get(i)
+            temp = telemetrie["temperature"].get(i)
+            tension = telemetrie["tension"].get(i)
+            charge = f"{decoder_charge(charge):+6.1f}%" if charge is not None else "    ---"
+            temp = f"{temp:3}°C" if temp is not None else "  ---"
+            tension = f"{tension / 10:5.1f} V" if tension is not None else "    ---"
+            lignes.append(f"   {i:<5} {charge}  {temp}  {tension}")
     
-    # Statistiques simplifiées
+    # Fréquences mesurées : lectures du bus et images affichées
     if stats:
-        print(f"\n📊 Rafraîchissement: {stats['FPS']} Hz")
+        lignes.append("")
+        lignes.append(f"📊 Lectures bus : {stats['Lectures']:>5} Hz   Affichage : {stats['Affichage']:>3} Hz")
+        if 'Session' in stats:
+            lignes.append(f"📡 {stats['Session']}")
+        if 'Capture' in stats:
+            lignes.append(f"💾 Capture : {stats['Capture']}")
+    
+    # Statistiques du bus (si instrumentation active)
+    if instrumentation:
+        lignes += ["", "📈 Latence du bus et incidents par servo :"]
+        lignes += [f"   {ligne}" for ligne in instrumentation.lignes()]
     
     # Instruction simple
-    print("\n[Appuyez sur Ctrl+C pour quitter]")
+    lignes += ["", "[Appuyez sur Ctrl+C pour quitter]"]
+    return lignes
+
+# ============================================
+# SUIVI D'UNE SESSION EN MÉMOIRE PARTAGÉE
+# ============================================
+
+def suivre_session(session):
+    """
+    Monitoring d'une téléopération en cours (scripts 6, 7, 8) : l'état
+    publié en mémoire partagée est lu en lecture seule, sans ouvrir le
+    port série ni ajouter de trafic sur le bus.
+    """
+    print("\n🤖 Quel bras suivre ?")
+    print("  [L] LEADER")
+    print("  [F] FOLLOWER")
+    robot_type = 'follower' if input("\nVotre choix : ").strip().upper() == 'F' else 'leader'
+    
+    calibration = charger_calibration(robot_type)
+    if calibration:
+        print("✅ Calibration chargée")
+    else:
+        print("⚠️  Pas de calibration - valeurs par défaut")
+    time.sleep(1)
+    
+    # Rendu dans son propre thread, lecture de la mémoire partagée à FREQUENCE_LECTURE
+    ecran = Ecran(lignes_tableau)
+    ecran.start()
+    publies = session.publies
+    fps_time = time.time()
+    current_fps = 0
+    
+    try:
+        while session.actif():
+            instantane = session.instantane()
+            if instantane is None:
+                time.sleep(1.0 / FREQUENCE_LECTURE)
+                continue
+            
+            telemetrie = None
+            if robot_type == 'leader':
+                positions, origine = instantane['leader'], "positions lues"
+            elif instantane['follower']:
+                positions, origine = instantane['follower'], "positions relues"
+                telemetrie = instantane['telemetrie'] if any(instantane['telemetrie'].values()) else None
+            else:
+                # Boucles sans relecture du Follower (scripts 6 et 7) : consignes envoyées
+                positions, origine = instantane['consignes'], "consignes envoyées"
+            
+            # Fréquence réelle du bus : états publiés par la boucle chaque seconde
+            current_time = time.time()
+            if current_time - fps_time >= 1.0:
+                current_fps = round((session.publies - publies) / (current_time - fps_time))
+                publies = session.publies
+                fps_time = current_time
+            
+            age = (time.perf_counter() - instantane['horodatage']) * 1000
+            stats = {
+                "Lectures": f"{current_fps}",
+                "Affichage": f"{ecran.frequence_reelle():.0f}",
+                "Session": (f"{session.source} (PID {session.pid}) : {robot_type.upper()} {origine}, "
+                            f"boucle {instantane['frequence']:.1f} Hz, "
+                            f"{instantane['depassements']} dépassements, état vieux de {age:.0f} ms"
+                            + (" ⏸️  pause" if session.pause else ""))
+            }
+            ecran.publier({i: positions.get(i, 0) for i in range(1, 7)},
+                          calibration, stats, None, telemetrie)
+            time.sleep(1.0 / FREQUENCE_LECTURE)
+        
+        ecran.stop()
+        print("\n✅ Session terminée")
+    
+    except KeyboardInterrupt:
+        ecran.stop()
+        print("\n✅ Monitoring arrêté proprement")
+    
+    finally:
+        print(ecran.resume())
+        session.fermer()
+        print("\n👋 Monitoring terminé")
+
+# ============================================
+# LEADER + FOLLOWER : ÉCART DE SUIVI
+# ============================================
+
+def lignes_tableau_double(leader, cibles, follower, ecarts, stats):
+    """Lignes du tableau Leader / consigne / Follower avec l'écart de suivi"""
+    servo_names = {
+        1: "BASE", 2: "EPAULE", 3: "COUDE",
+        4: "POIGN-F", 5: "POIGN-R", 6: "PINCE"
+    }
+    
+    lignes = [
+        "╔══════════════════════════════════════════════════════════╗",
+        "║     MONITORING LEADER + FOLLOWER - ÉCART DE SUIVI       ║",
+        "╚══════════════════════════════════════════════════════════╝",
+        "",
+        "╔═════════╦═══════╦═══════╦═══════╦═══════╦═══════╦═══════╗",
+        "║ SERVO   ║LEADER ║ CIBLE ║FOLLOW.║ ÉCART ║ MOYEN ║  MAX  ║",
+        "╠═════════╬═══════╬═══════╬═══════╬═══════╬═══════╬═══════╣",
+    ]
+    
+    def case(valeur, format_valeur="5"):
+        return f"{valeur:{format_valeur}}" if valeur is not None else "  ---"
+    
+    for i in range(1, 7):
+        ecart, moyen, maximum = ecarts.get(i, (None, None, None))
+        nom = f"{i}:{servo_names[i]}"
+        lignes.append(f"║ {nom:<7} ║ {case(leader.get(i))} ║ {case(cibles.get(i))} ║ "
+                      f"{case(follower.get(i))} ║ {case(ecart, '+5')} ║ {case(moyen, '5.1f')} ║ "
+                      f"{case(maximum)} ║")
+    
+    lignes.append("╚═════════╩═══════╩═══════╩═══════╩═══════╩═══════╩═══════╝")
+    lignes.append("   ÉCART = FOLLOWER - CIBLE (pas), MOYEN = écart absolu moyen")
+    lignes.append("")
+    lignes.append(f"📊 Lectures bus : LEADER {stats['Leader']:>4} Hz   FOLLOWER {stats['Follower']:>4} Hz   "
+                  f"Affichage : {stats['Affichage']:>3} Hz")
+    lignes += ["", "[Appuyez sur Ctrl+C pour quitter]"]
+    return lignes
+
+def ouvrir_deux_bras():
+    """Leader et Follower : identité USB mémorisée, sinon choix du port Leader"""
+    bras = identification_rapide()
+    if bras:
+        return bras
+    
+    ports = detect_ports()
+    if len(ports) < 2:
+        print("❌ Deux adaptateurs USB nécessaires (Leader et Follower)")
+        return None
+    print("\n🔌 Port du LEADER ?")
+    for n, port in enumerate(ports, 1):
+        print(f"  [{n}] {port}")
+    choix = input("\nVotre choix : ").strip()
+    indice = int(choix) - 1 if choix.isdigit() and 1 <= int(choix) <= len(ports) else 0
+    port_leader = ports[indice]
+    port_follower = next(port for port in ports if port != port_leader)
+    
+    leader = ouvrir_bras(port_leader, "LEADER")
+    if leader is None:
+        return None
+    follower = ouvrir_bras(port_follower, "FOLLOWER")
+    if follower is None:
+        leader.disconnect()
+        return None
+    return leader, follower
+
+def monitoring_double():
+    """
+    Leader et Follower en même temps (BoucleTeleop) : position Leader,
+    consigne calculée, position Follower et écart de suivi par servo,
+    bilan des écarts à la fin.
+    """
+    bras = ouvrir_deux_bras()
+    if bras is None:
+        print("❌ Erreur de connexion")
+        return
+    leader, follower = bras
+    
+    calib_l = charger_calibration('leader')
+    calib_f = charger_calibration('follower')
+    if not calib_l or not calib_f:
+        print("⚠️  Calibration manquante - course complète par défaut")
+    
+    print("\n🪞 Montage des bras ?")
+    print("  [C] CÔTÉ À CÔTÉ")
+    print("  [F] FACE À FACE")
+    mode = "face" if input("\nVotre choix : ").strip().upper() == 'F' else "cote"
+    mapping = MappingTeleop(calib_l, calib_f, charger_config_teleoperation(mode))
+    
+    print("\n🎮 Le FOLLOWER suit-il le LEADER ?")
+    print("  [O] Oui : téléopération à 100 Hz (qualité du suivi, retard du Follower)")
+    print("  [N] Non : deux bras libres (comparaison à la main)")
+    pilote = input("\nVotre choix : ").strip().upper() != 'N'
+    
+    if pilote:
+        # Comme les scripts de téléopération : départ d'une pose connue, pas de saut du Follower
+        centrage_parallele(leader, follower, calib_l, calib_f)
+        time.sleep(0.5)
+        position_repos_parallele(leader, follower, calib_l, calib_f)
+        print("\n⚠️  Tenez le LEADER - Suivi dans 3 secondes...")
+        time.sleep(3)
+    
+    leader.set_torque(False)
+    follower.set_torque(pilote)
+    
+    # À FREQUENCE_LECTURE : lecture Leader, consigne, relecture Follower
+    ecarts = EcartsSuivi()
+    boucle = BoucleTeleop(leader, follower, mapping if pilote else (lambda positions: {}),
+                          periode=1.0 / FREQUENCE_LECTURE,
+                          filtre=FiltreConsignes() if pilote else None)
+    boucle.observateur = lambda positions_leader, positions_follower: ecarts.ajouter(
+        mapping(positions_leader), positions_follower)
+    
+    ecran = Ecran(lignes_tableau_double)
+    boucle.start()
+    ecran.start()
+    
+    ticks = (0, 0)
+    fps_time = time.time()
+    stats = {"Leader": "0", "Follower": "0", "Affichage": "0"}
+    
+    try:
+        while True:
+            positions_leader, positions_follower = boucle.etat()
+            
+            # Fréquences réelles : lectures Leader et cycles Follower par seconde
+            current_time = time.time()
+            if current_time - fps_time >= 1.0:
+                duree = current_time - fps_time
+                stats = {
+                    "Leader": f"{round((boucle.tick_leader - ticks[0]) / duree)}",
+                    "Follower": f"{round((boucle.tick_follower - ticks[1]) / duree)}",
+                    "Affichage": f"{ecran.frequence_reelle():.0f}",
+                }
+                ticks = (boucle.tick_leader, boucle.tick_follower)
+                fps_time = current_time
+            
+            ecran.publier(positions_leader, mapping(positions_leader), positions_follower,
+                          ecarts.instantane(), stats)
+            time.sleep(1.0 / FREQUENCE_AFFICHAGE)
+    
+    except KeyboardInterrupt:
+        ecran.stop()
+        print("\n✅ Monitoring arrêté proprement")
+    
+    except Exception as e:
+        ecran.stop()
+        print(f"\n❌ Erreur : {e}")
+    
+    finally:
+        boucle.stop()
+        print(boucle.resume())
+        print(ecarts.resume())
+        leader.afficher_erreurs()
+        follower.afficher_erreurs()
+        
+        if pilote:
+            # Position repos avant libération : le Follower ne tombe pas
+            print("\n🏁 Retour position repos...")
+            try:
+                position_repos_parallele(leader, follower, calib_l, calib_f)
+                print("\n⚠️  Assurez-vous de tenir les robots")
+                time.sleep(2)
+            except Exception as e:
+                print(f"⚠️  Retour repos impossible : {e}")
+        
+        print("\n🔌 Libération de tous les servos...")
+        for un_bras in (leader, follower):
+            try:
+                un_bras.set_torque(False)
+            except:
+                pass
+            un_bras.disconnect()
+        print("✅ Ports fermés")
+        print("\n👋 Monitoring terminé")
 
 # ============================================
 # PROGRAMME PRINCIPAL
@@ -131,6 +404,17 @@ def main():
 ╚══════════════════════════════════════════════════════════╝
     """)
     
+    # Téléopération en cours : elle tient déjà le port, on suit son état publié
+    session = EtatPartage.lecteur()
+    if session is not None and session.actif():
+        print(f"📡 Session « {session.source} » en cours (PID {session.pid})")
+        choix = input("   La suivre en mémoire partagée, sans ouvrir le port ? [O/N] : ").strip().upper()
+        if choix != 'N':
+            suivre_session(session)
+            return
+    if session is not None:
+        session.fermer()
+    
     # Détection du port
     PORT = detect_port()
     if not PORT:
@@ -147,10 +431,14 @@ def main():
     print("\n🤖 Quel robot monitorer ?")
     print("  [L] LEADER")
     print("  [F] FOLLOWER")
+    print("  [D] LES DEUX (écart de suivi Leader → Follower)")
     
     choix = input("\nVotre choix : ").strip().upper()
     
-    if choix == 'F':
+    if choix == 'D':
+        monitoring_double()
+        return
+    elif choix == 'F':
         robot_type = 'follower'
     else:
         robot_type = 'leader'  # Par défaut si entrée vide ou L
@@ -165,79 +453,111 @@ def main():
         print("⚠️  Pas de calibration - valeurs par défaut")
     
     # Connexion
-    BAUDRATE = 1000000
-    portHandler = PortHandler(PORT)
-    packetHandler = PacketHandler(1.0)
-    
-    if not portHandler.openPort() or not portHandler.setBaudRate(BAUDRATE):
+    bras = ouvrir_bras(PORT, robot_type.upper())
+    if bras is None:
         print("❌ Erreur de connexion")
         return
     
+    # Statistiques du bus : latence de chaque appel, incidents par servo
+    choix = input("\n📈 Afficher les statistiques du bus ? [O/N] : ").strip().upper()
+    if choix == 'O':
+        bras.activer_instrumentation()
+    
+    # Capture : chaque lecture gardée (fichier binaire) pour analyser oscillations et jeu
+    print("\n💾 Capture des lectures à pleine cadence du bus ?")
+    print("  [N] Non (affichage seul)")
+    print("  [P] Positions")
+    print("  [C] Positions + vitesse, charge, tension, température (même paquet)")
+    choix = input("\nVotre choix : ").strip().upper()
+    capture = None
+    if choix in ('P', 'C'):
+        capture = Capture(fichier_capture(robot_type), robot_type.upper(), telemetrie=(choix == 'C'))
+    
     print("\n🚀 Démarrage du monitoring...")
     print("   Chargement des servos...")
     time.sleep(1)
     
     # Variables de monitoring
-    positions = {}
     fps_counter = 0
     fps_time = time.time()
     current_fps = 0
-    servos_actifs = 0
     
     # Désactiver tous les servos au début
-    for i in range(1, 7):
-        packetHandler.write1ByteTxRx(portHandler, i, 40, 0)
+    bras.set_torque(False)
+    
+    # Positions à chaque tick, télémétrie répartie dans le temps libre du bus
+    planificateur = PlanificateurBus(bras, periode=1.0 / FREQUENCE_LECTURE)
     
     print("   Initialisation terminée")
     time.sleep(1)
     
+    # Rendu dans son propre thread : un terminal lent ne freine pas les lectures
+    ecran = Ecran(lignes_tableau)
+    ecran.start()
+    if capture is not None:
+        capture.start()
+    
     try:
         while True:
-            # Lecture des positions
-            for servo_id in range(1, 7):
-                pos, result, _ = packetHandler.read2ByteTxRx(portHandler, servo_id, 56)
-                if result == COMM_SUCCESS:
-                    positions[servo_id] = pos
-                    if servo_id == 1:  # Compter une fois
-                        servos_actifs = len(positions)
+            if capture is None:
+                # Lecture groupée des positions (un seul paquet) + télémétrie due
+                lues, _ = planificateur.tick(bras.read_positions)
+                telemetrie = planificateur.valeurs()
+            else:
+                # Capture : lectures enchaînées sans pause, chacune rangée dans le tampon
+                horodatage = time.perf_counter()
+                if capture.telemetrie:
+                    lues, telemetrie, _ = lire_etat_complet(bras)
                 else:
-                    positions[servo_id] = 0
+                    (lues, _), telemetrie = bras.read_positions(), None
+                capture.ajouter(horodatage, lues, telemetrie)
+            positions = {servo_id: lues.get(servo_id, 0) for servo_id in range(1, 7)}
             
-            # Calcul FPS
-            fps_counter += 1
+            # Fréquence réelle du bus : lectures de positions abouties par seconde
+            fps_counter += bool(lues)
             current_time = time.time()
             if current_time - fps_time >= 1.0:
-                current_fps = fps_counter
+                current_fps = round(fps_counter / (current_time - fps_time))
                 fps_counter = 0
                 fps_time = current_time
             
-            # Statistiques minimales
             stats = {
-                "FPS": f"{current_fps}"
+                "Lectures": f"{current_fps}",
+                "Affichage": f"{ecran.frequence_reelle():.0f}",
             }
+            if capture is not None:
+                stats["Capture"] = f"{capture.ajoutes} lectures, {capture.pertes} perdues"
             
-            # Affichage
-            afficher_tableau_temps_reel(positions, calibration, stats)
+            # Dépôt des valeurs pour le thread d'affichage (non bloquant)
+            ecran.publier(positions, calibration, stats, bras.instrumentation, telemetrie)
             
-            # Pause pour limiter la charge CPU
-            time.sleep(0.05)  # ~20 FPS max
+            # Pause jusqu'au tick suivant (pas de pause en capture)
+            if capture is None:
+                planificateur.attendre()
             
     except KeyboardInterrupt:
-        print("\n\n✅ Monitoring arrêté proprement")
+        ecran.stop()
+        print("\n✅ Monitoring arrêté proprement")
     
     except Exception as e:
+        ecran.stop()
         print(f"\n❌ Erreur : {e}")
     
     finally:
+        print(ecran.resume())
+        if capture is not None:
+            capture.stop()
+            print(capture.resume())
+        bras.afficher_erreurs()
+
         # Libération finale
         print("\n🔌 Libération de tous les servos...")
-        for i in range(1, 7):
-            try:
-                packetHandler.write1ByteTxRx(portHandler, i, 40, 0)
-            except:
-                pass
+        try:
+            bras.set_torque(False)
+        except:
+            pass
         
-        portHandler.closePort()
+        bras.disconnect()
         print("✅ Port fermé")
         print("\n👋 Monitoring terminé")
 
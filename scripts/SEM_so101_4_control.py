@@ -4,13 +4,16 @@ Script SEM_so101_4_control.py
 Contrôle manuel Leader ou Follower avec mouvements fluides
 Version complète avec flèches, tableau, positions
 """
-import sys, os, time, json, math
+import sys, os, time, json
 import termios, tty
 
 # Auto-activation de l'environnement lerobot si nécessaire
 try:
     sys.path.append(os.path.expanduser('~/lerobot'))
     from dynamixel_sdk import *
+    # Pilote commun du bus (SEM_so101_bus.py, même dossier)
+    from SEM_so101_bus import detect_ports, ouvrir_bras, charger_calibration, ADDR_TORQUE_ENABLE
+    from SEM_so101_trajectoire import Trajectoire, executer, mouvement_par_etapes, pose_pourcentage, etapes
 except ImportError:
     print("\n🔧 Activation automatique de l'environnement lerobot...")
     import subprocess
@@ -27,15 +30,6 @@ except ImportError:
 def clear_screen():
     os.system('clear')
 
-def detect_ports():
-    """Détecte les ports USB disponibles"""
-    ports = []
-    for port in ['/dev/ttyACM0', '/dev/ttyACM1', '/dev/ttyUSB0', '/dev/ttyUSB1']:
-        if os.path.exists(port):
-            os.system(f"sudo chmod 666 {port} 2>/dev/null")
-            ports.append(port)
-    return ports
-
 def getch():
     """Capture d'une touche clavier avec gestion des flèches"""
     fd = sys.stdin.fileno()
@@ -49,39 +43,53 @@ def getch():
         termios.tcsetattr(fd, termios.TCSADRAIN, old_settings)
     return ch
 
-def mouvement_fluide(packetHandler, portHandler, servo_id, pos_debut, pos_fin, duree=2.0):
+def mouvement_fluide(bras, servo_id, pos_debut, pos_fin, duree=2.0):
     """Mouvement fluide avec courbe sinusoïdale"""
-    steps = 100  # Plus de steps pour plus de fluidité
-    for step in range(steps + 1):
-        t = step / steps
-        # Courbe sinusoïdale pour fluidité
-        smooth_t = (1 - math.cos(t * math.pi)) / 2
-        pos = int(pos_debut + (pos_fin - pos_debut) * smooth_t)
-        packetHandler.write2ByteTxRx(portHandler, servo_id, 42, pos)
-        time.sleep(duree / steps)
+    # Plus de steps pour plus de fluidité
+    executer([(bras, Trajectoire({servo_id: pos_debut}, {servo_id: pos_fin}, duree, steps=100))])
     return pos_fin
 
-def charger_calibration(robot_type):
-    """Charge la calibration d'un robot"""
-    calib_file = os.path.expanduser(f"~/lerobot/calibration/{robot_type}_calibration.json")
-    if os.path.exists(calib_file):
-        with open(calib_file, 'r') as f:
-            return json.load(f)
-    return None
-
 def get_servo_center(servo_id, calibration):
     """Obtient la position centrale d'un servo"""
-    if calibration and f"servo_{servo_id}" in calibration:
-        return calibration[f"servo_{servo_id}"]["center"]
+    if calibration and servo_id in calibration:
+        return calibration.center[servo_id]
     else:
         # Valeurs par défaut si pas de calibration
         defaults = {1: 2079, 2: 1991, 3: 2073, 4: 2027, 5: 2075, 6: 2483}
         return defaults.get(servo_id, 2048)
 
-def position_initiale(packetHandler, portHandler, calibration):
+# Ordre anti-collision (avant, après) : "après" ne démarre qu'une fois "avant"
+# arrivé. Les servos sans contrainte bougent en parallèle dès la 1re étape.
+# Le poignet et la pince ne bougent jamais avant que l'épaule soit en place.
+ORDRE_REPLI = [(3, 2), (2, 1), (2, 4), (2, 5), (2, 6)]           # coude, épaule, puis le reste
+ORDRE_CENTRAGE_HAUT = [(2, 3), (2, 1), (2, 4), (2, 5), (2, 6)]   # bras haut : épaule d'abord
+ORDRE_CENTRAGE_BAS = [(3, 2), (4, 2), (2, 1), (2, 5), (2, 6)]    # bras bas : coude et poignet d'abord
+
+# Étapes attendues (ordre de sécurité historique : 3, 2, 1, 4, 5, 6 au repli ;
+# 2 puis 3, 4, 5, 6, 1 en haut ; 3, 4 puis 2 puis 5, 6, 1 en bas)
+ETAPES_SECURITE = (
+    (ORDRE_REPLI, [[3], [2], [1, 4, 5, 6]]),
+    (ORDRE_CENTRAGE_HAUT, [[2], [1, 3, 4, 5, 6]]),
+    (ORDRE_CENTRAGE_BAS, [[3, 4], [2], [1, 5, 6]]),
+)
+
+def verifier_ordres():
+    """True si chaque ordre anti-collision donne bien les étapes de sécurité attendues"""
+    ok = True
+    for ordre, attendues in ETAPES_SECURITE:
+        obtenues = etapes(range(1, 7), ordre)
+        if obtenues != attendues:
+            print(f"❌ Ordre {ordre} : étapes {obtenues}, attendu {attendues}")
+            ok = False
+    return ok
+
+# Poses confiées aux servos (vitesse / accélération écrites une fois, une
+# seule consigne par étape) ; False = 100 consignes diffusées par étape
+PROFIL_SERVO = True
+
+def position_initiale(bras, calibration):
     """Position initiale sécurisée avec pourcentages de vos mesures"""
     print("🔄 Mise en position initiale...")
-    positions = {}
     
     # Position initiale basée sur VOS MESURES
     positions_pct = {
@@ -94,66 +102,46 @@ def position_initiale(packetHandler, portHandler, calibration):
     }
     
     # D'abord activer tous les servos
-    for i in range(1, 7):
-        packetHandler.write1ByteTxRx(portHandler, i, 40, 1)
-        pos, _, _ = packetHandler.read2ByteTxRx(portHandler, i, 56)
-        positions[i] = pos
-    
-    # SÉQUENCE SÉCURISÉE : Servos 3 et 2 d'abord (éviter collision)
-    for servo_id in [3, 2, 1, 4, 5, 6]:
-        if calibration and f'servo_{servo_id}' in calibration:
-            min_val = calibration[f'servo_{servo_id}']['min']
-            max_val = calibration[f'servo_{servo_id}']['max']
-            target = int(min_val + (max_val - min_val) * positions_pct[servo_id] / 100)
-        else:
-            target = 2048
-        
-        positions[servo_id] = mouvement_fluide(packetHandler, portHandler, servo_id, 
-                                              positions[servo_id], target, 2.5)
+    bras.set_torque(True)
+    
+    # SÉQUENCE SÉCURISÉE : coude, puis épaule, puis base, poignet et pince
+    positions, bilan = mouvement_par_etapes(bras, pose_pourcentage(calibration, positions_pct),
+                                            ORDRE_REPLI, 2.5, steps=100,
+                                            profil_servo=PROFIL_SERVO)
     
     print("✅ Position initiale atteinte")
+    print(f"   {bilan}")
     return positions
 
-def centrer_tous(packetHandler, portHandler, calibration, positions):
+def centrer_tous(bras, calibration, positions):
     """Centre tous les servos avec séquence sécurisée"""
     print("🎯 Centrage de tous les servos...")
     
-    # Lire positions actuelles
+    # Lecture groupée des positions actuelles
+    lues, _ = bras.read_positions()
     for i in range(1, 7):
-        pos, _, _ = packetHandler.read2ByteTxRx(portHandler, i, 56)
-        positions[i] = pos
+        positions[i] = lues.get(i, 2048)
     
     # Déterminer la séquence selon la position du servo 2
-    pos_servo2 = positions[2]
-    centre_servo2 = get_servo_center(2, calibration)
+    centres = {i: get_servo_center(i, calibration) for i in range(1, 7)}
     
-    if pos_servo2 >= centre_servo2:
+    if positions[2] >= centres[2]:
         # Séquence si bras haut
         print("  → Séquence bras haut")
-        positions[2] = mouvement_fluide(packetHandler, portHandler, 2, 
-                                       positions[2], centre_servo2, 2.5)
-        for servo_id in [3, 4, 5, 6, 1]:
-            centre = get_servo_center(servo_id, calibration)
-            positions[servo_id] = mouvement_fluide(packetHandler, portHandler, servo_id,
-                                                  positions[servo_id], centre, 2.5)
+        ordre = ORDRE_CENTRAGE_HAUT
     else:
         # Séquence si bras bas
         print("  → Séquence bras bas")
-        for servo_id in [3, 4]:
-            centre = get_servo_center(servo_id, calibration)
-            positions[servo_id] = mouvement_fluide(packetHandler, portHandler, servo_id,
-                                                  positions[servo_id], centre, 2.5)
-        positions[2] = mouvement_fluide(packetHandler, portHandler, 2, 
-                                       positions[2], centre_servo2, 2.5)
-        for servo_id in [5, 6, 1]:
-            centre = get_servo_center(servo_id, calibration)
-            positions[servo_id] = mouvement_fluide(packetHandler, portHandler, servo_id,
-                                                  positions[servo_id], centre, 2.5)
+        ordre = ORDRE_CENTRAGE_BAS
+    
+    positions, bilan = mouvement_par_etapes(bras, centres, ordre, 2.5, steps=100,
+                                            profil_servo=PROFIL_SERVO)
     
     print("✅ Tous les servos centrés")
+    print(f"   {bilan}")
     return positions
 
-def position_repos(packetHandler, portHandler, calibration):
+def position_repos(bras, calibration):
     """Position repos avec pourcentages identiques aux scripts 5 et 6"""
     print("😴 Position repos...")
     
@@ -167,28 +155,15 @@ def position_repos(packetHandler, portHandler, calibration):
         6: 11   # PINCE presque fermée
     }
     
-    positions = {}
-    
-    # Lire positions actuelles
-    for i in range(1, 7):
-        pos, _, _ = packetHandler.read2ByteTxRx(portHandler, i, 56)
-        positions[i] = pos
-    
-    # Séquence sécurisée : 3, 2, 1, 4, 5, 6
-    for servo_id in [3, 2, 1, 4, 5, 6]:
-        if calibration and f'servo_{servo_id}' in calibration:
-            min_val = calibration[f'servo_{servo_id}']['min']
-            max_val = calibration[f'servo_{servo_id}']['max']
-            target = int(min_val + (max_val - min_val) * repos_pct[servo_id] / 100)
-        else:
-            target = 2048
-        
-        positions[servo_id] = mouvement_fluide(packetHandler, portHandler, servo_id,
-                                              positions[servo_id], target, 2.0)
+    # Séquence sécurisée : 3, puis 2, puis 1, 4, 5, 6
+    positions, bilan = mouvement_par_etapes(bras, pose_pourcentage(calibration, repos_pct),
+                                            ORDRE_REPLI, 2.0, steps=100,
+                                            profil_servo=PROFIL_SERVO)
     
+    print(f"   {bilan}")
     return positions
 
-def position_attraper(packetHandler, portHandler, calibration):
+def position_attraper(bras, calibration):
     """Position pour attraper/manipuler"""
     print("🤏 Position manipulation...")
     
@@ -202,28 +177,15 @@ def position_attraper(packetHandler, portHandler, calibration):
         6: 75   # PINCE ouverte
     }
     
-    positions = {}
-    
-    # Lire positions actuelles
-    for i in range(1, 7):
-        pos, _, _ = packetHandler.read2ByteTxRx(portHandler, i, 56)
-        positions[i] = pos
-    
-    # Appliquer positions
-    for servo_id in range(1, 7):
-        if calibration and f'servo_{servo_id}' in calibration:
-            min_val = calibration[f'servo_{servo_id}']['min']
-            max_val = calibration[f'servo_{servo_id}']['max']
-            target = int(min_val + (max_val - min_val) * manip_pct[servo_id] / 100)
-        else:
-            target = 2048
-        
-        positions[servo_id] = mouvement_fluide(packetHandler, portHandler, servo_id,
-                                              positions[servo_id], target, 2.0)
+    # Pas de contrainte d'ordre : tous les servos ensemble
+    positions, bilan = mouvement_par_etapes(bras, pose_pourcentage(calibration, manip_pct),
+                                            [], 2.0, steps=100,
+                                            profil_servo=PROFIL_SERVO)
     
+    print(f"   {bilan}")
     return positions
 
-def afficher_positions(packetHandler, portHandler, calibration):
+def afficher_positions(bras, calibration):
     """Affiche un tableau détaillé des positions"""
     print("\n" + "="*60)
     print("TABLEAU DES POSITIONS")
@@ -232,16 +194,20 @@ def afficher_positions(packetHandler, portHandler, calibration):
     servo_names = {1: "BASE", 2: "ÉPAULE", 3: "COUDE", 
                   4: "POIGNET-F", 5: "POIGNET-R", 6: "PINCE"}
     
+    # Lecture groupée des positions et de l'état du couple
+    lues, _ = bras.read_positions()
+    couples, _ = bras.read_register(ADDR_TORQUE_ENABLE, 1)
+
     for i in range(1, 7):
-        pos, _, _ = packetHandler.read2ByteTxRx(portHandler, i, 56)
-        torque, _, _ = packetHandler.read1ByteTxRx(portHandler, i, 40)
+        pos = lues.get(i, 0)
+        torque = couples.get(i, 0)
         
         status = "ON" if torque == 1 else "OFF"
         
-        if calibration and f'servo_{i}' in calibration:
-            min_val = calibration[f'servo_{i}']['min']
-            max_val = calibration[f'servo_{i}']['max']
-            center = calibration[f'servo_{i}']['center']
+        if calibration and i in calibration:
+            min_val = calibration.min[i]
+            max_val = calibration.max[i]
+            center = calibration.center[i]
             
             # Calculer pourcentage
             pct = ((pos - min_val) / (max_val - min_val)) * 100 if max_val > min_val else 50
@@ -261,6 +227,9 @@ def clear_lines(n=1):
 
 def main():
     clear_screen()
+    if not verifier_ordres():
+        print("❌ Ordres anti-collision incohérents - aucun mouvement lancé")
+        return
     print("""
 ╔══════════════════════════════════════════════════════════╗
 ║     CONTRÔLE MANUEL SO-ARM 101                          ║
@@ -288,10 +257,8 @@ def main():
     print(f"\n🔡 Connexion au {robot_type} sur {port}...")
     
     # Connexion
-    portHandler = PortHandler(port)
-    packetHandler = PacketHandler(1.0)
-    
-    if not portHandler.openPort() or not portHandler.setBaudRate(1000000):
+    bras = ouvrir_bras(port, robot_type.upper())
+    if bras is None:
         print(f"❌ Erreur connexion {port}")
         return
     
@@ -306,7 +273,7 @@ def main():
         calibration = None
     
     # Position initiale
-    positions = position_initiale(packetHandler, portHandler, calibration)
+    positions = position_initiale(bras, calibration)
     
     servo_actif = 1
     pas_normal = 50
@@ -347,13 +314,13 @@ def main():
             # Flèches - on efface seulement les 3 dernières lignes
             if key == '[A':  # Flèche HAUT
                 pas = pas_precis if mode_precis else pas_normal
-                if calibration and f'servo_{servo_actif}' in calibration:
-                    max_val = calibration[f'servo_{servo_actif}']['max']
+                if calibration and servo_actif in calibration:
+                    max_val = calibration.max[servo_actif]
                     nouvelle_pos = min(positions[servo_actif] + pas, max_val)
                 else:
                     nouvelle_pos = min(positions[servo_actif] + pas, 4095)
                 
-                packetHandler.write2ByteTxRx(portHandler, servo_actif, 42, nouvelle_pos)
+                bras.write_goal(servo_actif, nouvelle_pos)
                 positions[servo_actif] = nouvelle_pos
                 clear_lines(3)
                 print(f"Servo actif: {servo_actif} ({servo_names[servo_actif]})")
@@ -362,13 +329,13 @@ def main():
                 
             elif key == '[B':  # Flèche BAS
                 pas = pas_precis if mode_precis else pas_normal
-                if calibration and f'servo_{servo_actif}' in calibration:
-                    min_val = calibration[f'servo_{servo_actif}']['min']
+                if calibration and servo_actif in calibration:
+                    min_val = calibration.min[servo_actif]
                     nouvelle_pos = max(positions[servo_actif] - pas, min_val)
                 else:
                     nouvelle_pos = max(positions[servo_actif] - pas, 0)
                 
-                packetHandler.write2ByteTxRx(portHandler, servo_actif, 42, nouvelle_pos)
+                bras.write_goal(servo_actif, nouvelle_pos)
                 positions[servo_actif] = nouvelle_pos
                 clear_lines(3)
                 print(f"Servo actif: {servo_actif} ({servo_names[servo_actif]})")
@@ -392,8 +359,7 @@ def main():
             # Commandes
             elif key == ' ':  # ESPACE - Centrer servo actif
                 centre = get_servo_center(servo_actif, calibration)
-                positions[servo_actif] = mouvement_fluide(packetHandler, portHandler, 
-                                                         servo_actif, positions[servo_actif], 
+                positions[servo_actif] = mouvement_fluide(bras, servo_actif, positions[servo_actif], 
                                                          centre, 1.5)
                 clear_lines(3)
                 print(f"Servo actif: {servo_actif} ({servo_names[servo_actif]}) [CENTRÉ]")
@@ -401,14 +367,14 @@ def main():
                 print(f"Position: {positions[servo_actif]}")
                 
             elif key.lower() == 'i':  # Position initiale
-                positions = position_initiale(packetHandler, portHandler, calibration)
+                positions = position_initiale(bras, calibration)
                 clear_lines(3)
                 print("Position INITIALE activée!")
                 print(f"Mode: {'PRÉCIS (pas=10)' if mode_precis else 'NORMAL (pas=50)'}")
                 print(f"Position servo {servo_actif}: {positions[servo_actif]}")
                 
             elif key.lower() == 'c':  # Centrer TOUS
-                positions = centrer_tous(packetHandler, portHandler, calibration, positions)
+                positions = centrer_tous(bras, calibration, positions)
                 clear_lines(3)
                 print("Tous les servos centrés!")
                 print(f"Mode: {'PRÉCIS (pas=10)' if mode_precis else 'NORMAL (pas=50)'}")
@@ -422,7 +388,7 @@ def main():
                 print(f"Position: {positions[servo_actif]}")
                 
             elif key.lower() == 's':  # Afficher positions
-                afficher_positions(packetHandler, portHandler, calibration)
+                afficher_positions(bras, calibration)
                 print("\n[Appuyez sur une touche pour continuer]")
                 getch()
                 # Réafficher le menu complet après le tableau
@@ -450,14 +416,14 @@ def main():
                 print(f"Position: {positions[servo_actif]}")
                 
             elif key.lower() == 'a':  # Position attraper
-                positions = position_attraper(packetHandler, portHandler, calibration)
+                positions = position_attraper(bras, calibration)
                 clear_lines(3)
                 print("Position ATTRAPER activée!")
                 print(f"Mode: {'PRÉCIS (pas=10)' if mode_precis else 'NORMAL (pas=50)'}")
                 print(f"Position servo {servo_actif}: {positions[servo_actif]}")
                 
             elif key.lower() == 'r':  # Position repos
-                positions = position_repos(packetHandler, portHandler, calibration)
+                positions = position_repos(bras, calibration)
                 clear_lines(3)
                 print("Position REPOS activée!")
                 print(f"Mode: {'PRÉCIS (pas=10)' if mode_precis else 'NORMAL (pas=50)'}")
@@ -465,8 +431,7 @@ def main():
                 
             elif key.lower() == 'x':  # Arrêt urgence
                 print("\n⚠️  ARRÊT D'URGENCE!")
-                for i in range(1, 7):
-                    packetHandler.write1ByteTxRx(portHandler, i, 40, 0)
+                bras.set_torque(False)
                 print("Tous les servos libérés!")
                 time.sleep(2)
                 break
@@ -480,16 +445,16 @@ def main():
     
     # Séquence de fin
     print("\n🏁 Position repos avant libération...")
-    position_repos(packetHandler, portHandler, calibration)
+    position_repos(bras, calibration)
     
     print("⚠️  Tenez le robot avant libération")
     time.sleep(2)
     
     # Libération
-    for i in range(1, 7):
-        packetHandler.write1ByteTxRx(portHandler, i, 40, 0)
+    bras.set_torque(False)
+    bras.afficher_erreurs()
     
-    portHandler.closePort()
+    bras.disconnect()
     print("\n✅ Terminé!")
 
 if __name__ == "__main__":
@@ -3,20 +3,30 @@
 Script SEM_so101_7_teleoperation_camera.py
 Téléopération Leader → Follower AVEC CAMÉRA
 Basé EXACTEMENT sur le script 6 avec JUSTE l'ajout de la caméra
+
+La caméra est lue et affichée dans ses propres threads (SEM_so101_camera.py) :
+la boucle Leader → Follower ne l'attend jamais et garde ses 100 Hz.
 """
 import os
 import sys
-import json
 import time
-import math
 import threading
 import queue
-import cv2  # SEUL AJOUT ICI
 
 # Auto-activation de l'environnement lerobot si nécessaire
 try:
     sys.path.append(os.path.expanduser('~/lerobot'))
     from dynamixel_sdk import *
+    # Pilote commun du bus (SEM_so101_bus.py, même dossier)
+    from SEM_so101_bus import detect_ports, ouvrir_bras, charger_calibration, test_connexion_fluide
+    from SEM_so101_bus import charger_config_teleoperation, centrage_parallele, position_repos_parallele
+    from SEM_so101_identification import identification_rapide, memoriser_identification
+    from SEM_so101_teleop import FiltreConsignes
+    from SEM_so101_mapping import MappingTeleop
+    from SEM_so101_cadence import Cadence
+    from SEM_so101_etat import EtatPartage
+    # Caméra lue et affichée hors de la boucle (SEM_so101_camera.py)
+    from SEM_so101_camera import ThreadedCamera, AffichageCamera
 except ImportError:
     print("\n🔧 Activation automatique de l'environnement lerobot...")
     import subprocess
@@ -33,88 +43,15 @@ except ImportError:
 # Variable globale pour arrêt propre
 stop_threads = False
 
-def clear_screen():
-    os.system('clear')
+# Cadence de la boucle Leader → Follower (Hz)
+FREQUENCE_TELEOP = 100
 
-def detect_ports():
-    """Détecte les ports USB disponibles"""
-    ports = []
-    for port in ['/dev/ttyACM0', '/dev/ttyACM1', '/dev/ttyUSB0', '/dev/ttyUSB1']:
-        if os.path.exists(port):
-            os.system(f"sudo chmod 666 {port} 2>/dev/null")
-            ports.append(port)
-    return ports
-
-def charger_calibration(robot_type):
-    """Charge la calibration d'un robot"""
-    calib_file = os.path.expanduser(f"~/lerobot/calibration/{robot_type}_calibration.json")
-    if os.path.exists(calib_file):
-        with open(calib_file, 'r') as f:
-            return json.load(f)
-    return None
-
-def charger_config_teleoperation(mode):
-    """Charge la configuration COPIE/MIROIR"""
-    config_file = os.path.expanduser(f"~/lerobot/calibration/teleoperation_config_{mode}.json")
-    if os.path.exists(config_file):
-        with open(config_file, 'r') as f:
-            data = json.load(f)
-            print(f"  📁 Configuration chargée depuis : {config_file}")
-            return data.get('servos_miroir', [])
-    else:
-        print(f"  ⚠️ Pas de configuration trouvée, tout en COPIE par défaut")
-        return []
-
-def mouvement_fluide(packet, port, servo, debut, fin, duree=1.5):
-    """Mouvement fluide entre deux positions"""
-    steps = int(duree * 50)
-    for i in range(steps + 1):
-        t = i / steps
-        smooth = (1 - math.cos(t * math.pi)) / 2
-        pos = int(debut + (fin - debut) * smooth)
-        packet.write2ByteTxRx(port, servo, 42, pos)
-        time.sleep(duree / steps)
-
-def test_connexion_fluide(packet, port, robot_name, calib):
-    """Test fluide de connexion avec calibration"""
-    print(f"\n  🔄 Test de connexion {robot_name}...")
-
-    # Activer le servo 6
-    packet.write1ByteTxRx(port, 6, 40, 1)
-
-    if calib and 'servo_6' in calib:
-        centre = calib['servo_6']['center']
-        min_val = calib['servo_6']['min']
-        max_val = calib['servo_6']['max']
-
-        # Calculer positions à 45° (environ 25% et 75% de l'amplitude)
-        amplitude = max_val - min_val
-        pos_25 = int(min_val + amplitude * 0.25)
-        pos_75 = int(min_val + amplitude * 0.75)
-
-        # Lire position actuelle
-        pos_actuelle, _, _ = packet.read2ByteTxRx(port, 6, 56)
-
-        # Séquence fluide : Actuel → Centre → 25% → 75% → Centre
-        print("     → Centre...")
-        mouvement_fluide(packet, port, 6, pos_actuelle, centre, 1.0)
-        print("     → Fermé (45°)...")
-        mouvement_fluide(packet, port, 6, centre, pos_25, 0.8)
-        print("     → Ouvert (90°)...")
-        mouvement_fluide(packet, port, 6, pos_25, pos_75, 1.2)
-        print("     → Centre...")
-        mouvement_fluide(packet, port, 6, pos_75, centre, 0.8)
-    else:
-        # Valeurs par défaut si pas de calibration
-        packet.write2ByteTxRx(port, 6, 42, 2048)
-        time.sleep(1)
-        packet.write2ByteTxRx(port, 6, 42, 1500)
-        time.sleep(1)
-        packet.write2ByteTxRx(port, 6, 42, 2500)
-        time.sleep(1)
-        packet.write2ByteTxRx(port, 6, 42, 2048)
+# Caméra affichée pendant la téléopération
+INDEX_CAMERA = 0
+FENETRE_CAMERA = 'Camera SO-ARM 101'
 
-    print(f"  ✅ {robot_name} connecté et testé")
+def clear_screen():
+    os.system('clear')
 
 def identification_guidee():
     """Identifie Leader et Follower avec test fluide"""
@@ -125,6 +62,12 @@ def identification_guidee():
 ╚══════════════════════════════════════════════════════════╝
     """)
 
+    # Identité USB mémorisée : vérification rapide, sans débrancher
+    bras = identification_rapide()
+    if bras:
+        leader, follower = bras
+        return leader, follower, charger_calibration('leader'), charger_calibration('follower')
+
     # Débrancher tout
     ports = detect_ports()
     while len(ports) > 0:
@@ -140,25 +83,24 @@ def identification_guidee():
     ports = detect_ports()
     if len(ports) == 0:
         print("❌ Aucun port détecté")
-        return None, None, None, None, None, None
+        return None, None, None, None
 
     leader_port = ports[0]
     print(f"✅ LEADER détecté sur {leader_port}")
 
-    lp = PortHandler(leader_port)
-    lk = PacketHandler(1.0)
-    if not lp.openPort() or not lp.setBaudRate(1000000):
+    leader = ouvrir_bras(leader_port, "LEADER")
+    if leader is None:
         print("❌ Erreur connexion Leader")
-        return None, None, None, None, None, None
+        return None, None, None, None
 
     # Charger calibration Leader pour test
     calib_l = charger_calibration('leader')
 
     # Test fluide Leader avec calibration
-    test_connexion_fluide(lk, lp, "LEADER", calib_l)
+    test_connexion_fluide(leader, calib_l)
 
     if input("\nPince du LEADER bougée? [O/N]: ").upper() != 'O':
-        return None, None, None, None, None, None
+        return None, None, None, None
 
     # Follower
     print("\n🔌 Branchez le FOLLOWER (gardez Leader branché)")
@@ -168,179 +110,65 @@ def identification_guidee():
     ports = detect_ports()
     if len(ports) < 2:
         print("❌ Follower non détecté")
-        return None, None, None, None, None, None
+        return None, None, None, None
 
     follower_port = ports[1] if ports[0] == leader_port else ports[0]
     print(f"✅ FOLLOWER détecté sur {follower_port}")
 
-    fp = PortHandler(follower_port)
-    fk = PacketHandler(1.0)
-    if not fp.openPort() or not fp.setBaudRate(1000000):
+    follower = ouvrir_bras(follower_port, "FOLLOWER")
+    if follower is None:
         print("❌ Erreur connexion Follower")
-        return None, None, None, None, None, None
+        return None, None, None, None
 
     # Charger calibration Follower pour test
     calib_f = charger_calibration('follower')
 
     # Test fluide Follower avec calibration
-    test_connexion_fluide(fk, fp, "FOLLOWER", calib_f)
+    test_connexion_fluide(follower, calib_f)
 
     if input("\nPince du FOLLOWER bougée? [O/N]: ").upper() != 'O':
-        return None, None, None, None, None, None
+        return None, None, None, None
 
+    memoriser_identification(leader_port, follower_port)
     print("\n✅ Identification réussie!")
-    return lp, lk, fp, fk, calib_l, calib_f
-
-def centrage_parallele(lk, lp, fk, fp, calib_l, calib_f):
-    """Centre tous les servos EN PARALLÈLE de manière fluide"""
-    print("\n🎯 Centrage simultané des robots...")
-
-    # Activer tous les servos
-    for i in range(1, 7):
-        lk.write1ByteTxRx(lp, i, 40, 1)
-        fk.write1ByteTxRx(fp, i, 40, 1)
-
-    # Lire positions actuelles
-    pos_l = {}
-    pos_f = {}
-    for i in range(1, 7):
-        pos_l[i], _, _ = lk.read2ByteTxRx(lp, i, 56)
-        pos_f[i], _, _ = fk.read2ByteTxRx(fp, i, 56)
-
-    # Mouvement simultané fluide vers centre
-    duree = 2.0
-    steps = int(duree * 50)
-
-    for step in range(steps + 1):
-        t = step / steps
-        smooth = (1 - math.cos(t * math.pi)) / 2
-
-        for i in range(1, 7):
-            # Leader
-            centre_l = calib_l[f'servo_{i}']['center'] if calib_l else 2048
-            new_pos_l = int(pos_l[i] + (centre_l - pos_l[i]) * smooth)
-            lk.write2ByteTxRx(lp, i, 42, new_pos_l)
-
-            # Follower
-            centre_f = calib_f[f'servo_{i}']['center'] if calib_f else 2048
-            new_pos_f = int(pos_f[i] + (centre_f - pos_f[i]) * smooth)
-            fk.write2ByteTxRx(fp, i, 42, new_pos_f)
-
-        time.sleep(duree / steps)
-
-    print("✅ Robots centrés")
-
-def position_repos_parallele(lk, lp, fk, fp, calib_l, calib_f):
-    """Met les deux robots en position repos IDENTIQUE (même % pour chaque servo)"""
-    print("\n🏁 Position repos simultanée...")
-
-    # Position repos en pourcentage - IDENTIQUE pour les deux robots
-    # Validée par l'utilisateur après tests physiques
-    repos_pct = {
-        1: 50,  # BASE centrée (imposé)
-        2: 10,  # ÉPAULE très basse (replié)
-        3: 88,  # COUDE très haut (replié)
-        4: 76,  # POIGNET bien fléchi
-        5: 50,  # ROTATION centrée (imposé)
-        6: 11,  # PINCE presque fermée
-    }
-
-    # Calculer les positions absolues pour chaque robot
-    repos_l = {}
-    repos_f = {}
-
-    for i in range(1, 7):
-        pct = repos_pct[i] / 100.0
-
-        # Leader : position selon son calibrage
-        if calib_l and f'servo_{i}' in calib_l:
-            min_l = calib_l[f'servo_{i}']['min']
-            max_l = calib_l[f'servo_{i}']['max']
-            repos_l[i] = int(min_l + (max_l - min_l) * pct)
-        else:
-            repos_l[i] = 2048
-
-        # Follower : MÊME pourcentage mais avec SON calibrage
-        if calib_f and f'servo_{i}' in calib_f:
-            min_f = calib_f[f'servo_{i}']['min']
-            max_f = calib_f[f'servo_{i}']['max']
-            repos_f[i] = int(min_f + (max_f - min_f) * pct)
-        else:
-            repos_f[i] = 2048
-
-    # Activer tous les servos
-    for i in range(1, 7):
-        lk.write1ByteTxRx(lp, i, 40, 1)
-        fk.write1ByteTxRx(fp, i, 40, 1)
-
-    # Lire positions actuelles
-    pos_l = {}
-    pos_f = {}
-    for i in range(1, 7):
-        pos_l[i], _, _ = lk.read2ByteTxRx(lp, i, 56)
-        pos_f[i], _, _ = fk.read2ByteTxRx(fp, i, 56)
-
-    # Mouvement simultané fluide vers repos
-    duree = 2.0
-    steps = int(duree * 50)
-
-    for step in range(steps + 1):
-        t = step / steps
-        smooth = (1 - math.cos(t * math.pi)) / 2
-
-        for i in range(1, 7):
-            # Leader vers sa position repos
-            new_pos_l = int(pos_l[i] + (repos_l[i] - pos_l[i]) * smooth)
-            lk.write2ByteTxRx(lp, i, 42, new_pos_l)
-
-            # Follower vers sa position repos (même % que Leader)
-            new_pos_f = int(pos_f[i] + (repos_f[i] - pos_f[i]) * smooth)
-            fk.write2ByteTxRx(fp, i, 42, new_pos_f)
-
-        time.sleep(duree / steps)
-
-    print("✅ Position repos atteinte (robot replié)")
-
-def mapper_position(pos_leader, servo_id, calib_leader, calib_follower, servos_miroir):
-    """Mapping proportionnel avec gestion COPIE/MIROIR"""
-    if calib_leader and f"servo_{servo_id}" in calib_leader:
-        min_l = calib_leader[f"servo_{servo_id}"]["min"]
-        max_l = calib_leader[f"servo_{servo_id}"]["max"]
-    else:
-        min_l, max_l = 0, 4095
-
-    if calib_follower and f"servo_{servo_id}" in calib_follower:
-        min_f = calib_follower[f"servo_{servo_id}"]["min"]
-        max_f = calib_follower[f"servo_{servo_id}"]["max"]
-    else:
-        min_f, max_f = 0, 4095
-
-    # Calcul ratio
-    ratio = (pos_leader - min_l) / (max_l - min_l) if max_l > min_l else 0.5
-    ratio = max(0, min(1, ratio))
+    return leader, follower, calib_l, calib_f
 
-    # Appliquer miroir si configuré
-    if servo_id in servos_miroir:
-        ratio = 1 - ratio
-
-    pos_follower = int(min_f + ratio * (max_f - min_f))
-    return max(min_f, min(max_f, pos_follower))
-
-def teleoperation(lk, lp, fk, fp, calib_l, calib_f, mode):
+def teleoperation(leader, follower, calib_l, calib_f, mode):
     """Boucle principale de téléopération"""
     global stop_threads
 
-    # AJOUT CAMÉRA - INIT (4 lignes seulement)
-    cap = cv2.VideoCapture(0)
-    camera_ok = False
-    if cap.isOpened():
-        cv2.namedWindow('Camera SO-ARM 101', cv2.WINDOW_NORMAL)
-        camera_ok = True
+    # AJOUT CAMÉRA - lecture et affichage dans leurs threads, jamais dans la boucle
+    camera = ThreadedCamera(INDEX_CAMERA, "Caméra")
+    affichage = None
+
+    def activer_camera():
+        nonlocal affichage
+        if not camera.connect():
+            return False
+        affichage = AffichageCamera(camera, FENETRE_CAMERA)
+        affichage.start()
+        return True
+
+    def couper_camera():
+        nonlocal affichage
+        affichage.stop()
+        print(affichage.resume())
+        affichage = None
+        camera.disconnect()
+
+    camera_active = activer_camera()
+    if camera_active:
         print("📷 Caméra activée")
+    else:
+        print("⚠️  Pas de caméra - téléopération sans vidéo ([C] pour réessayer)")
 
     clear_screen()
     mode_name = "CÔTÉ À CÔTÉ" if mode == "cote" else "FACE À FACE"
-    servos_miroir = charger_config_teleoperation(mode)
+    # Correspondances des deux montages compilées une fois : F ne fait qu'échanger les tables
+    mappings = {m: MappingTeleop(calib_l, calib_f, charger_config_teleoperation(m))
+                for m in ("cote", "face")}
+    mapping = mappings[mode]
+    servos_miroir = mapping.servos_miroir
 
     print(f"""
 ╔══════════════════════════════════════════════════════════╗
@@ -352,16 +180,28 @@ def teleoperation(lk, lp, fk, fp, calib_l, calib_f, mode):
     print("\n🎮 Commandes:")
     print("  [Q] + Enter : Quitter")
     print("  [F] + Enter : Flip mode (côté ↔ face)")
+    print("  [C] + Enter : Caméra on/off (compare la cadence avec et sans)")
     print("-" * 40)
 
     # Libérer Leader, Activer Follower
-    for i in range(1, 7):
-        lk.write1ByteTxRx(lp, i, 40, 0)
-        fk.write1ByteTxRx(fp, i, 40, 1)
+    leader.set_torque(False)
+    follower.set_torque(True)
 
     print("\n✅ Téléopération active!")
     print("🤖 Bougez le LEADER, le FOLLOWER suit\n")
 
+    # Écriture sur changement : seules les consignes qui bougent partent sur le bus
+    filtre = FiltreConsignes()
+
+    # Échéances fixes : cadence réelle connue, dépassements comptés
+    # Une cadence avec caméra, une sans : [C] passe de l'une à l'autre
+    cadences = {True: Cadence(FREQUENCE_TELEOP, "téléopération, caméra active"),
+                False: Cadence(FREQUENCE_TELEOP, "téléopération, sans caméra")}
+    cadence = cadences[camera_active]
+
+    # État publié en mémoire partagée : le moniteur (script 3) le suit sans ouvrir de port
+    etat_publie = EtatPartage.publication("téléopération")
+
     running = True
     stop_threads = False
     cmd_queue = queue.Queue()
@@ -394,46 +234,70 @@ def teleoperation(lk, lp, fk, fp, calib_l, calib_f, mode):
 
                 elif cmd == 'F':
                     mode = "face" if mode == "cote" else "cote"
-                    servos_miroir = charger_config_teleoperation(mode)
+                    mapping = mappings[mode]
+                    servos_miroir = mapping.servos_miroir
                     mode_name = "CÔTÉ À CÔTÉ" if mode == "cote" else "FACE À FACE"
                     print(f"\n🔄 Mode inversé : {mode_name}")
                     print(f"   Servos miroir : {servos_miroir}")
 
+                elif cmd == 'C':
+                    if camera_active:
+                        couper_camera()
+                        camera_active = False
+                        print("\n📷 Caméra coupée")
+                    elif activer_camera():
+                        camera_active = True
+                        print("\n📷 Caméra activée")
+                    cadence = cadences[camera_active]
+                    # Le temps d'ouverture de la caméra n'est pas un dépassement
+                    cadence.reinitialiser()
+
             except queue.Empty:
                 pass
 
-            # Téléopération active - lecture et écriture groupées
-            positions_leader = {}
-            for servo_id in range(1, 7):
-                pos, result, _ = lk.read2ByteTxRx(lp, servo_id, 56)
-                if result == 0:
-                    positions_leader[servo_id] = pos
-
-            # Envoyer toutes les commandes au Follower
-            for servo_id, pos_l in positions_leader.items():
-                pos_f = mapper_position(pos_l, servo_id, calib_l, calib_f, servos_miroir)
-                fk.write2ByteTxRx(fp, servo_id, 42, pos_f)
-
-            # AJOUT CAMÉRA - AFFICHAGE (6 lignes seulement)
-            if camera_ok:
-                ret, frame = cap.read()
-                if ret:
-                    cv2.imshow('Camera SO-ARM 101', frame)
-                    if cv2.waitKey(1) & 0xFF == ord('q'):
-                        stop_threads = True
-
-            time.sleep(0.01)
+            # Téléopération active - lecture groupée du Leader (un seul paquet)
+            positions_leader, _ = leader.read_positions()
+
+            # Envoyer toutes les commandes au Follower en un seul paquet
+            consignes = mapping(positions_leader)
+            cibles_follower = filtre.filtrer(consignes)
+            if cibles_follower:
+                follower.write_goals(cibles_follower)
+            if etat_publie is not None:
+                etat_publie.publier(positions_leader, {},
+                                    cycles=cadences[True].cycles + cadences[False].cycles,
+                                    consignes=consignes,
+                                    frequence=cadence.frequence_reelle(),
+                                    depassements=cadence.depassements)
+
+            # AJOUT CAMÉRA - Q dans la fenêtre (images lues et affichées par leurs threads)
+            if camera_active and affichage.quitter:
+                print("\n👋 Arrêt de la téléopération...")
+                stop_threads = True
+                running = False
+
+            cadence.attendre()
 
     except KeyboardInterrupt:
         stop_threads = True
         print("\n⚠️ Interruption clavier détectée")
 
-    # AJOUT CAMÉRA - FERMETURE (3 lignes seulement)
-    if camera_ok:
-        cap.release()
-        cv2.destroyAllWindows()
+    if etat_publie is not None:
+        etat_publie.fermer()
+    # AJOUT CAMÉRA - FERMETURE
+    if camera_active:
+        couper_camera()
         print("📷 Caméra fermée")
 
+    for active in (True, False):
+        if cadences[active].cycles:
+            print(cadences[active].resume())
+    if cadences[True].cycles and cadences[False].cycles:
+        print(f"📷 Cadence téléopération : {cadences[True].frequence_reelle():.1f} Hz avec caméra, "
+              f"{cadences[False].frequence_reelle():.1f} Hz sans")
+    print(filtre.resume())
+    leader.afficher_erreurs()
+
 def main():
     global stop_threads
 
@@ -450,7 +314,7 @@ def main():
         print("❌ Identification échouée")
         return
 
-    lp, lk, fp, fk, calib_l, calib_f = result
+    leader, follower, calib_l, calib_f = result
 
     # Choix mode
     print("\n[C]ôte à côte ou [F]ace à face?")
@@ -462,41 +326,40 @@ def main():
 
     # Centrage automatique après connexion
     print("\n🎯 Positionnement automatique...")
-    centrage_parallele(lk, lp, fk, fp, calib_l, calib_f)
+    centrage_parallele(leader, follower, calib_l, calib_f)
 
     time.sleep(0.5)  # Petite pause
 
     # Position repos automatique
-    position_repos_parallele(lk, lp, fk, fp, calib_l, calib_f)
+    position_repos_parallele(leader, follower, calib_l, calib_f)
 
     print("\n⚠️  Tenez le LEADER - Téléopération dans 3 secondes...")
     time.sleep(3)
 
     # Téléopération
-    teleoperation(lk, lp, fk, fp, calib_l, calib_f, mode)
+    teleoperation(leader, follower, calib_l, calib_f, mode)
 
     # Position repos avant libération
     print("\n🏁 Retour position repos...")
     stop_threads = True
 
     # Activer tous les servos pour le mouvement final
-    for i in range(1, 7):
-        lk.write1ByteTxRx(lp, i, 40, 1)
-        fk.write1ByteTxRx(fp, i, 40, 1)
+    leader.set_torque(True)
+    follower.set_torque(True)
 
-    position_repos_parallele(lk, lp, fk, fp, calib_l, calib_f)
+    position_repos_parallele(leader, follower, calib_l, calib_f)
 
     print("\n⚠️  Assurez-vous de tenir les robots")
     time.sleep(2)
 
     # Libération finale
-    for i in range(1, 7):
-        lk.write1ByteTxRx(lp, i, 40, 0)
-        fk.write1ByteTxRx(fp, i, 40, 0)
+    leader.set_torque(False)
+    follower.set_torque(False)
 
     # Fermeture
-    lp.closePort()
-    fp.closePort()
+    follower.afficher_erreurs()
+    leader.disconnect()
+    follower.disconnect()
 
     print("\n✅ Téléopération terminée!")
     print("📊 Configuration utilisée :")
@@ -28,7 +28,6 @@ import os
 import sys
 import json
 import time
-import math
 import threading
 import queue
 from datetime import datetime
@@ -59,6 +58,20 @@ except ImportError:
 try:
     sys.path.append(os.path.expanduser('~/lerobot'))
     from dynamixel_sdk import *
+    # Pilote commun du bus (SEM_so101_bus.py, même dossier)
+    from SEM_so101_bus import detect_ports, ouvrir_bras, charger_calibration, test_connexion_fluide
+    from SEM_so101_bus import (charger_config_teleoperation, centrage_parallele,
+                               position_repos_parallele, REPOS_PCT)
+    from SEM_so101_identification import identification_rapide, memoriser_identification
+    # Boucle Leader → Follower (SEM_so101_teleop.py)
+    from SEM_so101_teleop import BoucleTeleop, FiltreConsignes
+    from SEM_so101_mapping import MappingTeleop
+    from SEM_so101_cadence import Cadence
+    from SEM_so101_planificateur import PlanificateurBus
+    from SEM_so101_processus import BoucleProcessus
+    from SEM_so101_etat import EtatPartage
+    # Caméras lues dans leur propre thread (SEM_so101_camera.py)
+    from SEM_so101_camera import ThreadedCamera
 except ImportError:
     print("\n🔧 Activation automatique de l'environnement lerobot...")
     import subprocess
@@ -90,6 +103,19 @@ CONFIG = {
     'episodes_per_position': 10,
     'camera_width': 640,
     'camera_height': 480,
+    # Zone morte des consignes Follower (pas) et renvoi de maintien (s)
+    'zone_morte': 2,
+    'maintien': 0.5,
+    # Température Follower (°C) au-delà de laquelle un avertissement s'affiche
+    'temperature_alerte': 55,
+    # Centrage / repos confiés aux servos (vitesse et accélération écrites
+    # une fois, une consigne par robot) au lieu de 100 consignes diffusées
+    'profil_servo': True,
+    # Boucle Leader → Follower dans un processus dédié (cœur épinglé,
+    # priorité haute si autorisée) : caméras, affichage et encodage ne
+    # ralentissent plus le bras. None = dernier cœur du processeur
+    'processus_teleop': False,
+    'coeur_teleop': None,
 }
 
 # Noms des caméras (comme LeRobot)
@@ -101,95 +127,6 @@ stop_threads = False
 pause_teleop = False
 cmd_queue = queue.Queue()
 
-# ============================================
-# CLASSE THREADED CAMERA (architecture LeRobot)
-# ============================================
-
-class ThreadedCamera:
-    """
-    Caméra avec thread de lecture dédié (architecture LeRobot).
-    Le thread lit en continu et stocke la dernière frame.
-    async_read() retourne immédiatement la dernière frame disponible.
-    """
-
-    def __init__(self, camera_index, name, width=640, height=480, fps=30):
-        self.camera_index = camera_index
-        self.name = name
-        self.width = width
-        self.height = height
-        self.fps = fps
-
-        self.camera = None
-        self.is_connected = False
-        self.thread = None
-        self.stop_event = None
-        self.current_frame = None
-        self.frame_lock = threading.Lock()
-
-    def connect(self):
-        """Connecte la caméra et démarre le thread de lecture"""
-        if self.is_connected:
-            return True
-
-        if not CV2_AVAILABLE:
-            return False
-
-        self.camera = cv2.VideoCapture(self.camera_index)
-        if not self.camera.isOpened():
-            print(f"❌ Impossible d'ouvrir {self.name} (index {self.camera_index})")
-            return False
-
-        # Configurer la caméra
-        self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
-        self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
-        self.camera.set(cv2.CAP_PROP_FPS, self.fps)
-
-        # Lire une première frame pour initialiser (warmup comme LeRobot)
-        ret, frame = self.camera.read()
-        if ret:
-            self.current_frame = frame
-
-        self.is_connected = True
-
-        # Démarrer le thread de lecture
-        self.stop_event = threading.Event()
-        self.thread = threading.Thread(target=self._read_loop, daemon=True)
-        self.thread.start()
-
-        print(f"   ✅ {self.name} connectée (index {self.camera_index})")
-        return True
-
-    def _read_loop(self):
-        """Boucle de lecture en continu (dans son propre thread)"""
-        while not self.stop_event.is_set():
-            if self.camera and self.camera.isOpened():
-                ret, frame = self.camera.read()
-                if ret:
-                    with self.frame_lock:
-                        self.current_frame = frame
-            # Petite pause pour ne pas surcharger le CPU
-            time.sleep(0.001)
-
-    def async_read(self):
-        """Retourne la dernière frame disponible (non-bloquant)"""
-        with self.frame_lock:
-            return self.current_frame.copy() if self.current_frame is not None else None
-
-    def disconnect(self):
-        """Arrête le thread et libère la caméra"""
-        if self.thread is not None:
-            self.stop_event.set()
-            self.thread.join(timeout=1.0)
-            self.thread = None
-            self.stop_event = None
-
-        if self.camera is not None:
-            self.camera.release()
-            self.camera = None
-
-        self.is_connected = False
-        self.current_frame = None
-
 def detect_cameras():
     """Détecte les caméras disponibles"""
     if not CV2_AVAILABLE:
@@ -323,105 +260,10 @@ def identification_cameras():
 def clear_screen():
     os.system('clear')
 
-def detect_ports():
-    """Détecte les ports USB disponibles"""
-    ports = []
-    for port in ['/dev/ttyACM0', '/dev/ttyACM1', '/dev/ttyUSB0', '/dev/ttyUSB1']:
-        if os.path.exists(port):
-            os.system(f"sudo chmod 666 {port} 2>/dev/null")
-            ports.append(port)
-    return ports
-
-def charger_calibration(robot_type):
-    """Charge la calibration d'un robot"""
-    calib_file = os.path.expanduser(f"~/lerobot/calibration/{robot_type}_calibration.json")
-    if os.path.exists(calib_file):
-        with open(calib_file, 'r') as f:
-            return json.load(f)
-    return None
-
-def charger_config_teleoperation(mode):
-    """Charge la configuration COPIE/MIROIR"""
-    config_file = os.path.expanduser(f"~/lerobot/calibration/teleoperation_config_{mode}.json")
-    if os.path.exists(config_file):
-        with open(config_file, 'r') as f:
-            data = json.load(f)
-            return data.get('servos_miroir', [])
-    return []
-
-def mouvement_fluide(packet, port, servo, debut, fin, duree=1.5):
-    """Mouvement fluide entre deux positions"""
-    steps = int(duree * 50)
-    for i in range(steps + 1):
-        t = i / steps
-        smooth = (1 - math.cos(t * math.pi)) / 2
-        pos = int(debut + (fin - debut) * smooth)
-        packet.write2ByteTxRx(port, servo, 42, pos)
-        time.sleep(duree / steps)
-
-def mapper_position(pos_leader, servo_id, calib_leader, calib_follower, servos_miroir):
-    """Mapping proportionnel avec gestion COPIE/MIROIR"""
-    if calib_leader and f"servo_{servo_id}" in calib_leader:
-        min_l = calib_leader[f"servo_{servo_id}"]["min"]
-        max_l = calib_leader[f"servo_{servo_id}"]["max"]
-    else:
-        min_l, max_l = 0, 4095
-
-    if calib_follower and f"servo_{servo_id}" in calib_follower:
-        min_f = calib_follower[f"servo_{servo_id}"]["min"]
-        max_f = calib_follower[f"servo_{servo_id}"]["max"]
-    else:
-        min_f, max_f = 0, 4095
-
-    ratio = (pos_leader - min_l) / (max_l - min_l) if max_l > min_l else 0.5
-    ratio = max(0, min(1, ratio))
-
-    if servo_id in servos_miroir:
-        ratio = 1 - ratio
-
-    pos_follower = int(min_f + ratio * (max_f - min_f))
-    return max(min_f, min(max_f, pos_follower))
-
 # ============================================
 # IDENTIFICATION (du script 7)
 # ============================================
 
-def test_connexion_fluide(packet, port, robot_name, calib):
-    """Test fluide de connexion avec calibration"""
-    print(f"\n  🔄 Test de connexion {robot_name}...")
-
-    packet.write1ByteTxRx(port, 6, 40, 1)
-
-    if calib and 'servo_6' in calib:
-        centre = calib['servo_6']['center']
-        min_val = calib['servo_6']['min']
-        max_val = calib['servo_6']['max']
-
-        amplitude = max_val - min_val
-        pos_25 = int(min_val + amplitude * 0.25)
-        pos_75 = int(min_val + amplitude * 0.75)
-
-        pos_actuelle, _, _ = packet.read2ByteTxRx(port, 6, 56)
-
-        print("     → Centre...")
-        mouvement_fluide(packet, port, 6, pos_actuelle, centre, 1.0)
-        print("     → Fermé (45°)...")
-        mouvement_fluide(packet, port, 6, centre, pos_25, 0.8)
-        print("     → Ouvert (90°)...")
-        mouvement_fluide(packet, port, 6, pos_25, pos_75, 1.2)
-        print("     → Centre...")
-        mouvement_fluide(packet, port, 6, pos_75, centre, 0.8)
-    else:
-        packet.write2ByteTxRx(port, 6, 42, 2048)
-        time.sleep(1)
-        packet.write2ByteTxRx(port, 6, 42, 1500)
-        time.sleep(1)
-        packet.write2ByteTxRx(port, 6, 42, 2500)
-        time.sleep(1)
-        packet.write2ByteTxRx(port, 6, 42, 2048)
-
-    print(f"  ✅ {robot_name} connecté et testé")
-
 def identification_guidee():
     """Identifie Leader et Follower avec test fluide"""
     clear_screen()
@@ -431,6 +273,12 @@ def identification_guidee():
 ╚══════════════════════════════════════════════════════════════════════╝
     """)
 
+    # Identité USB mémorisée : vérification rapide, sans débrancher
+    bras = identification_rapide()
+    if bras:
+        leader, follower = bras
+        return leader, follower, charger_calibration('leader'), charger_calibration('follower')
+
     ports = detect_ports()
     while len(ports) > 0:
         print(f"⚠️  Débranchez tous les robots")
@@ -444,22 +292,21 @@ def identification_guidee():
     ports = detect_ports()
     if len(ports) == 0:
         print("❌ Aucun port détecté")
-        return None, None, None, None, None, None
+        return None, None, None, None
 
     leader_port = ports[0]
     print(f"✅ LEADER détecté sur {leader_port}")
 
-    lp = PortHandler(leader_port)
-    lk = PacketHandler(1.0)
-    if not lp.openPort() or not lp.setBaudRate(1000000):
+    leader = ouvrir_bras(leader_port, "LEADER")
+    if leader is None:
         print("❌ Erreur connexion Leader")
-        return None, None, None, None, None, None
+        return None, None, None, None
 
     calib_l = charger_calibration('leader')
-    test_connexion_fluide(lk, lp, "LEADER", calib_l)
+    test_connexion_fluide(leader, calib_l)
 
     if input("\nPince du LEADER bougée? [O/N]: ").upper() != 'O':
-        return None, None, None, None, None, None
+        return None, None, None, None
 
     print("\n🔌 Branchez le FOLLOWER (gardez Leader branché)")
     input("   Entrée quand branché...")
@@ -468,119 +315,32 @@ def identification_guidee():
     ports = detect_ports()
     if len(ports) < 2:
         print("❌ Follower non détecté")
-        return None, None, None, None, None, None
+        return None, None, None, None
 
     follower_port = ports[1] if ports[0] == leader_port else ports[0]
     print(f"✅ FOLLOWER détecté sur {follower_port}")
 
-    fp = PortHandler(follower_port)
-    fk = PacketHandler(1.0)
-    if not fp.openPort() or not fp.setBaudRate(1000000):
+    follower = ouvrir_bras(follower_port, "FOLLOWER")
+    if follower is None:
         print("❌ Erreur connexion Follower")
-        return None, None, None, None, None, None
+        return None, None, None, None
 
     calib_f = charger_calibration('follower')
-    test_connexion_fluide(fk, fp, "FOLLOWER", calib_f)
+    test_connexion_fluide(follower, calib_f)
 
     if input("\nPince du FOLLOWER bougée? [O/N]: ").upper() != 'O':
-        return None, None, None, None, None, None
+        return None, None, None, None
 
+    memoriser_identification(leader_port, follower_port)
     print("\n✅ Identification réussie!")
-    return lp, lk, fp, fk, calib_l, calib_f
+    return leader, follower, calib_l, calib_f
 
 # ============================================
-# POSITIONNEMENT (du script 7)
+# POSITIONNEMENT (SEM_so101_bus.py)
 # ============================================
 
-def centrage_parallele(lk, lp, fk, fp, calib_l, calib_f):
-    """Centre tous les servos en parallèle"""
-    print("\n🎯 Centrage simultané des robots...")
-
-    for i in range(1, 7):
-        lk.write1ByteTxRx(lp, i, 40, 1)
-        fk.write1ByteTxRx(fp, i, 40, 1)
-
-    pos_l = {}
-    pos_f = {}
-    for i in range(1, 7):
-        pos_l[i], _, _ = lk.read2ByteTxRx(lp, i, 56)
-        pos_f[i], _, _ = fk.read2ByteTxRx(fp, i, 56)
-
-    duree = 2.0
-    steps = int(duree * 50)
-
-    for step in range(steps + 1):
-        t = step / steps
-        smooth = (1 - math.cos(t * math.pi)) / 2
-
-        for i in range(1, 7):
-            centre_l = calib_l[f'servo_{i}']['center'] if calib_l else 2048
-            new_pos_l = int(pos_l[i] + (centre_l - pos_l[i]) * smooth)
-            lk.write2ByteTxRx(lp, i, 42, new_pos_l)
-
-            centre_f = calib_f[f'servo_{i}']['center'] if calib_f else 2048
-            new_pos_f = int(pos_f[i] + (centre_f - pos_f[i]) * smooth)
-            fk.write2ByteTxRx(fp, i, 42, new_pos_f)
-
-        time.sleep(duree / steps)
-
-    print("✅ Robots centrés")
-
-def position_repos_parallele(lk, lp, fk, fp, calib_l, calib_f):
-    """Met les deux robots en position repos"""
-    print("\n🏁 Position repos simultanée...")
-
-    repos_pct = {
-        1: 50, 2: 10, 3: 88, 4: 76, 5: 50, 6: 75
-    }
-
-    repos_l = {}
-    repos_f = {}
-
-    for i in range(1, 7):
-        pct = repos_pct[i] / 100.0
-
-        if calib_l and f'servo_{i}' in calib_l:
-            min_l = calib_l[f'servo_{i}']['min']
-            max_l = calib_l[f'servo_{i}']['max']
-            repos_l[i] = int(min_l + (max_l - min_l) * pct)
-        else:
-            repos_l[i] = 2048
-
-        if calib_f and f'servo_{i}' in calib_f:
-            min_f = calib_f[f'servo_{i}']['min']
-            max_f = calib_f[f'servo_{i}']['max']
-            repos_f[i] = int(min_f + (max_f - min_f) * pct)
-        else:
-            repos_f[i] = 2048
-
-    for i in range(1, 7):
-        lk.write1ByteTxRx(lp, i, 40, 1)
-        fk.write1ByteTxRx(fp, i, 40, 1)
-
-    pos_l = {}
-    pos_f = {}
-    for i in range(1, 7):
-        pos_l[i], _, _ = lk.read2ByteTxRx(lp, i, 56)
-        pos_f[i], _, _ = fk.read2ByteTxRx(fp, i, 56)
-
-    duree = 2.0
-    steps = int(duree * 50)
-
-    for step in range(steps + 1):
-        t = step / steps
-        smooth = (1 - math.cos(t * math.pi)) / 2
-
-        for i in range(1, 7):
-            new_pos_l = int(pos_l[i] + (repos_l[i] - pos_l[i]) * smooth)
-            lk.write2ByteTxRx(lp, i, 42, new_pos_l)
-
-            new_pos_f = int(pos_f[i] + (repos_f[i] - pos_f[i]) * smooth)
-            fk.write2ByteTxRx(fp, i, 42, new_pos_f)
-
-        time.sleep(duree / steps)
-
-    print("✅ Position repos atteinte")
+# Position repos de l'enregistrement : celle des scripts 5 à 7, pince ouverte
+REPOS_ENREGISTREMENT = {**REPOS_PCT, 6: 75}
 
 # ============================================
 # CLASSE DATASET RECORDER
@@ -864,44 +624,69 @@ class DatasetRecorder:
 # THREAD DE TÉLÉOPÉRATION
 # ============================================
 
-def teleoperation_thread(lk, lp, fk, fp, calib_l, calib_f, servos_miroir, recorder, cam_top, cam_follower):
+def creer_boucle_teleop(leader, follower, calib_l, calib_f, servos_miroir, etat_publie=None):
+    """
+    Crée la boucle bus Leader → Follower.
+    Les positions Follower ne sont relues qu'au rythme de l'enregistrement
+    et seules les consignes qui bougent sont écrites (zone morte).
+    Le temps libre du port Follower sert à la télémétrie (charge, température, tension).
+    Avec CONFIG['processus_teleop'], la même boucle tourne dans un processus dédié.
+    Chaque cycle est publié dans etat_publie (mémoire partagée) s'il est fourni.
+    """
+    # Correspondance Leader → Follower compilée une fois (tables de 4096 positions)
+    mapper = MappingTeleop(calib_l, calib_f, servos_miroir)
+
+    if CONFIG['processus_teleop']:
+        # Processus dédié : il rouvre les deux ports, la pause lui est recopiée
+        return BoucleProcessus((leader.port_name, follower.port_name), mapper,
+                               en_pause=lambda: pause_teleop,
+                               periode=0.01, periode_follower=1.0 / CONFIG['fps'],
+                               zone_morte=CONFIG['zone_morte'], maintien=CONFIG['maintien'],
+                               coeur=CONFIG['coeur_teleop'], etat_partage=etat_publie)
+
+    # Si en pause, ne pas envoyer de commandes aux servos
+    boucle = BoucleTeleop(leader, follower, mapper,
+                          en_pause=lambda: pause_teleop, periode=0.01,
+                          periode_follower=1.0 / CONFIG['fps'],
+                          filtre=FiltreConsignes(CONFIG['zone_morte'], CONFIG['maintien']),
+                          planificateur=PlanificateurBus(follower, periode=0.01))
+    if etat_publie is not None:
+        boucle.observateur = etat_publie.observateur(boucle, mapper)
+    return boucle
+
+
+def teleoperation_thread(boucle, recorder, cam_top, cam_follower, cadence):
     """
     Thread de téléopération avec 2 caméras (architecture LeRobot).
-    Les caméras ont leurs propres threads de lecture.
-    Ce thread récupère les dernières frames de manière non-bloquante.
+    Les caméras ont leurs propres threads de lecture et le bus est piloté
+    par la boucle Leader → Follower (workers dédiés).
+    Ce thread récupère les dernières frames et positions de manière non-bloquante,
+    une fois par échéance de la cadence (CONFIG['fps']) : pas de temps régulier
+    entre deux frames enregistrées.
     """
     global stop_threads, pause_teleop
 
-    frame_interval = 1.0 / CONFIG['fps']
-    last_record_time = 0
+    servos_chauds = set()
 
     while not stop_threads:
-        loop_start = time.time()
-
-        # Si en pause, ne pas envoyer de commandes aux servos
+        # Si en pause, rien à enregistrer
         if pause_teleop:
+            cadence.reinitialiser()
             time.sleep(0.05)
             continue
 
-        # Lire positions Leader
-        positions_leader = []
-        positions_follower = []
-
-        for servo_id in range(1, 7):
-            pos_l, result, _ = lk.read2ByteTxRx(lp, servo_id, 56)
-            if result == 0:
-                positions_leader.append(float(pos_l))
+        # Dernières positions lues par la boucle Leader → Follower
+        lues_leader, lues_follower = boucle.etat()
 
-                # Mapper et envoyer au Follower
-                pos_f = mapper_position(pos_l, servo_id, calib_l, calib_f, servos_miroir)
-                fk.write2ByteTxRx(fp, servo_id, 42, pos_f)
+        positions_leader = [float(lues_leader.get(i, 2048)) for i in range(1, 7)]
+        positions_follower = [float(lues_follower.get(i, 2048)) for i in range(1, 7)]
 
-                # Lire position réelle Follower
-                pos_f_real, _, _ = fk.read2ByteTxRx(fp, servo_id, 56)
-                positions_follower.append(float(pos_f_real))
-            else:
-                positions_leader.append(2048.0)
-                positions_follower.append(2048.0)
+        # Télémétrie Follower lue dans le temps libre du bus : alerte surchauffe
+        temperatures = boucle.telemetrie().get("temperature", {})
+        chauds = {i for i, t in temperatures.items() if t >= CONFIG['temperature_alerte']}
+        for servo_id in sorted(chauds - servos_chauds):
+            print(f"\n🌡️  Servo {servo_id} du Follower à {temperatures[servo_id]}°C")
+        servos_chauds = chauds
 
         # Récupérer les frames des caméras (non-bloquant via async_read)
         frame_top = None
@@ -913,16 +698,11 @@ def teleoperation_thread(lk, lp, fk, fp, calib_l, calib_f, servos_miroir, record
         if cam_follower and cam_follower.is_connected:
             frame_follower = cam_follower.async_read()
 
-        # Enregistrer si actif (à la bonne fréquence)
-        current_time = time.time()
-        if recorder.is_recording and (current_time - last_record_time >= frame_interval):
+        # Enregistrer si actif (une frame par échéance)
+        if recorder.is_recording:
             recorder.record_frame(positions_follower, positions_leader, frame_top, frame_follower)
-            last_record_time = current_time
 
-        # Maintenir la fréquence
-        elapsed = time.time() - loop_start
-        if elapsed < 0.01:
-            time.sleep(0.01 - elapsed)
+        cadence.attendre()
 
 
 def display_thread(cam_top, cam_follower):
@@ -1179,7 +959,8 @@ def menu_effacer_donnees(recorder):
                 print("\n❌ Annulé.")
                 time.sleep(1)
 
-def session_enregistrement(recorder, position_id, num_episodes, lk, lp, fk, fp, calib_l, calib_f):
+def session_enregistrement(recorder, position_id, num_episodes, leader, follower, calib_l, calib_f,
+                           boucle):
     """Gère une session d'enregistrement pour une position"""
     global stop_threads, pause_teleop
 
@@ -1257,19 +1038,20 @@ def session_enregistrement(recorder, position_id, num_episodes, lk, lp, fk, fp,
 
                     # Suspendre la téléopération pendant le repositionnement
                     pause_teleop = True
-                    time.sleep(0.1)  # Laisser le thread se mettre en pause
-
-                    # Activer tous les servos pour le mouvement
-                    for i in range(1, 7):
-                        lk.write1ByteTxRx(lp, i, 40, 1)
-                        fk.write1ByteTxRx(fp, i, 40, 1)
-
-                    position_repos_parallele(lk, lp, fk, fp, calib_l, calib_f)
-
-                    # Libérer Leader, Activer Follower pour reprendre téléopération
-                    for i in range(1, 7):
-                        lk.write1ByteTxRx(lp, i, 40, 0)
-                        fk.write1ByteTxRx(fp, i, 40, 1)
+                    # Le bus n'est utilisé qu'une fois la pause confirmée par la boucle
+                    if boucle.attendre_pause():
+                        # Activer tous les servos pour le mouvement
+                        leader.set_torque(True)
+                        follower.set_torque(True)
+
+                        position_repos_parallele(leader, follower, calib_l, calib_f,
+                                                 REPOS_ENREGISTREMENT, CONFIG['profil_servo'])
+
+                        # Libérer Leader, Activer Follower pour reprendre téléopération
+                        leader.set_torque(False)
+                        follower.set_torque(True)
+                    else:
+                        print("⚠️  Boucle de téléopération toujours active : repositionnement annulé")
 
                     # Reprendre la téléopération
                     pause_teleop = False
@@ -1344,24 +1126,24 @@ Format de sortie : LeRobotDataset v2.1 (2 caméras: top + follower)
         print("❌ Identification échouée")
         return
 
-    lp, lk, fp, fk, calib_l, calib_f = result
+    leader, follower, calib_l, calib_f = result
 
     # Choix du mode
     print("\n[C]ôte à côte ou [F]ace à face?")
     choix = input("Choix [C]: ").upper()
     mode = "face" if choix == 'F' else "cote"
-    servos_miroir = charger_config_teleoperation(mode)
+    servos_miroir = charger_config_teleoperation(mode, bavard=False)
 
     # Positionnement initial
     print("\n🎯 Positionnement automatique...")
-    centrage_parallele(lk, lp, fk, fp, calib_l, calib_f)
+    centrage_parallele(leader, follower, calib_l, calib_f, CONFIG['profil_servo'])
     time.sleep(0.5)
-    position_repos_parallele(lk, lp, fk, fp, calib_l, calib_f)
+    position_repos_parallele(leader, follower, calib_l, calib_f,
+                             REPOS_ENREGISTREMENT, CONFIG['profil_servo'])
 
     # Libérer Leader, Activer Follower
-    for i in range(1, 7):
-        lk.write1ByteTxRx(lp, i, 40, 0)  # Leader libre
-        fk.write1ByteTxRx(fp, i, 40, 1)  # Follower actif
+    leader.set_torque(False)  # Leader libre
+    follower.set_torque(True)  # Follower actif
 
     # ========================================
     # ÉTAPE 3 : Connexion des CAMÉRAS avec threads
@@ -1397,10 +1179,22 @@ Format de sortie : LeRobotDataset v2.1 (2 caméras: top + follower)
     stop_threads = False
     cmd_queue = queue.Queue()
 
-    # Thread de téléopération (utilise async_read des caméras)
+    # Boucle bus Leader → Follower, état publié pour le moniteur (script 3)
+    etat_publie = EtatPartage.publication("enregistrement")
+    boucle = creer_boucle_teleop(leader, follower, calib_l, calib_f, servos_miroir, etat_publie)
+    try:
+        boucle.start()
+    except RuntimeError as erreur:
+        print(f"⚠️  {erreur} → boucle dans le processus principal")
+        CONFIG['processus_teleop'] = False
+        boucle = creer_boucle_teleop(leader, follower, calib_l, calib_f, servos_miroir, etat_publie)
+        boucle.start()
+
+    # Thread de téléopération (utilise async_read des caméras), cadencé à CONFIG['fps']
+    cadence_enregistrement = Cadence(CONFIG['fps'], "enregistrement")
     teleop_t = threading.Thread(
         target=teleoperation_thread,
-        args=(lk, lp, fk, fp, calib_l, calib_f, servos_miroir, recorder, cam_top, cam_follower),
+        args=(boucle, recorder, cam_top, cam_follower, cadence_enregistrement),
         daemon=True
     )
     teleop_t.start()
@@ -1451,7 +1245,7 @@ Format de sortie : LeRobotDataset v2.1 (2 caméras: top + follower)
                     time.sleep(0.05)
 
                 if pos:
-                    session_enregistrement(recorder, pos, 2, lk, lp, fk, fp, calib_l, calib_f)
+                    session_enregistrement(recorder, pos, 2, leader, follower, calib_l, calib_f, boucle)
 
             elif choix == '3':
                 # Enregistrer 10 épisodes
@@ -1471,7 +1265,7 @@ Format de sortie : LeRobotDataset v2.1 (2 caméras: top + follower)
                         print(f"\n✅ Position {pos} déjà complète!")
                         time.sleep(2)
                     else:
-                        done = session_enregistrement(recorder, pos, remaining, lk, lp, fk, fp, calib_l, calib_f)
+                        done = session_enregistrement(recorder, pos, remaining, leader, follower, calib_l, calib_f, boucle)
                         if done > 0:
                             print(f"\n✅ {done} épisodes enregistrés pour la position {pos}!")
                             time.sleep(2)
@@ -1503,7 +1297,7 @@ Format de sortie : LeRobotDataset v2.1 (2 caméras: top + follower)
                     print(f"\n✅ Position {pos} déjà complète!")
                     time.sleep(2)
                 else:
-                    done = session_enregistrement(recorder, pos, remaining, lk, lp, fk, fp, calib_l, calib_f)
+                    done = session_enregistrement(recorder, pos, remaining, leader, follower, calib_l, calib_f, boucle)
                     if done > 0:
                         print(f"\n✅ {done} épisodes enregistrés pour la position {pos}!")
                         time.sleep(2)
@@ -1515,6 +1309,9 @@ Format de sortie : LeRobotDataset v2.1 (2 caméras: top + follower)
         stop_threads = True
 
         # Attendre un peu pour que les threads s'arrêtent
+        boucle.stop()
+        if etat_publie is not None:
+            etat_publie.fermer()
         time.sleep(0.5)
 
         # Fermer les caméras (ThreadedCamera)
@@ -1527,25 +1324,28 @@ Format de sortie : LeRobotDataset v2.1 (2 caméras: top + follower)
 
         # Afficher résumé
         print(recorder.get_resume())
+        print(boucle.resume())
+        print(cadence_enregistrement.resume())
+        leader.afficher_erreurs()
+        follower.afficher_erreurs()
 
         # Position repos
         print("\n🏁 Retour position repos...")
-        for i in range(1, 7):
-            lk.write1ByteTxRx(lp, i, 40, 1)
-            fk.write1ByteTxRx(fp, i, 40, 1)
+        leader.set_torque(True)
+        follower.set_torque(True)
 
-        position_repos_parallele(lk, lp, fk, fp, calib_l, calib_f)
+        position_repos_parallele(leader, follower, calib_l, calib_f,
+                                 REPOS_ENREGISTREMENT, CONFIG['profil_servo'])
 
         print("\n⚠️  Assurez-vous de tenir les robots")
         time.sleep(2)
 
         # Libération finale
-        for i in range(1, 7):
-            lk.write1ByteTxRx(lp, i, 40, 0)
-            fk.write1ByteTxRx(fp, i, 40, 0)
+        leader.set_torque(False)
+        follower.set_torque(False)
 
-        lp.closePort()
-        fp.closePort()
+        leader.disconnect()
+        follower.disconnect()
 
         print("\n✅ Session terminée!")
 
@@ -0,0 +1,782 @@
+#!/usr/bin/env python3
+"""
+Module SEM_so101_bus.py
+Service Ecoles Médias - Pilote commun du bus des servos SO-ARM 101
+
+La classe So101Arm possède le PortHandler et le PacketHandler d'un bras
+et regroupe toutes les lectures/écritures utilisées par les scripts :
+
+  read_positions() : lecture groupée (SYNC READ) des 6 positions,
+                     un seul paquet d'instruction, relecture servo par
+                     servo si un servo ne répond pas
+  write_goals()    : écriture groupée (SYNC WRITE) des positions cibles,
+                     un seul paquet diffusé sans attente de statut
+  set_torque()     : activation / libération du couple en un paquet
+
+Une optimisation du transport faite ici profite donc à tous les scripts.
+
+Instrumentation optionnelle (SEM_so101_stats.py) : latence de chaque appel
+au bus et incidents par servo, activée par SEM_BUS_STATS=1 ou
+activer_instrumentation(), bilan affiché par afficher_erreurs().
+
+So101ArmSimule remplace le bus réel par des servos simulés (temps de bus
+modélisé) pour comparer les transports sans matériel :
+
+    python SEM_so101_bus.py               → banc d'essai sur bus simulé
+    python SEM_so101_bus.py /dev/ttyACM0  → banc d'essai sur un vrai bras
+"""
+import os
+import sys
+import json
+import math
+import time
+import threading
+
+sys.path.append(os.path.expanduser('~/lerobot'))
+from dynamixel_sdk import (PortHandler, PacketHandler, GroupSyncWrite,
+                           BROADCAST_ID, COMM_SUCCESS, COMM_RX_TIMEOUT, COMM_RX_CORRUPT)
+
+from SEM_so101_stats import InstrumentationBus
+from SEM_so101_calibration import charger_calibration  # réexportée pour les scripts
+from SEM_so101_trajectoire import Trajectoire, executer, executer_profil, centres, pose_pourcentage
+
+# Registres utilisés (table de contrôle Feetech STS3215)
+ADDR_MODEL_NUMBER = 3     # 2 octets (3-4)
+ADDR_ID = 5               # EEPROM
+ADDR_BAUDRATE = 6         # EEPROM, 0 = 1 Mbps
+ADDR_RETURN_DELAY = 7     # EEPROM, délai avant réponse (unité 2 µs)
+ADDR_STATUS_LEVEL = 8     # EEPROM, 0 = réponse aux lectures seulement, 1 = à tout
+ADDR_TORQUE_ENABLE = 40
+ADDR_ACCELERATION = 41    # unité 100 pas/s², 0 = pas de rampe
+ADDR_GOAL_POSITION = 42
+ADDR_GOAL_VELOCITY = 46   # pas/s, 0 = vitesse max
+ADDR_LOCK = 55            # 0 = EEPROM modifiable, 1 = EEPROM verrouillée
+ADDR_PRESENT_POSITION = 56
+ADDR_PRESENT_LOAD = 60        # bit 10 = sens, 0-1000 = 0.1 % du couple max
+ADDR_PRESENT_VOLTAGE = 62     # unité 0.1 V
+ADDR_PRESENT_TEMPERATURE = 63 # °C
+ADDR_MOVING = 66              # 1 tant que le servo n'a pas atteint sa consigne
+
+# Servos d'un bras SO-ARM 101
+SERVO_IDS = (1, 2, 3, 4, 5, 6)
+
+# Numéros de modèle Feetech connus
+MODELES = {777: "STS3215"}
+
+BAUDRATE = 1000000
+PORTS_USB = ['/dev/ttyACM0', '/dev/ttyACM1', '/dev/ttyUSB0', '/dev/ttyUSB1']
+
+# Structure d'un paquet protocole 1.0 (Feetech)
+PKT_ID = 2
+PKT_LENGTH = 3
+PKT_INSTRUCTION = 4
+PKT_ERROR = 4
+PKT_PARAMETER0 = 5
+INST_PING = 0x01
+INST_SYNC_READ = 0x82
+
+# Réponses possibles à un ping diffusé (IDs 0 à 252)
+NB_IDS_MAX = 253
+
+# Nombre d'échecs complets consécutifs avant d'abandonner la lecture groupée
+ECHECS_SYNC_READ_MAX = 3
+
+
+# ============================================
+# FONCTIONS COMMUNES
+# ============================================
+
+def detect_ports():
+    """Détecte les ports USB disponibles"""
+    ports = []
+    for port in PORTS_USB:
+        if os.path.exists(port):
+            os.system(f"sudo chmod 666 {port} 2>/dev/null")
+            ports.append(port)
+    return ports
+
+
+def detect_port():
+    """Détection automatique du premier port USB"""
+    ports = detect_ports()
+    return ports[0] if ports else None
+
+
+def mouvement_fluide(bras, servo_id, debut, fin, duree=1.5, steps=None):
+    """Mouvement fluide avec courbe sinusoïdale entre deux positions"""
+    executer([(bras, Trajectoire({servo_id: debut}, {servo_id: fin}, duree, steps=steps))])
+    return fin
+
+
+def test_connexion_fluide(bras, calib):
+    """Test fluide de connexion : la pince (servo 6) fait un aller-retour"""
+    print(f"\n  🔄 Test de connexion {bras.robot_name}...")
+
+    # Activer le servo 6
+    bras.set_torque(True, [6])
+
+    if calib and 6 in calib:
+        centre = calib.center[6]
+        min_val = calib.min[6]
+
+        # Calculer positions à 45° (environ 25% et 75% de l'amplitude)
+        amplitude = calib.amplitude[6]
+        pos_25 = int(min_val + amplitude * 0.25)
+        pos_75 = int(min_val + amplitude * 0.75)
+
+        # Lire position actuelle
+        pos_actuelle, _ = bras.read(6, ADDR_PRESENT_POSITION)
+
+        # Séquence fluide : Actuel → Centre → 25% → 75% → Centre
+        print("     → Centre...")
+        mouvement_fluide(bras, 6, pos_actuelle, centre, 1.0)
+        print("     → Fermé (45°)...")
+        mouvement_fluide(bras, 6, centre, pos_25, 0.8)
+        print("     → Ouvert (90°)...")
+        mouvement_fluide(bras, 6, pos_25, pos_75, 1.2)
+        print("     → Centre...")
+        mouvement_fluide(bras, 6, pos_75, centre, 0.8)
+    else:
+        # Valeurs par défaut si pas de calibration
+        for position in (2048, 1500, 2500):
+            bras.write_goal(6, position)
+            time.sleep(1)
+        bras.write_goal(6, 2048)
+
+    # Garder le servo actif pour les prochains mouvements
+    print(f"  ✅ {bras.robot_name} connecté et testé")
+
+
+# ============================================
+# LEADER + FOLLOWER (scripts 3, 5, 6, 7, 8)
+# ============================================
+
+# Position repos en pourcentage de la course, IDENTIQUE pour les deux robots
+# Validée par l'utilisateur après tests physiques
+REPOS_PCT = {
+    1: 50,  # BASE centrée (imposé)
+    2: 10,  # ÉPAULE très basse (replié)
+    3: 88,  # COUDE très haut (replié)
+    4: 76,  # POIGNET bien fléchi
+    5: 50,  # ROTATION centrée (imposé)
+    6: 11,  # PINCE presque fermée
+}
+
+
+def charger_config_teleoperation(mode, bavard=True):
+    """Charge la configuration COPIE/MIROIR (liste des servos en miroir)"""
+    config_file = os.path.expanduser(f"~/lerobot/calibration/teleoperation_config_{mode}.json")
+    if os.path.exists(config_file):
+        with open(config_file, 'r') as f:
+            data = json.load(f)
+        if bavard:
+            print(f"  📁 Configuration chargée depuis : {config_file}")
+        return data.get('servos_miroir', [])
+    if bavard:
+        print(f"  ⚠️ Pas de configuration trouvée, tout en COPIE par défaut")
+    return []
+
+
+def _mouvement_parallele(leader, follower, cible_l, cible_f, profil_servo):
+    """Les deux robots rejoignent leur cible ensemble en 2 s ; retourne le bilan"""
+    leader.set_torque(True)
+    follower.set_torque(True)
+
+    if profil_servo:
+        # Profil calculé par les servos : une seule consigne par robot
+        return executer_profil([(leader, cible_l), (follower, cible_f)], 2.0)
+
+    # Trajectoires précalculées depuis les positions actuelles (2 s, 50 Hz)
+    traj_l = Trajectoire.depuis_bras(leader, cible_l, duree=2.0)
+    traj_f = Trajectoire.depuis_bras(follower, cible_f, duree=2.0)
+
+    # Écriture groupée : un paquet par robot et par pas, tous les servos bougent ensemble
+    return executer([(leader, traj_l), (follower, traj_f)])
+
+
+def centrage_parallele(leader, follower, calib_l, calib_f, profil_servo=False):
+    """Centre tous les servos des deux robots EN PARALLÈLE de manière fluide"""
+    print("\n🎯 Centrage simultané des robots...")
+    bilan = _mouvement_parallele(leader, follower, centres(calib_l), centres(calib_f), profil_servo)
+    print("✅ Robots centrés")
+    print(f"   {bilan}")
+
+
+def position_repos_parallele(leader, follower, calib_l, calib_f, repos_pct=REPOS_PCT,
+                             profil_servo=False):
+    """Met les deux robots en position repos IDENTIQUE (même % pour chaque servo)"""
+    print("\n🏁 Position repos simultanée...")
+
+    # Même pourcentage, chaque robot selon SON calibrage
+    repos_l = pose_pourcentage(calib_l, repos_pct)
+    repos_f = pose_pourcentage(calib_f, repos_pct)
+
+    bilan = _mouvement_parallele(leader, follower, repos_l, repos_f, profil_servo)
+    print("✅ Position repos atteinte (robot replié)")
+    print(f"   {bilan}")
+
+
+def _assembler(octets):
+    """Assemble des octets little-endian en entier"""
+    valeur = 0
+    for i, octet in enumerate(octets):
+        valeur |= octet << (8 * i)
+    return valeur
+
+
+def _decomposer(valeur, longueur):
+    """Découpe un entier en octets little-endian"""
+    valeur = int(valeur)
+    return [(valeur >> (8 * i)) & 0xFF for i in range(longueur)]
+
+
+def sync_read(packet, port, adresse, longueur, ids=SERVO_IDS):
+    """
+    Lecture groupée d'un registre sur plusieurs servos (instruction 0x82).
+    Retourne (valeurs, erreurs) : {id: valeur} et {id: message d'erreur}.
+    """
+    ids = list(ids)
+    txpacket = [0] * (len(ids) + 8)
+    txpacket[PKT_ID] = BROADCAST_ID
+    txpacket[PKT_LENGTH] = len(ids) + 4
+    txpacket[PKT_INSTRUCTION] = INST_SYNC_READ
+    txpacket[PKT_PARAMETER0] = adresse
+    txpacket[PKT_PARAMETER0 + 1] = longueur
+    txpacket[PKT_PARAMETER0 + 2:PKT_PARAMETER0 + 2 + len(ids)] = ids
+
+    result = packet.txPacket(port, txpacket)
+    if result != COMM_SUCCESS:
+        port.is_using = False
+        message = packet.getTxRxResult(result)
+        return {}, {servo_id: message for servo_id in ids}
+
+    # Un seul délai pour l'ensemble des réponses
+    port.setPacketTimeout((longueur + 6) * len(ids))
+
+    valeurs = {}
+    erreurs = {}
+    attendus = set(ids)
+    while attendus:
+        rxpacket, result = packet.rxPacket(port)
+        if result != COMM_SUCCESS:
+            break
+        servo_id = rxpacket[PKT_ID]
+        if servo_id not in attendus:
+            continue
+        attendus.discard(servo_id)
+        valeurs[servo_id] = _assembler(rxpacket[PKT_PARAMETER0:PKT_PARAMETER0 + longueur])
+        if rxpacket[PKT_ERROR]:
+            erreurs[servo_id] = packet.getRxPacketError(rxpacket[PKT_ERROR])
+
+    for servo_id in attendus:
+        erreurs[servo_id] = packet.getTxRxResult(result)
+
+    port.is_using = False
+    return valeurs, erreurs
+
+
+def broadcast_ping(packet, port):
+    """
+    Ping diffusé (ID 254) : chaque servo de la chaîne répond à son tour.
+    Une seule passe, bornée par un délai unique, au lieu d'un timeout par
+    ID absent. Retourne la liste triée des IDs qui ont répondu.
+    """
+    txpacket = [0] * 6
+    txpacket[PKT_ID] = BROADCAST_ID
+    txpacket[PKT_LENGTH] = 2
+    txpacket[PKT_INSTRUCTION] = INST_PING
+
+    result = packet.txPacket(port, txpacket)
+    if result != COMM_SUCCESS:
+        port.is_using = False
+        return []
+
+    # Un délai couvrant les réponses de tous les IDs possibles (6 octets chacune)
+    port.setPacketTimeout(6 * NB_IDS_MAX)
+
+    ids = set()
+    while True:
+        rxpacket, result = packet.rxPacket(port)
+        if result != COMM_SUCCESS:
+            break
+        ids.add(rxpacket[PKT_ID])
+
+    port.is_using = False
+    return sorted(ids)
+
+
+def sync_write(packet, port, adresse, longueur, valeurs):
+    """
+    Écriture groupée (SYNC WRITE 0x83) d'un registre sur plusieurs servos.
+    Un seul paquet diffusé, aucun paquet de statut attendu : tous les
+    servos reçoivent leur consigne au même instant.
+    """
+    groupe = GroupSyncWrite(port, packet, adresse, longueur)
+    for servo_id, valeur in valeurs.items():
+        groupe.addParam(servo_id, _decomposer(valeur, longueur))
+    return groupe.txPacket()
+
+
+# ============================================
+# CLASSE SO101ARM
+# ============================================
+
+class So101Arm:
+    """
+    Un bras SO-ARM 101 sur son port USB.
+
+    transport = "groupe"     : SYNC READ / SYNC WRITE (repli automatique
+                               servo par servo si la lecture groupée échoue)
+    transport = "individuel" : un aller-retour par servo (ancien comportement)
+    """
+
+    def __init__(self, port_name, robot_name="SO-101", transport="groupe",
+                 baudrate=BAUDRATE, ids=SERVO_IDS):
+        self.port_name = port_name
+        self.robot_name = robot_name
+        self.transport = transport
+        self.baudrate = baudrate
+        self.ids = tuple(ids)
+
+        self.port = None
+        self.packet = None
+        self.is_connected = False
+        self.lock = threading.Lock()
+
+        self.echecs_sync_read = 0
+        self.erreurs = {}  # {id: [nombre, dernier message]}
+
+        self.instrumentation = None
+        if os.environ.get("SEM_BUS_STATS"):
+            self.activer_instrumentation()
+
+    def connect(self):
+        """Ouvre le port et configure le baudrate"""
+        if self.is_connected:
+            return True
+        self.port = PortHandler(self.port_name)
+        self.packet = PacketHandler(1.0)
+        if not self.port.openPort():
+            return False
+        if not self.port.setBaudRate(self.baudrate):
+            self.port.closePort()
+            return False
+        self.is_connected = True
+        return True
+
+    def disconnect(self):
+        """Ferme le port"""
+        if self.is_connected:
+            self.port.closePort()
+        self.is_connected = False
+
+    # --- Transport bas niveau (remplacé par So101ArmSimule) ---
+
+    def _sync_read(self, adresse, longueur, ids):
+        return sync_read(self.packet, self.port, adresse, longueur, ids)
+
+    def _sync_write(self, adresse, longueur, valeurs):
+        return sync_write(self.packet, self.port, adresse, longueur, valeurs)
+
+    def _broadcast_ping(self):
+        return broadcast_ping(self.packet, self.port)
+
+    def _read(self, servo_id, adresse, longueur):
+        data, result, error = self.packet.readTxRx(self.port, servo_id, adresse, longueur)
+        valeur = _assembler(data) if result == COMM_SUCCESS else 0
+        return valeur, result, error
+
+    def _write(self, servo_id, adresse, longueur, valeur):
+        return self.packet.writeTxRx(self.port, servo_id, adresse, longueur,
+                                     _decomposer(valeur, longueur))
+
+    def _message(self, result, error=0):
+        if result != COMM_SUCCESS:
+            return self.packet.getTxRxResult(result)
+        return self.packet.getRxPacketError(error)
+
+    # --- Instrumentation (optionnelle) ---
+
+    def activer_instrumentation(self):
+        """Mesure la latence de chaque appel au bus et les incidents par servo"""
+        if self.instrumentation is None:
+            self.instrumentation = InstrumentationBus(self.robot_name)
+        return self.instrumentation
+
+    def _mesurer(self, operation, adresse, primitive, *args):
+        """Appelle une primitive de transport, chronométrée si instrumenté"""
+        if self.instrumentation is None:
+            return primitive(*args)
+        debut = time.perf_counter()
+        try:
+            return primitive(*args)
+        finally:
+            self.instrumentation.enregistrer(operation, adresse, time.perf_counter() - debut)
+
+    def _signaler(self, servo_id, categorie):
+        if self.instrumentation is not None:
+            self.instrumentation.compter(servo_id, categorie)
+
+    def _categorie(self, result, error=0):
+        """Type d'incident d'un échange : timeout, crc (paquet corrompu) ou erreur"""
+        if result == COMM_RX_TIMEOUT:
+            return "timeout"
+        if result == COMM_RX_CORRUPT:
+            return "crc"
+        return "erreur"
+
+    def _signaler_message(self, servo_id, message):
+        """Comme _signaler, pour les erreurs de lecture groupée (messages)"""
+        if self.instrumentation is None:
+            return
+        for result in (COMM_RX_TIMEOUT, COMM_RX_CORRUPT):
+            if message == self._message(result):
+                self._signaler(servo_id, self._categorie(result))
+                return
+        self._signaler(servo_id, "erreur")
+
+    # --- Accès registre par registre (avec accusé de réception) ---
+
+    def read(self, servo_id, adresse, longueur=2):
+        """Lit un registre d'un servo. Retourne (valeur, succès)"""
+        with self.lock:
+            valeur, result, error = self._mesurer("read", adresse, self._read,
+                                                  servo_id, adresse, longueur)
+        if result != COMM_SUCCESS or error:
+            self._signaler(servo_id, self._categorie(result, error))
+        return valeur, result == COMM_SUCCESS
+
+    def write(self, servo_id, adresse, longueur, valeur):
+        """Écrit un registre d'un servo et attend son statut. Retourne succès"""
+        with self.lock:
+            result, error = self._mesurer("write", adresse, self._write,
+                                          servo_id, adresse, longueur, valeur)
+        if result != COMM_SUCCESS or error:
+            self._signaler(servo_id, self._categorie(result, error))
+        return result == COMM_SUCCESS
+
+    # --- Accès groupé ---
+
+    def read_register(self, adresse, longueur, ids=None):
+        """
+        Lit un registre sur plusieurs servos avec le transport le plus rapide.
+        Retourne (valeurs, erreurs) ; un servo absent de valeurs a échoué.
+        """
+        ids = self.ids if ids is None else tuple(ids)
+        valeurs, erreurs = {}, {}
+
+        with self.lock:
+            groupe = (self.transport == "groupe" and len(ids) > 1
+                      and self.echecs_sync_read < ECHECS_SYNC_READ_MAX)
+            if groupe:
+                valeurs, erreurs = self._mesurer("sync_read", adresse, self._sync_read,
+                                                 adresse, longueur, ids)
+                for servo_id, message in erreurs.items():
+                    self._signaler_message(servo_id, message)
+            muette = groupe and not valeurs
+
+            # Repli : lecture individuelle des servos manquants
+            for servo_id in ids:
+                if servo_id in valeurs:
+                    continue
+                if groupe:
+                    self._signaler(servo_id, "relecture")
+                valeur, result, error = self._mesurer("read", adresse, self._read,
+                                                      servo_id, adresse, longueur)
+                if result == COMM_SUCCESS:
+                    valeurs[servo_id] = valeur
+                    if error:
+                        erreurs[servo_id] = self._message(result, error)
+                        self._signaler(servo_id, "erreur")
+                    else:
+                        erreurs.pop(servo_id, None)
+                else:
+                    erreurs[servo_id] = self._message(result)
+                    self._signaler(servo_id, self._categorie(result))
+
+            # Lecture groupée muette alors que les servos répondent un par un
+            if muette and valeurs:
+                self.echecs_sync_read += 1
+                if self.echecs_sync_read == ECHECS_SYNC_READ_MAX:
+                    print(f"\n⚠️  Lecture groupée indisponible sur {self.port_name}"
+                          " - lecture servo par servo")
+            elif groupe and valeurs:
+                self.echecs_sync_read = 0
+
+        self._compter_erreurs(erreurs)
+        return valeurs, erreurs
+
+    def write_register(self, adresse, longueur, valeurs):
+        """Écrit un registre {id: valeur} sur plusieurs servos"""
+        if not valeurs:
+            return True
+        with self.lock:
+            if self.transport == "groupe":
+                result = self._mesurer("sync_write", adresse, self._sync_write,
+                                       adresse, longueur, valeurs)
+                return result == COMM_SUCCESS
+            ok = True
+            for servo_id, valeur in valeurs.items():
+                result, error = self._mesurer("write", adresse, self._write,
+                                              servo_id, adresse, longueur, valeur)
+                if result != COMM_SUCCESS or error:
+                    self._signaler(servo_id, self._categorie(result, error))
+                ok = ok and result == COMM_SUCCESS
+            return ok
+
+    def read_positions(self, ids=None):
+        """Lit les positions présentes. Retourne ({id: position}, {id: erreur})"""
+        return self.read_register(ADDR_PRESENT_POSITION, 2, ids)
+
+    def read_position(self, servo_id):
+        """Lit la position présente d'un servo (None si pas de réponse)"""
+        positions, _ = self.read_positions([servo_id])
+        return positions.get(servo_id)
+
+    def write_goals(self, positions):
+        """Envoie les positions cibles {id: position} en un paquet"""
+        return self.write_register(ADDR_GOAL_POSITION, 2, positions)
+
+    def write_goal(self, servo_id, position):
+        """Envoie la position cible d'un seul servo"""
+        return self.write_goals({servo_id: position})
+
+    def set_torque(self, actif, ids=None):
+        """Active (True) ou libère (False) le couple des servos"""
+        ids = self.ids if ids is None else ids
+        valeur = 1 if actif else 0
+        return self.write_register(ADDR_TORQUE_ENABLE, 1, {servo_id: valeur for servo_id in ids})
+
+    def set_profile(self, vitesses, acceleration, ids=None):
+        """
+        Profil de mouvement calculé par les servos : vitesse max {id: pas/s}
+        (ou une valeur pour tous) et accélération (unité 100 pas/s²).
+        set_profile(0, 0) rend la vitesse max sans rampe (téléopération).
+        """
+        ids = self.ids if ids is None else ids
+        if not isinstance(vitesses, dict):
+            vitesses = {servo_id: vitesses for servo_id in ids}
+        ok = self.write_register(ADDR_ACCELERATION, 1, {servo_id: acceleration for servo_id in vitesses})
+        return self.write_register(ADDR_GOAL_VELOCITY, 2, vitesses) and ok
+
+    def read_profile(self, ids=None):
+        """
+        Lit le profil de mouvement en place : ({id: (vitesses, acceleration)}, erreurs),
+        dans les unités de set_profile ; un servo absent n'a pas répondu.
+        """
+        vitesses, erreurs = self.read_register(ADDR_GOAL_VELOCITY, 2, ids)
+        accelerations, erreurs_acc = self.read_register(ADDR_ACCELERATION, 1, ids)
+        erreurs.update(erreurs_acc)
+        return {servo_id: (vitesses[servo_id], accelerations[servo_id])
+                for servo_id in vitesses if servo_id in accelerations}, erreurs
+
+    def read_moving(self, ids=None):
+        """Lit le drapeau « en mouvement » : ({id: bool}, erreurs)"""
+        valeurs, erreurs = self.read_register(ADDR_MOVING, 1, ids)
+        return {servo_id: bool(valeur) for servo_id, valeur in valeurs.items()}, erreurs
+
+    def write_eeprom(self, adresse, longueur, valeurs):
+        """
+        Écrit un registre EEPROM {id: valeur} sur plusieurs servos :
+        déverrouillage, écriture groupée, puis reverrouillage.
+        """
+        ids = list(valeurs)
+        ok = self.write_register(ADDR_LOCK, 1, {servo_id: 0 for servo_id in ids})
+        ok = self.write_register(adresse, longueur, valeurs) and ok
+        ok = self.write_register(ADDR_LOCK, 1, {servo_id: 1 for servo_id in ids}) and ok
+        return ok
+
+    # --- Découverte des servos ---
+
+    def scan(self):
+        """
+        Liste tous les servos de la chaîne en une passe (ping diffusé).
+        Retourne {id: numéro de modèle} (None si le modèle n'a pas pu être lu).
+        """
+        with self.lock:
+            ids = self._mesurer("ping", None, self._broadcast_ping)
+        servos = {}
+        for servo_id in ids:
+            modele, ok = self.read(servo_id, ADDR_MODEL_NUMBER, 2)
+            servos[servo_id] = modele if ok else None
+        return servos
+
+    # --- Bilan des erreurs ---
+
+    def _compter_erreurs(self, erreurs):
+        for servo_id, message in erreurs.items():
+            entree = self.erreurs.setdefault(servo_id, [0, ""])
+            entree[0] += 1
+            entree[1] = message
+
+    def afficher_erreurs(self):
+        """Affiche le bilan des erreurs de lecture par servo (et les statistiques si instrumenté)"""
+        if self.erreurs:
+            print(f"\n⚠️  Erreurs de communication {self.robot_name} :")
+            for servo_id in sorted(self.erreurs):
+                nombre, message = self.erreurs[servo_id]
+                print(f"   Servo {servo_id} : {nombre} erreur(s) - dernière : {message}")
+        if self.instrumentation is not None:
+            print(self.instrumentation.resume())
+
+
+def ouvrir_bras(port_name, robot_name, transport="groupe"):
+    """Crée et connecte un bras. Retourne None si la connexion échoue"""
+    bras = So101Arm(port_name, robot_name, transport)
+    if not bras.connect():
+        return None
+    return bras
+
+
+# ============================================
+# BRAS SIMULÉ (banc d'essai sans matériel)
+# ============================================
+
+class So101ArmSimule(So101Arm):
+    """
+    Bras simulé : mêmes API que So101Arm, registres en mémoire et temps
+    de bus modélisé (octets à 1 Mbps + latence USB par aller-retour
+    + délai de réponse de chaque servo, 500 µs en sortie d'usine).
+    """
+
+    LATENCE_USB = 0.001       # s, par attente de réponse (timer USB-série)
+    TEMPS_OCTET = 10.0 / BAUDRATE  # s, 10 bits par octet
+    VITESSE_MAX = 3000.0      # pas/s, vitesse de rattrapage de la consigne
+
+    def __init__(self, port_name="sim", robot_name="SIMULÉ", transport="groupe",
+                 baudrate=BAUDRATE, ids=SERVO_IDS, servos_absents=()):
+        super().__init__(port_name, robot_name, transport, baudrate, ids)
+        self.servos_absents = set(servos_absents)
+        self.registres = {servo_id: bytearray(256) for servo_id in ids}
+        self.derniere_maj = {servo_id: time.monotonic() for servo_id in ids}
+        self.vitesses = dict.fromkeys(ids, 0.0)
+        for servo_id in ids:
+            self.registres[servo_id][ADDR_MODEL_NUMBER:ADDR_MODEL_NUMBER + 2] = bytes(_decomposer(777, 2))
+            self.registres[servo_id][ADDR_ID] = servo_id
+            self.registres[servo_id][ADDR_RETURN_DELAY] = 250
+            self.registres[servo_id][ADDR_STATUS_LEVEL] = 1
+            self.registres[servo_id][ADDR_GOAL_POSITION:ADDR_GOAL_POSITION + 2] = bytes(_decomposer(2048, 2))
+            self.registres[servo_id][ADDR_PRESENT_POSITION:ADDR_PRESENT_POSITION + 2] = bytes(_decomposer(2048, 2))
+            self.registres[servo_id][ADDR_PRESENT_VOLTAGE] = 120
+            self.registres[servo_id][ADDR_PRESENT_TEMPERATURE] = 30
+
+    def connect(self):
+        self.is_connected = True
+        return True
+
+    def disconnect(self):
+        self.is_connected = False
+
+    def _message(self, result, error=0):
+        return "[Simulation] Pas de réponse du servo" if result != COMM_SUCCESS else ""
+
+    def _bus(self, octets, reponses):
+        """Simule la durée d'une transaction sur le bus"""
+        delai = sum(self.registres[i][ADDR_RETURN_DELAY] * 2e-6 for i in reponses if i in self.registres)
+        time.sleep(octets * self.TEMPS_OCTET + delai + (self.LATENCE_USB if reponses else 0))
+
+    def _mettre_a_jour(self, servo_id):
+        """Fait avancer la position présente vers la consigne"""
+        regs = self.registres[servo_id]
+        maintenant = time.monotonic()
+        dt = maintenant - self.derniere_maj[servo_id]
+        self.derniere_maj[servo_id] = maintenant
+        if not regs[ADDR_TORQUE_ENABLE]:
+            return
+        present = _assembler(regs[ADDR_PRESENT_POSITION:ADDR_PRESENT_POSITION + 2])
+        goal = _assembler(regs[ADDR_GOAL_POSITION:ADDR_GOAL_POSITION + 2])
+        vitesse_max = _assembler(regs[ADDR_GOAL_VELOCITY:ADDR_GOAL_VELOCITY + 2]) or self.VITESSE_MAX
+        vitesse_max = min(vitesse_max, self.VITESSE_MAX)
+        acceleration = regs[ADDR_ACCELERATION] * 100
+        if acceleration:
+            # Rampe : accélérer jusqu'à la vitesse max, freiner avant la consigne
+            freinage = math.sqrt(2 * acceleration * abs(goal - present))
+            vitesse = min(vitesse_max, self.vitesses[servo_id] + acceleration * dt, freinage)
+        else:
+            vitesse = vitesse_max
+        self.vitesses[servo_id] = vitesse
+        pas = max(vitesse * dt, 1)
+        if abs(goal - present) <= pas:
+            present = goal
+            self.vitesses[servo_id] = 0.0
+        else:
+            present += int(math.copysign(pas, goal - present))
+        regs[ADDR_PRESENT_POSITION:ADDR_PRESENT_POSITION + 2] = bytes(_decomposer(present, 2))
+        regs[ADDR_MOVING] = int(present != goal)
+
+    def _lire_simule(self, servo_id, adresse, longueur):
+        self._mettre_a_jour(servo_id)
+        return _assembler(self.registres[servo_id][adresse:adresse + longueur])
+
+    def _ecrire_simule(self, servo_id, adresse, longueur, valeur):
+        self._mettre_a_jour(servo_id)
+        self.registres[servo_id][adresse:adresse + longueur] = bytes(_decomposer(valeur, longueur))
+
+    def _sync_read(self, adresse, longueur, ids):
+        presents = [i for i in ids if i in self.registres and i not in self.servos_absents]
+        self._bus(len(ids) + 8 + len(presents) * (longueur + 6), presents)
+        valeurs = {i: self._lire_simule(i, adresse, longueur) for i in presents}
+        erreurs = {i: self._message(COMM_RX_TIMEOUT) for i in ids if i not in valeurs}
+        return valeurs, erreurs
+
+    def _sync_write(self, adresse, longueur, valeurs):
+        self._bus(8 + len(valeurs) * (longueur + 1), [])
+        for servo_id, valeur in valeurs.items():
+            if servo_id in self.registres:
+                self._ecrire_simule(servo_id, adresse, longueur, valeur)
+        return COMM_SUCCESS
+
+    def _broadcast_ping(self):
+        presents = [i for i in self.registres if i not in self.servos_absents]
+        self._bus(6 + 6 * len(presents), presents)
+        return sorted(presents)
+
+    def _present(self, servo_id):
+        return servo_id in self.registres and servo_id not in self.servos_absents
+
+    def _read(self, servo_id, adresse, longueur):
+        self._bus(8 + longueur + 6, [servo_id] if self._present(servo_id) else [None])
+        if not self._present(servo_id):
+            return 0, COMM_RX_TIMEOUT, 0
+        return self._lire_simule(servo_id, adresse, longueur), COMM_SUCCESS, 0
+
+    def _write(self, servo_id, adresse, longueur, valeur):
+        # Niveau de statut 0 : le servo n'accuse pas réception des écritures
+        repond = self._present(servo_id) and self.registres[servo_id][ADDR_STATUS_LEVEL]
+        self._bus(7 + longueur + 6, [servo_id] if repond else [None])
+        if not self._present(servo_id):
+            return COMM_RX_TIMEOUT, 0
+        self._ecrire_simule(servo_id, adresse, longueur, valeur)
+        return (COMM_SUCCESS if repond else COMM_RX_TIMEOUT), 0
+
+
+# ============================================
+# BANC D'ESSAI DES TRANSPORTS
+# ============================================
+
+def banc_essai(port_name=None, ticks=200):
+    """Compare la durée d'un cycle lecture 6 positions + écriture 6 cibles"""
+    print(f"\n⏱️  Banc d'essai du bus ({port_name or 'simulé'}, {ticks} cycles)")
+    for transport in ("individuel", "groupe"):
+        if port_name:
+            bras = ouvrir_bras(port_name, "BANC", transport)
+            if bras is None:
+                print(f"❌ Impossible d'ouvrir {port_name}")
+                return
+        else:
+            bras = So101ArmSimule(transport=transport)
+        bras.set_torque(False)
+
+        debut = time.perf_counter()
+        for _ in range(ticks):
+            positions, _ = bras.read_positions()
+            bras.write_goals(positions)
+        duree = (time.perf_counter() - debut) / ticks
+
+        print(f"  {transport:11} : {duree * 1000:6.2f} ms/cycle → {1 / duree:6.0f} Hz max")
+        bras.afficher_erreurs()
+        bras.disconnect()
+
+
+if __name__ == "__main__":
+    banc_essai(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Module SEM_so101_cadence.py
+Service Ecoles Médias - Boucle à cadence fixe pour la téléopération
+
+Un time.sleep(0.01) en fin de boucle donne une cadence inconnue : 10 ms
+plus la durée, variable, des échanges sur le bus. Cadence fixe les
+échéances à l'avance (t0 + k × période, horloge monotone) et dort
+jusqu'à la suivante :
+
+    cadence = Cadence(100, "téléopération")
+    while ...:
+        ...                  # lecture Leader, écriture Follower
+        cadence.attendre()   # jusqu'à l'échéance suivante
+    print(cadence.resume())
+
+Un cycle plus long que la période est un dépassement : le cycle suivant
+part aussitôt. Avec plus d'une période de retard, les échéances sont
+recalées sur maintenant (pas de rafale de cycles pour rattraper), les
+périodes perdues sont comptées.
+
+Le bilan donne la fréquence réelle, les dépassements et les
+histogrammes de la période et de la gigue (retard du réveil sur
+l'échéance), pour comparer des sessions entre elles.
+
+    python SEM_so101_cadence.py  → boucle à 100 Hz avec cycles irréguliers
+"""
+import time
+import random
+
+from SEM_so101_stats import Histogramme
+
+# Classes des histogrammes de période (2,3 % de largeur)
+CLASSES_PERIODE = 100
+
+
+class Cadence:
+    """
+    Cadenceur d'une boucle sur échéances absolues.
+
+    frequence : cycles par seconde visés
+    nom       : nom affiché dans le bilan
+    """
+
+    def __init__(self, frequence, nom="boucle"):
+        self.frequence = frequence
+        self.periode = 1.0 / frequence
+        self.nom = nom
+        self.periodes = Histogramme(CLASSES_PERIODE)
+        self.gigue = Histogramme()
+        self.cycles = 0
+        self.depassements = 0
+        self.perdues = 0
+        self.duree_active = 0.0
+        self.echeance = None
+        self.reveil = None
+
+    def reinitialiser(self):
+        """Oublie l'échéance en cours (après une pause : la pause n'est pas un dépassement)"""
+        self.echeance = None
+        self.reveil = None
+
+    def attendre(self):
+        """Fin de cycle : dort jusqu'à l'échéance suivante"""
+        maintenant = time.perf_counter()
+        if self.echeance is None:
+            # Premier cycle (ou reprise) : la grille part de maintenant
+            self.echeance = maintenant + self.periode
+            self.reveil = maintenant
+            return
+
+        if maintenant < self.echeance:
+            time.sleep(self.echeance - maintenant)
+        else:
+            self.depassements += 1
+            retard = maintenant - self.echeance
+            if retard > self.periode:
+                # Recaler plutôt que rattraper en rafale
+                perdues = int(retard / self.periode)
+                self.perdues += perdues
+                self.echeance += perdues * self.periode
+
+        reveil = time.perf_counter()
+        self.gigue.ajouter(max(reveil - self.echeance, 0.0))
+        self.periodes.ajouter(reveil - self.reveil)
+        self.duree_active += reveil - self.reveil
+        self.reveil = reveil
+        self.cycles += 1
+        self.echeance += self.periode
+
+    # --- Bilan ---
+
+    def frequence_reelle(self):
+        """Cycles par seconde mesurés (hors pauses)"""
+        return self.cycles / self.duree_active if self.duree_active else 0.0
+
+    def resume(self):
+        """Bilan affichable : fréquence, dépassements, histogrammes période et gigue"""
+        part = self.depassements / self.cycles * 100 if self.cycles else 0.0
+        lignes = [f"⏱️  Cadence {self.nom} : {self.frequence_reelle():.1f} Hz mesurés "
+                  f"pour {self.frequence:g} Hz visés, {self.cycles} cycles, "
+                  f"{self.depassements} dépassements ({part:.1f} %), {self.perdues} périodes perdues"]
+        for titre, histo in (("Période", self.periodes), ("Gigue", self.gigue)):
+            lignes.append(f"   {titre} (ms) : p50 {histo.percentile(50) * 1000:.2f}  "
+                          f"p95 {histo.percentile(95) * 1000:.2f}  "
+                          f"p99 {histo.percentile(99) * 1000:.2f}  max {histo.maximum * 1000:.2f}")
+            lignes.extend(f"      {ligne}" for ligne in histo.barres())
+        return "\n".join(lignes)
+
+
+# ============================================
+# DÉMONSTRATION
+# ============================================
+
+def banc_essai(duree=2.0, frequence=100):
+    """Compare sleep(période) en fin de boucle et Cadence, avec un travail variable"""
+    def travail():
+        # Échanges bus simulés : 2 à 6 ms, parfois 15 ms (relecture, télémétrie)
+        time.sleep(0.015 if random.random() < 0.02 else random.uniform(0.002, 0.006))
+
+    print(f"\n⏱️  Boucle à {frequence} Hz pendant {duree:.0f} s, travail de 2 à 6 ms (2 % à 15 ms)")
+
+    cycles, debut = 0, time.perf_counter()
+    while time.perf_counter() - debut < duree:
+        travail()
+        time.sleep(1.0 / frequence)
+        cycles += 1
+    print(f"\n  sleep({1000 / frequence:.0f} ms) en fin de boucle : "
+          f"{cycles / (time.perf_counter() - debut):.1f} Hz")
+
+    cadence = Cadence(frequence, "démonstration")
+    debut = time.perf_counter()
+    while time.perf_counter() - debut < duree:
+        travail()
+        cadence.attendre()
+    print("\n  Cadence :")
+    print(cadence.resume())
+
+
+if __name__ == "__main__":
+    banc_essai()
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Module SEM_so101_calibration.py
+Service Ecoles Médias - Calibration d'un bras SO-ARM 101
+
+Le fichier ~/lerobot/calibration/{robot}_calibration.json (écrit par le
+script 2) est lu une fois, vérifié, puis rangé dans un objet Calibration :
+
+  calib.min[servo_id], calib.max[servo_id], calib.center[servo_id],
+  calib.amplitude[servo_id]   : tuples indexés par numéro de servo
+  servo_id in calib            : True si le servo est calibré
+  calib.points[servo_id]       : positions de référence (min, ..., max)
+
+Calibration multi-points (option P du script 2) : 'points' liste N
+positions relevées à des angles répartis régulièrement sur la course
+(0 %, 25 %, 50 %, 75 %, 100 % pour N = 5). La correspondance Leader →
+Follower interpole alors par morceaux au lieu d'une seule droite
+min/max, ce qui corrige la non-linéarité des tringleries (pince,
+poignet). Sans 'points', la course est linéaire : (min, max).
+
+Un servo non calibré garde les valeurs par défaut (0, 2048, 4095). Une
+entrée incohérente (min >= max, hors 0-4095, centre hors course) est
+ignorée avec un avertissement : le servo est alors traité comme non calibré.
+
+Cache binaire : ~/lerobot/calibration/.cache/{robot}_calibration.bin
+reprend les valeurs vérifiées avec la date et la taille du JSON. Tant que
+le JSON n'a pas changé, les lancements suivants n'ont plus à le relire.
+
+    python SEM_so101_calibration.py  → compare JSON et cache
+"""
+import os
+import json
+import time
+import struct
+
+REPERTOIRE_CALIBRATION = os.path.expanduser("~/lerobot/calibration")
+REPERTOIRE_CACHE = os.path.join(REPERTOIRE_CALIBRATION, ".cache")
+
+# Servos 1 à 6, la case 0 reste inutilisée (indexation directe par numéro)
+NB_CASES = 7
+POSITION_MAX = 4095
+MIN_DEFAUT, CENTRE_DEFAUT, MAX_DEFAUT = 0, 2048, POSITION_MAX
+
+# Points de référence par servo (min et max compris)
+POINTS_MAX = 9
+
+# En-tête du cache : signature, version, date (ns) et taille du JSON
+SIGNATURE_CACHE = b"SEMC"
+VERSION_CACHE = 2
+ENTETE_CACHE = struct.Struct("<4sHqq")
+VALEURS_CACHE = struct.Struct(f"<{NB_CASES}?{3 * NB_CASES}h{NB_CASES}B{NB_CASES * POINTS_MAX}h")
+
+
+def fichier_calibration(robot_type):
+    """Chemin du JSON de calibration d'un robot"""
+    return os.path.join(REPERTOIRE_CALIBRATION, f"{robot_type.lower()}_calibration.json")
+
+
+def fichier_cache(robot_type):
+    """Chemin du cache binaire d'un robot"""
+    return os.path.join(REPERTOIRE_CACHE, f"{robot_type.lower()}_calibration.bin")
+
+
+def _entier(valeur):
+    return isinstance(valeur, int) and not isinstance(valeur, bool)
+
+
+def verifier_servo(entree):
+    """
+    Vérifie une entrée {'min', 'max', 'center', 'points'} du JSON.
+    Retourne (min, centre, max, points) ou lève ValueError avec la raison.
+    """
+    if not isinstance(entree, dict):
+        raise ValueError("entrée illisible")
+    mini, maxi = entree.get('min'), entree.get('max')
+    if not _entier(mini) or not _entier(maxi):
+        raise ValueError("min / max manquants ou non entiers")
+    if not 0 <= mini < maxi <= POSITION_MAX:
+        raise ValueError(f"course {mini}-{maxi} invalide")
+    centre = entree.get('center', (mini + maxi) // 2)
+    if not _entier(centre) or not mini <= centre <= maxi:
+        raise ValueError(f"centre {centre} hors de la course {mini}-{maxi}")
+    points = entree.get('points')
+    if points is None:
+        return mini, centre, maxi, None
+    if (not isinstance(points, list) or not 2 <= len(points) <= POINTS_MAX
+            or not all(_entier(p) for p in points)):
+        raise ValueError(f"points : liste de 2 à {POINTS_MAX} entiers attendue")
+    if points[0] != mini or points[-1] != maxi:
+        raise ValueError("points : le premier et le dernier doivent être min et max")
+    if any(b <= a for a, b in zip(points, points[1:])):
+        raise ValueError("points : positions non strictement croissantes")
+    return mini, centre, maxi, tuple(points)
+
+
+class Calibration:
+    """
+    Calibration vérifiée d'un bras, valeurs indexées par numéro de servo.
+
+    bornes : {servo_id: (min, centre, max, points)} des servos calibrés,
+             points = None pour une course linéaire
+    """
+
+    __slots__ = ("robot_type", "calibres", "min", "max", "center", "amplitude", "points")
+
+    def __init__(self, robot_type, bornes):
+        mins = [MIN_DEFAUT] * NB_CASES
+        centres = [CENTRE_DEFAUT] * NB_CASES
+        maxs = [MAX_DEFAUT] * NB_CASES
+        points = [None] * NB_CASES
+        for servo_id, (mini, centre, maxi, references) in bornes.items():
+            mins[servo_id], centres[servo_id], maxs[servo_id] = mini, centre, maxi
+            points[servo_id] = references
+        self.robot_type = robot_type
+        self.calibres = frozenset(bornes)
+        self.min = tuple(mins)
+        self.center = tuple(centres)
+        self.max = tuple(maxs)
+        self.amplitude = tuple(maxi - mini for mini, maxi in zip(mins, maxs))
+        self.points = tuple(references or (mini, maxi)
+                            for references, mini, maxi in zip(points, mins, maxs))
+
+    @classmethod
+    def depuis_dict(cls, robot_type, donnees):
+        """
+        Calibration depuis le contenu du JSON ({'servo_1': {...}}).
+        Retourne (calibration, avertissements).
+        """
+        bornes, avertissements = {}, []
+        for servo_id in range(1, NB_CASES):
+            cle = f"servo_{servo_id}"
+            if cle not in donnees:
+                continue
+            try:
+                bornes[servo_id] = verifier_servo(donnees[cle])
+            except ValueError as erreur:
+                avertissements.append(f"{cle} ignoré ({erreur})")
+        return cls(robot_type, bornes), avertissements
+
+    def __bool__(self):
+        return bool(self.calibres)
+
+    def __contains__(self, servo_id):
+        return servo_id in self.calibres
+
+    def __repr__(self):
+        return f"Calibration({self.robot_type!r}, servos {sorted(self.calibres)})"
+
+    def multipoints(self, servo_id):
+        """True si le servo a des points de référence entre min et max"""
+        return len(self.points[servo_id]) > 2
+
+    def en_dict(self):
+        """Format JSON du script 2 (servos calibrés seulement)"""
+        donnees = {}
+        for i in sorted(self.calibres):
+            donnees[f"servo_{i}"] = {"min": self.min[i], "max": self.max[i],
+                                     "center": self.center[i], "amplitude": self.amplitude[i]}
+            if self.multipoints(i):
+                donnees[f"servo_{i}"]["points"] = list(self.points[i])
+        return donnees
+
+    # --- Cache binaire ---
+
+    def _octets(self, signature_json):
+        calibres = [i in self.calibres for i in range(NB_CASES)]
+        nombres = [len(points) for points in self.points]
+        points = [p for references in self.points
+                  for p in references + (0,) * (POINTS_MAX - len(references))]
+        return (ENTETE_CACHE.pack(SIGNATURE_CACHE, VERSION_CACHE, *signature_json)
+                + VALEURS_CACHE.pack(*calibres, *self.min, *self.center, *self.max,
+                                     *nombres, *points))
+
+    @classmethod
+    def _depuis_octets(cls, robot_type, octets, signature_json):
+        """Calibration depuis le cache, None s'il ne correspond plus au JSON"""
+        if len(octets) != ENTETE_CACHE.size + VALEURS_CACHE.size:
+            return None
+        signature, version, mtime, taille = ENTETE_CACHE.unpack_from(octets)
+        if (signature, version) != (SIGNATURE_CACHE, VERSION_CACHE) or (mtime, taille) != signature_json:
+            return None
+        valeurs = VALEURS_CACHE.unpack_from(octets, ENTETE_CACHE.size)
+        calibres = valeurs[:NB_CASES]
+        mins, centres, maxs, nombres = (valeurs[NB_CASES * k:NB_CASES * (k + 1)] for k in (1, 2, 3, 4))
+        points = valeurs[5 * NB_CASES:]
+
+        def references(i):
+            debut = i * POINTS_MAX
+            return tuple(points[debut:debut + nombres[i]]) if nombres[i] > 2 else None
+
+        return cls(robot_type, {i: (mins[i], centres[i], maxs[i], references(i))
+                                for i in range(NB_CASES) if calibres[i]})
+
+
+def _lire_cache(robot_type, signature_json):
+    try:
+        with open(fichier_cache(robot_type), 'rb') as f:
+            return Calibration._depuis_octets(robot_type, f.read(), signature_json)
+    except OSError:
+        return None
+
+
+def _ecrire_cache(calibration, signature_json):
+    # Cache facultatif : un échec d'écriture ne bloque pas le chargement
+    try:
+        os.makedirs(REPERTOIRE_CACHE, exist_ok=True)
+        temporaire = fichier_cache(calibration.robot_type) + ".tmp"
+        with open(temporaire, 'wb') as f:
+            f.write(calibration._octets(signature_json))
+        os.replace(temporaire, fichier_cache(calibration.robot_type))
+    except OSError:
+        pass
+
+
+def charger_calibration(robot_type, cache=True):
+    """
+    Charge la calibration d'un robot (Calibration), None si absente,
+    illisible ou sans aucun servo valide.
+    """
+    chemin = fichier_calibration(robot_type)
+    try:
+        etat = os.stat(chemin)
+    except OSError:
+        return None
+    signature_json = (etat.st_mtime_ns, etat.st_size)
+
+    if cache:
+        calibration = _lire_cache(robot_type, signature_json)
+        if calibration is not None:
+            return calibration
+
+    try:
+        with open(chemin, 'r') as f:
+            donnees = json.load(f)
+    except (OSError, ValueError) as erreur:
+        print(f"⚠️  Calibration {robot_type} illisible : {erreur}")
+        return None
+    if not isinstance(donnees, dict):
+        print(f"⚠️  Calibration {robot_type} illisible : format inattendu")
+        return None
+
+    calibration, avertissements = Calibration.depuis_dict(robot_type, donnees)
+    for avertissement in avertissements:
+        print(f"⚠️  Calibration {robot_type} : {avertissement}")
+    if not calibration:
+        return None
+    # Un JSON avec des entrées ignorées n'est pas mis en cache : l'avertissement reste visible
+    if cache and not avertissements:
+        _ecrire_cache(calibration, signature_json)
+    return calibration
+
+
+# ============================================
+# BANC D'ESSAI JSON / CACHE
+# ============================================
+
+def banc_essai(robot_type="leader", essais=2000):
+    """Compare le chargement depuis le JSON et depuis le cache binaire"""
+    calibration = charger_calibration(robot_type)
+    if calibration is None:
+        print(f"⚠️  Pas de calibration {robot_type} valide : lancez d'abord le script 2")
+        return
+    print(f"\n📁 {calibration}")
+
+    for cache, libelle in ((False, "JSON + vérification"), (True, "cache binaire")):
+        debut = time.perf_counter()
+        for _ in range(essais):
+            charger_calibration(robot_type, cache=cache)
+        duree = (time.perf_counter() - debut) / essais
+        print(f"   {libelle:<20} : {duree * 1e6:.0f} µs par chargement")
+
+
+if __name__ == "__main__":
+    import sys
+    banc_essai(sys.argv[1] if len(sys.argv) > 1 else "leader")
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Module SEM_so101_camera.py
+Service Ecoles Médias - Caméras sans blocage de la téléopération
+
+cap.read() attend l'image suivante (33 ms à 30 fps) et cv2.waitKey()
+traite les événements de la fenêtre : appelés dans la boucle Leader →
+Follower, ils la ramènent à la cadence de la caméra. Ici chacun a son
+thread, et la boucle ne fait plus aucun appel caméra :
+
+  ThreadedCamera  : lit la caméra en continu, garde la dernière image
+                    (numérotée) ; async_read() la rend sans attendre
+  AffichageCamera : affiche la dernière image dans une fenêtre OpenCV
+                    (imshow / waitKey dans son propre thread), note la
+                    touche Q
+
+Passage d'image « dernière gagne » : une image non affichée est
+remplacée par la suivante, rien ne s'accumule si l'affichage est lent.
+
+    python SEM_so101_camera.py  → affiche la caméra 0 et mesure les cadences
+"""
+import time
+import threading
+
+# Tentative d'import OpenCV
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except ImportError:
+    CV2_AVAILABLE = False
+
+
+class ThreadedCamera:
+    """
+    Caméra avec thread de lecture dédié (architecture LeRobot).
+    Le thread lit en continu et stocke la dernière frame.
+    async_read() retourne immédiatement la dernière frame disponible.
+    """
+
+    def __init__(self, camera_index, name, width=640, height=480, fps=30):
+        self.camera_index = camera_index
+        self.name = name
+        self.width = width
+        self.height = height
+        self.fps = fps
+
+        self.camera = None
+        self.is_connected = False
+        self.thread = None
+        self.stop_event = None
+        self.current_frame = None
+        self.frame_number = 0          # numéro de la dernière frame lue
+        self.frame_lock = threading.Lock()
+
+    def connect(self):
+        """Connecte la caméra et démarre le thread de lecture"""
+        if self.is_connected:
+            return True
+
+        if not CV2_AVAILABLE:
+            return False
+
+        self.camera = cv2.VideoCapture(self.camera_index)
+        if not self.camera.isOpened():
+            print(f"❌ Impossible d'ouvrir {self.name} (index {self.camera_index})")
+            self.camera = None
+            return False
+
+        # Configurer la caméra
+        self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        self.camera.set(cv2.CAP_PROP_FPS, self.fps)
+
+        # Lire une première frame pour initialiser (warmup comme LeRobot)
+        ret, frame = self.camera.read()
+        if ret:
+            self.current_frame = frame
+            self.frame_number = 1
+
+        self.is_connected = True
+
+        # Démarrer le thread de lecture
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._read_loop, daemon=True)
+        self.thread.start()
+
+        print(f"   ✅ {self.name} connectée (index {self.camera_index})")
+        return True
+
+    def _read_loop(self):
+        """Boucle de lecture en continu (dans son propre thread)"""
+        while not self.stop_event.is_set():
+            if self.camera and self.camera.isOpened():
+                # read() attend l'image suivante : c'est ce thread qui attend, pas la boucle
+                ret, frame = self.camera.read()
+                if ret:
+                    with self.frame_lock:
+                        self.current_frame = frame
+                        self.frame_number += 1
+            # Petite pause pour ne pas surcharger le CPU
+            time.sleep(0.001)
+
+    def async_read(self):
+        """Retourne la dernière frame disponible (non-bloquant)"""
+        with self.frame_lock:
+            return self.current_frame.copy() if self.current_frame is not None else None
+
+    def latest(self):
+        """
+        (numéro, frame) de la dernière image, sans copie : chaque lecture
+        produit un nouveau tableau, celui-ci n'est plus modifié.
+        """
+        with self.frame_lock:
+            return self.frame_number, self.current_frame
+
+    def disconnect(self):
+        """Arrête le thread et libère la caméra"""
+        if self.thread is not None:
+            self.stop_event.set()
+            self.thread.join(timeout=1.0)
+            self.thread = None
+            self.stop_event = None
+
+        if self.camera is not None:
+            self.camera.release()
+            self.camera = None
+
+        self.is_connected = False
+        self.current_frame = None
+
+
+class AffichageCamera:
+    """
+    Fenêtre OpenCV alimentée par une ThreadedCamera, dans son propre thread.
+    Toutes les fonctions de fenêtre (namedWindow, imshow, waitKey,
+    destroyWindow) sont appelées depuis ce thread.
+
+    camera      : ThreadedCamera connectée
+    fenetre     : titre de la fenêtre
+    quitter     : True dès que Q a été pressée dans la fenêtre
+    """
+
+    def __init__(self, camera, fenetre):
+        self.camera = camera
+        self.fenetre = fenetre
+        self.thread = None
+        self.running = False
+        self.quitter = False
+        self.affichees = 0
+        self.debut = 0.0
+        self.duree = 0.0
+
+    def start(self):
+        """Ouvre la fenêtre et démarre l'affichage"""
+        self.running = True
+        self.debut = time.perf_counter()
+        self.thread = threading.Thread(target=self._worker, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Arrête l'affichage et ferme la fenêtre"""
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+        self.duree += time.perf_counter() - self.debut
+
+    def _worker(self):
+        cv2.namedWindow(self.fenetre, cv2.WINDOW_NORMAL)
+        derniere = 0
+        while self.running:
+            numero, frame = self.camera.latest()
+            if frame is not None and numero != derniere:
+                derniere = numero
+                cv2.imshow(self.fenetre, frame)
+                self.affichees += 1
+            # waitKey traite les événements de la fenêtre et sert de pause (~1 image à 30 fps)
+            if cv2.waitKey(10) & 0xFF in (ord('q'), ord('Q')):
+                self.quitter = True
+        cv2.destroyWindow(self.fenetre)
+        cv2.waitKey(1)
+
+    def frequence(self):
+        """Images affichées par seconde"""
+        duree = self.duree + (time.perf_counter() - self.debut if self.running else 0.0)
+        return self.affichees / duree if duree > 0 else 0.0
+
+    def resume(self):
+        """Bilan affichable"""
+        return (f"📷 {self.camera.name} : {self.affichees} images affichées "
+                f"({self.frequence():.1f} fps)")
+
+
+# ============================================
+# DÉMONSTRATION
+# ============================================
+
+def banc_essai(index=0, duree=5.0, frequence=100):
+    """Boucle à 100 Hz pendant que la caméra est lue et affichée à côté"""
+    from SEM_so101_cadence import Cadence
+
+    if not CV2_AVAILABLE:
+        print("❌ OpenCV non disponible")
+        return
+    camera = ThreadedCamera(index, f"Caméra {index}")
+    if not camera.connect():
+        return
+    affichage = AffichageCamera(camera, f"Camera {index}")
+    affichage.start()
+
+    print(f"\n📷 Boucle à {frequence} Hz pendant {duree:.0f} s, caméra lue et affichée en parallèle")
+    cadence = Cadence(frequence, "boucle")
+    debut = time.perf_counter()
+    while time.perf_counter() - debut < duree and not affichage.quitter:
+        time.sleep(0.003)   # échanges bus simulés
+        cadence.attendre()
+
+    affichage.stop()
+    camera.disconnect()
+    print(cadence.resume().splitlines()[0])
+    print(affichage.resume())
+
+
+if __name__ == "__main__":
+    banc_essai()
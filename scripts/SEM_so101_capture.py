@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Module SEM_so101_capture.py
+Service Ecoles Médias - Capture des lectures du bus à pleine cadence
+
+Le moniteur (script 3) n'affiche que la dernière lecture, 20 fois par
+seconde : une oscillation à 15 Hz ou un jeu de quelques pas n'y sont pas
+visibles. Capture garde chaque lecture, horodatée :
+
+  - tampon circulaire préalloué (NumPy), rempli par la boucle de lecture
+    sans allocation ni écriture disque
+  - thread d'écriture qui vide le tampon dans un fichier binaire toutes
+    les INTERVALLE_ECRITURE secondes
+  - tampon plein (disque trop lent) : les nouvelles lectures sont
+    comptées comme perdues, jamais écrites par-dessus les anciennes
+
+Avec la télémétrie, position, vitesse, charge, tension et température sont
+lues d'un seul bloc (registres 56 à 63) : un seul paquet par cycle, comme
+pour les positions seules, donc toujours à la cadence du bus.
+
+Fichier .semcap : en-tête de ENTETE.size octets puis les enregistrements
+bruts, lisibles directement avec lire_capture() (np.fromfile). Valeur
+absente (servo qui n'a pas répondu) : ABSENT (-32768). La vitesse est enregistrée
+signée (pas/s, négative en sens inverse), la charge brute (bit 10 = sens,
+voir decoder_charge).
+
+    python SEM_so101_capture.py                          → vérification écriture / relecture
+    python SEM_so101_capture.py fichier.semcap           → résumé de la capture
+    python SEM_so101_capture.py fichier.semcap --parquet → export Parquet (pandas)
+"""
+import os
+import sys
+import time
+import struct
+import tempfile
+import threading
+
+import numpy as np
+
+from SEM_so101_bus import SERVO_IDS, ADDR_PRESENT_POSITION
+
+REPERTOIRE_CAPTURES = os.path.expanduser("~/lerobot/captures")
+
+# Lectures gardées en mémoire (~80 s à 100 Hz) et intervalle d'écriture
+CAPACITE = 8192
+INTERVALLE_ECRITURE = 0.5
+
+# Bloc lu d'un seul paquet : position (2), vitesse (2), charge (2), tension (1), température (1)
+LONGUEUR_BLOC = 8
+TELEMETRIE = ("charge", "tension", "temperature")
+# Valeur absente : hors de portée des valeurs décodées (vitesse signée comprise)
+ABSENT = -32768
+
+SIGNATURE = b"SEMCAP"
+VERSION = 2
+ENTETE = struct.Struct("<6sHB?d16s")     # signature, version, servos, télémétrie, début (époque), robot
+
+
+def decoder_vitesse(valeur):
+    """Vitesse brute (bit 15 = sens inverse) → vitesse signée en pas/s"""
+    vitesse = valeur & 0x7FFF
+    return -vitesse if valeur & 0x8000 else vitesse
+
+
+def format_enregistrement(telemetrie, nb_servos=len(SERVO_IDS)):
+    """Enregistrement d'une lecture : horodatage (s depuis le début) et valeurs par servo"""
+    champs = [('t', '<f8'), ('position', '<i2', nb_servos)]
+    if telemetrie:
+        champs += [('vitesse', '<i2', nb_servos), ('charge', '<i2', nb_servos),
+                   ('tension', '<i2', nb_servos), ('temperature', '<i2', nb_servos)]
+    return np.dtype(champs)
+
+
+def lire_etat_complet(bras, ids=None):
+    """
+    Lit position, vitesse, charge, tension et température d'un seul paquet.
+    Retourne (positions, telemetrie, erreurs) ; telemetrie au format du
+    planificateur ({nom: {id: valeur brute}}) plus 'vitesse', déjà signée
+    (le mot brut dépasse l'int16 du fichier dès que le servo recule).
+    """
+    blocs, erreurs = bras.read_register(ADDR_PRESENT_POSITION, LONGUEUR_BLOC, ids)
+    positions = {}
+    telemetrie = {nom: {} for nom in ("vitesse",) + TELEMETRIE}
+    for servo_id, bloc in blocs.items():
+        positions[servo_id] = bloc & 0xFFFF
+        telemetrie["vitesse"][servo_id] = decoder_vitesse((bloc >> 16) & 0xFFFF)
+        telemetrie["charge"][servo_id] = (bloc >> 32) & 0xFFFF
+        telemetrie["tension"][servo_id] = (bloc >> 48) & 0xFF
+        telemetrie["temperature"][servo_id] = (bloc >> 56) & 0xFF
+    return positions, telemetrie, erreurs
+
+
+def fichier_capture(robot_name):
+    """Chemin d'une nouvelle capture (horodaté)"""
+    return os.path.join(REPERTOIRE_CAPTURES,
+                        f"{robot_name.lower()}_{time.strftime('%Y%m%d_%H%M%S')}.semcap")
+
+
+class Capture:
+    """
+    Lectures horodatées en tampon circulaire, écrites par un thread de fond.
+
+    chemin      : fichier .semcap créé au démarrage
+    robot_name  : nom enregistré dans l'en-tête
+    telemetrie  : enregistre aussi vitesse, charge, tension, température
+    """
+
+    def __init__(self, chemin, robot_name, telemetrie=False, ids=SERVO_IDS,
+                 capacite=CAPACITE, intervalle=INTERVALLE_ECRITURE):
+        self.chemin = chemin
+        self.robot_name = robot_name
+        self.telemetrie = telemetrie
+        self.ids = tuple(ids)
+        self.intervalle = intervalle
+        self.format = format_enregistrement(telemetrie, len(self.ids))
+        self.tampon = np.zeros(capacite, dtype=self.format)
+        self.capacite = capacite
+
+        # ajoutes : écrit par la boucle seulement ; ecrits : par le thread seulement
+        self.ajoutes = 0
+        self.ecrits = 0
+        self.pertes = 0
+        self.debut = 0.0
+
+        self.fichier = None
+        self.thread = None
+        self.reveil = threading.Event()
+        self.running = False
+
+    # --- Cycle de vie ---
+
+    def start(self):
+        """Crée le fichier et démarre le thread d'écriture"""
+        os.makedirs(os.path.dirname(self.chemin) or ".", exist_ok=True)
+        self.fichier = open(self.chemin, 'wb')
+        self.fichier.write(ENTETE.pack(SIGNATURE, VERSION, len(self.ids), self.telemetrie,
+                                       time.time(), self.robot_name.encode()[:16]))
+        self.debut = time.perf_counter()
+        self.running = True
+        self.thread = threading.Thread(target=self._worker, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Écrit les dernières lectures et ferme le fichier"""
+        self.running = False
+        self.reveil.set()
+        if self.thread is not None:
+            self.thread.join(timeout=5.0)
+        self._vider()
+        self.fichier.close()
+
+    # --- Boucle de lecture ---
+
+    def ajouter(self, horodatage, positions, telemetrie=None):
+        """
+        Range une lecture (horodatage perf_counter, {id: valeur}).
+        Retourne False si le tampon est plein (lecture perdue).
+        """
+        if self.ajoutes - self.ecrits >= self.capacite:
+            self.pertes += 1
+            return False
+        ligne = self.tampon[self.ajoutes % self.capacite]
+        ligne['t'] = horodatage - self.debut
+        ligne['position'] = [positions.get(i, ABSENT) for i in self.ids]
+        if self.telemetrie:
+            for nom in ("vitesse",) + TELEMETRIE:
+                valeurs = telemetrie.get(nom, {}) if telemetrie else {}
+                ligne[nom] = [valeurs.get(i, ABSENT) for i in self.ids]
+        self.ajoutes += 1
+        return True
+
+    # --- Écriture en fond ---
+
+    def _worker(self):
+        while self.running:
+            self.reveil.wait(self.intervalle)
+            self._vider()
+
+    def _vider(self):
+        """Écrit les lectures pas encore sur disque (en deux morceaux si l'anneau a tourné)"""
+        debut, fin = self.ecrits, self.ajoutes
+        while debut < fin:
+            case = debut % self.capacite
+            nombre = min(fin - debut, self.capacite - case)
+            self.fichier.write(self.tampon[case:case + nombre].tobytes())
+            debut += nombre
+        self.fichier.flush()
+        self.ecrits = fin
+
+    # --- Bilan ---
+
+    def resume(self):
+        """Bilan affichable de la capture"""
+        duree = time.perf_counter() - self.debut
+        frequence = self.ajoutes / duree if duree > 0 else 0.0
+        taille = self.ecrits * self.format.itemsize + ENTETE.size
+        return (f"💾 Capture : {self.ajoutes} lectures en {duree:.1f} s ({frequence:.0f} Hz), "
+                f"{self.pertes} perdues, {taille / 1024:.0f} Ko → {self.chemin}")
+
+
+# ============================================
+# RELECTURE D'UNE CAPTURE
+# ============================================
+
+def lire_capture(chemin):
+    """Retourne (infos, enregistrements) d'un fichier .semcap"""
+    with open(chemin, 'rb') as f:
+        signature, version, nb_servos, telemetrie, debut, robot = ENTETE.unpack(f.read(ENTETE.size))
+    if signature != SIGNATURE or version != VERSION:
+        raise ValueError(f"{chemin} : pas une capture SO-ARM 101 (version {VERSION})")
+    enregistrements = np.fromfile(chemin, dtype=format_enregistrement(telemetrie, nb_servos),
+                                  offset=ENTETE.size)
+    infos = {'robot': robot.rstrip(b"\0").decode(errors="replace"), 'debut': debut,
+             'telemetrie': telemetrie, 'nb_servos': nb_servos}
+    return infos, enregistrements
+
+
+def resume_capture(chemin):
+    """Cadence, trous et course de chaque servo dans une capture"""
+    infos, lectures = lire_capture(chemin)
+    print(f"\n💾 {os.path.basename(chemin)} : {infos['robot']}, "
+          f"{time.strftime('%d/%m/%Y %H:%M:%S', time.localtime(infos['debut']))}")
+    if len(lectures) < 2:
+        print("   ⚠️  Moins de deux lectures")
+        return
+    intervalles = np.diff(lectures['t']) * 1000
+    duree = lectures['t'][-1] - lectures['t'][0]
+    print(f"   {len(lectures)} lectures en {duree:.1f} s ({(len(lectures) - 1) / duree:.0f} Hz), "
+          f"intervalle p50 {np.percentile(intervalles, 50):.2f} ms, "
+          f"p99 {np.percentile(intervalles, 99):.2f} ms, max {intervalles.max():.2f} ms")
+    print("   SERVO   MIN    MAX   ÉCART-TYPE  ABSENTES")
+    for colonne in range(infos['nb_servos']):
+        positions = lectures['position'][:, colonne]
+        valides = positions[positions != ABSENT]
+        if len(valides) == 0:
+            print(f"   {colonne + 1:<5}   ---")
+            continue
+        print(f"   {colonne + 1:<5} {valides.min():5} {valides.max():6} {valides.std():10.1f} "
+              f"{len(positions) - len(valides):9}")
+
+
+def exporter_parquet(chemin):
+    """Écrit la capture en Parquet à côté du fichier (une colonne par servo et par valeur)"""
+    try:
+        import pandas as pd
+    except ImportError:
+        print("   ⚠️  Pandas non disponible - pas d'export Parquet")
+        return
+    infos, lectures = lire_capture(chemin)
+    colonnes = {'t': lectures['t']}
+    for nom in lectures.dtype.names[1:]:
+        for colonne in range(infos['nb_servos']):
+            colonnes[f"{nom}_{colonne + 1}"] = lectures[nom][:, colonne]
+    destination = os.path.splitext(chemin)[0] + ".parquet"
+    pd.DataFrame(colonnes).to_parquet(destination, index=False)
+    print(f"   ✅ Parquet : {destination}")
+
+
+# ============================================
+# VÉRIFICATION
+# ============================================
+
+def banc_essai():
+    """Écrit puis relit une capture avec télémétrie, dont un servo qui recule"""
+    ids = tuple(SERVO_IDS)
+    # Bloc brut comme lu sur le bus : position 2100, vitesse 120 en sens inverse,
+    # charge 35 % en sens inverse, 12,1 V, 38 °C
+    bloc = 2100 | (0x8000 | 120) << 16 | (0x400 | 350) << 32 | 121 << 48 | 38 << 56
+
+    class BrasFictif:
+        def read_register(self, adresse, longueur, ids=None):
+            return {i: bloc for i in ids or SERVO_IDS}, {}
+
+    positions, telemetrie, _ = lire_etat_complet(BrasFictif())
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, "verification.semcap")
+        capture = Capture(chemin, "VERIF", telemetrie=True)
+        capture.start()
+        capture.ajouter(capture.debut + 0.01, positions, telemetrie)
+        capture.ajouter(capture.debut + 0.02, {ids[0]: 2048}, None)
+        capture.stop()
+        infos, lectures = lire_capture(chemin)
+
+    assert infos['robot'] == "VERIF" and len(lectures) == 2
+    assert (lectures['position'][0] == 2100).all()
+    assert (lectures['vitesse'][0] == -120).all()
+    assert (lectures['charge'][0] == 0x400 | 350).all()
+    assert (lectures['tension'][0] == 121).all() and (lectures['temperature'][0] == 38).all()
+    assert lectures['position'][1][0] == 2048 and (lectures['position'][1][1:] == ABSENT).all()
+    assert (lectures['vitesse'][1] == ABSENT).all()
+    print("✅ Capture : écriture et relecture conformes (vitesse négative, valeurs absentes)")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        banc_essai()
+        sys.exit(0)
+    resume_capture(sys.argv[1])
+    if "--parquet" in sys.argv:
+        exporter_parquet(sys.argv[1])
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Module SEM_so101_ecran.py
+Service Ecoles Médias - Affichage terminal rafraîchi par différence
+
+Effacer l'écran (os.system('clear')) puis tout réimprimer à chaque image
+lance un shell à chaque fois, fait clignoter le terminal et ralentit la
+boucle qui lit le bus. Ecran garde l'image précédente (une chaîne par
+ligne) et n'envoie que les caractères qui ont changé, placés avec les
+séquences ANSI de positionnement du curseur.
+
+Le rendu tourne dans un thread à part, à sa propre fréquence : la boucle
+de lecture dépose ses dernières valeurs (la plus récente remplace la
+précédente) et repart aussitôt, même si le terminal est lent.
+
+    ecran = Ecran(construire_lignes, frequence=20)
+    ecran.start()
+    while ...:
+        ...                                  # lecture du bus à 100 Hz
+        ecran.publier(positions, stats)      # construire_lignes(positions, stats)
+    ecran.stop()
+
+Les caractères de largeur incertaine (émojis) ne sont jamais utilisés pour
+calculer une colonne : une ligne qui en contient avant la partie modifiée
+est réécrite entière.
+
+    python SEM_so101_ecran.py  → octets écrits : différence / réaffichage complet
+"""
+import io
+import re
+import sys
+import time
+import shutil
+import threading
+
+# Images par seconde au plus (au-delà, l'œil ne voit plus la différence)
+FREQUENCE_AFFICHAGE = 20
+
+# Deux modifications séparées par au plus ce nombre de caractères sont
+# envoyées ensemble (un déplacement du curseur coûte ~8 octets)
+ECART_FUSION = 6
+
+EFFACER = "\033[H\033[2J"
+CACHER_CURSEUR = "\033[?25l"
+MONTRER_CURSEUR = "\033[?25h"
+FIN_DE_LIGNE = "\033[K"
+
+# Largeur d'une colonne garantie : ASCII, Latin, flèches, cadres et blocs
+_LARGEUR_INCERTAINE = re.compile(r"[^\u0000-\u22ff\u2500-\u259f]")
+
+
+def effacer_ecran(sortie=None):
+    """Efface le terminal (séquence ANSI, sans lancer de shell)"""
+    sortie = sortie or sys.stdout
+    sortie.write(EFFACER)
+    sortie.flush()
+
+
+def _aller(rang, colonne):
+    return f"\033[{rang + 1};{colonne + 1}H"
+
+
+def _segments(ancienne, ligne):
+    """Plages [debut, fin) qui diffèrent entre deux lignes de même longueur"""
+    segments = []
+    for i, (a, b) in enumerate(zip(ancienne, ligne)):
+        if a != b:
+            if segments and i - segments[-1][1] <= ECART_FUSION:
+                segments[-1][1] = i + 1
+            else:
+                segments.append([i, i + 1])
+    return segments
+
+
+def difference(precedentes, lignes):
+    """Séquence ANSI qui transforme l'image precedentes en lignes"""
+    morceaux = []
+    for rang, ligne in enumerate(lignes):
+        ancienne = precedentes[rang] if rang < len(precedentes) else None
+        if ligne == ancienne:
+            continue
+        if ancienne is None:
+            morceaux.append(_aller(rang, 0) + ligne + FIN_DE_LIGNE)
+        elif (len(ligne) == len(ancienne) and not _LARGEUR_INCERTAINE.search(ligne)
+                and not _LARGEUR_INCERTAINE.search(ancienne)):
+            # Cas courant (chiffres, barres) : seulement les cases modifiées
+            for debut, fin in _segments(ancienne, ligne):
+                morceaux.append(_aller(rang, debut) + ligne[debut:fin])
+        else:
+            debut = 0
+            while debut < min(len(ligne), len(ancienne)) and ligne[debut] == ancienne[debut]:
+                debut += 1
+            if _LARGEUR_INCERTAINE.search(ligne, 0, debut):
+                debut = 0
+            morceaux.append(_aller(rang, debut) + ligne[debut:] + FIN_DE_LIGNE)
+    for rang in range(len(lignes), len(precedentes)):
+        morceaux.append(_aller(rang, 0) + FIN_DE_LIGNE)
+    return "".join(morceaux)
+
+
+class Ecran:
+    """
+    Écran texte rafraîchi par différence dans un thread dédié.
+
+    rendu(*valeurs) → liste de lignes, appelé dans le thread d'affichage
+    frequence       : images par seconde au plus
+    sortie          : flux d'écriture (sys.stdout par défaut)
+    """
+
+    def __init__(self, rendu, frequence=FREQUENCE_AFFICHAGE, sortie=None):
+        self.rendu = rendu
+        self.periode = 1.0 / frequence
+        self.sortie = sortie or sys.stdout
+        self.lignes = None            # image affichée (None : écran à effacer)
+        self.taille = None
+        self.valeurs = None
+        self.nouvelles = threading.Event()
+        self.thread = None
+        self.running = False
+
+        # Statistiques
+        self.images = 0
+        self.octets = 0
+        self.octets_complets = 0
+        self.debut = 0.0
+
+    # --- Cycle de vie ---
+
+    def start(self):
+        """Démarre le thread d'affichage"""
+        self.running = True
+        self.debut = time.perf_counter()
+        self.sortie.write(CACHER_CURSEUR)
+        self.thread = threading.Thread(target=self._worker, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Dernière image, puis curseur rendu sous le tableau"""
+        self.running = False
+        self.nouvelles.set()
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+        if self.valeurs is not None:
+            self.dessiner(self.rendu(*self.valeurs))
+        hauteur = len(self.lignes) if self.lignes else 0
+        self.sortie.write(_aller(hauteur, 0) + MONTRER_CURSEUR + "\n")
+        self.sortie.flush()
+
+    def publier(self, *valeurs):
+        """Dépose les valeurs à afficher (non bloquant, la plus récente gagne)"""
+        self.valeurs = valeurs
+        self.nouvelles.set()
+
+    # --- Rendu ---
+
+    def dessiner(self, lignes):
+        """Affiche une image en n'écrivant que ce qui a changé"""
+        taille = shutil.get_terminal_size()
+        # Au-delà du bas du terminal, l'écran défilerait : lignes coupées
+        lignes = [ligne[:taille.columns] for ligne in lignes[:taille.lines - 1]]
+        if taille != self.taille:
+            # Premier affichage ou terminal redimensionné : image complète
+            self.taille = taille
+            self.lignes = None
+        if self.lignes is None:
+            texte = EFFACER + difference([], lignes)
+        else:
+            texte = difference(self.lignes, lignes)
+        self.lignes = lignes
+        if texte:
+            self.sortie.write(texte)
+            self.sortie.flush()
+        self.images += 1
+        self.octets += len(texte.encode())
+        self.octets_complets += len((EFFACER + "\n".join(lignes)).encode())
+
+    def _worker(self):
+        prochaine = time.perf_counter()
+        while self.running:
+            self.nouvelles.wait()
+            if not self.running:
+                break
+            # Pas plus d'une image par période, même si le bus va plus vite
+            attente = prochaine - time.perf_counter()
+            if attente > 0:
+                time.sleep(attente)
+            self.nouvelles.clear()
+            self.dessiner(self.rendu(*self.valeurs))
+            prochaine = max(prochaine + self.periode, time.perf_counter())
+
+    # --- Bilan ---
+
+    def frequence_reelle(self):
+        """Images affichées par seconde depuis le démarrage"""
+        duree = time.perf_counter() - self.debut
+        return self.images / duree if duree > 0 else 0.0
+
+    def resume(self):
+        """Bilan affichable de l'affichage"""
+        if not self.images:
+            return "🖥️  Affichage : aucune image"
+        return (f"🖥️  Affichage : {self.images} images, {self.octets / self.images:.0f} octets "
+                f"par image (réaffichage complet : {self.octets_complets / self.images:.0f})")
+
+
+# ============================================
+# DÉMONSTRATION
+# ============================================
+
+def banc_essai(images=200):
+    """Octets envoyés au terminal pour un tableau de 6 servos qui bougent"""
+    def tableau(positions, image):
+        lignes = ["╔═════════╦═══════╦══════════════════════╗"]
+        for servo_id, position in positions.items():
+            rempli = position * 20 // 4096
+            lignes.append(f"║ servo {servo_id} ║ {position:5} ║ {'█' * rempli}{'░' * (20 - rempli)} ║")
+        lignes.append("╚═════════╩═══════╩══════════════════════╝")
+        lignes.append(f"📊 Image {image}")
+        return lignes
+
+    sortie = io.StringIO()
+    ecran = Ecran(tableau, sortie=sortie)
+    debut = time.perf_counter()
+    for image in range(images):
+        # Poignet et pince bougent, le reste du bras est immobile
+        positions = {i: 2048 for i in range(1, 5)}
+        positions.update({5: 2048 + image % 50, 6: 1500 + 5 * image})
+        ecran.dessiner(tableau(positions, image))
+    duree = (time.perf_counter() - debut) / images
+
+    print(f"\n🖥️  {images} images d'un tableau de 6 servos (2 en mouvement)")
+    print(ecran.resume())
+    print(f"   rendu + différence : {duree * 1e6:.0f} µs par image")
+
+
+if __name__ == "__main__":
+    banc_essai()
@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""
+Module SEM_so101_etat.py
+Service Ecoles Médias - État du robot en mémoire partagée
+
+Un bloc de mémoire partagée (multiprocessing.shared_memory) contient un
+anneau des derniers états publiés par la boucle Leader → Follower, un
+par cycle :
+
+  positions Leader et Follower, consignes Follower, télémétrie Follower
+  (température, charge, tension), nombre de cycles, horodatage
+  (perf_counter, horloge monotone commune aux processus), fréquence
+  mesurée de la boucle et dépassements
+
+et un en-tête : source et PID de la session, deux drapeaux de commande
+écrits par le processus principal (pause, arrêt), un drapeau « prêt »
+écrit par la boucle et le nombre d'états publiés.
+
+Pause acquittée : chaque demande de pause est numérotée ; la boucle recopie
+ce numéro une fois sortie de son cycle, et le processus principal attend
+ce numéro (attendre_pause) avant d'utiliser ses propres connexions au bus.
+
+Publication nommée : les scripts 6, 7 et 8 publient sous le nom
+NOM_PUBLICATION. Le moniteur (script 3), ou tout autre outil local, s'y
+attache en lecture seule sans ouvrir le port série : aucun trafic bus en
+plus, et les pages lues sont celles écrites par la boucle (pas de
+sérialisation, pas de tube, l'anneau est visible directement comme
+tableau NumPy).
+
+    etat = EtatPartage.publication("téléopération")   # None si déjà pris
+    etat.publier(positions_leader, positions_follower, ...)
+    ...
+    session = EtatPartage.lecteur()                    # None sans session
+    instantane = session.instantane()
+
+Écriture / lecture sans verrou (séquence paire / impaire par case) :
+l'écrivain incrémente la séquence de la case avant et après l'écriture,
+le lecteur recommence si la séquence était impaire ou a changé pendant sa
+copie. Un seul écrivain par bloc.
+
+Une valeur absente (servo qui n'a pas répondu) est notée -1.
+
+    python SEM_so101_etat.py  → publication et lecture en parallèle
+"""
+import os
+import mmap
+import time
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from SEM_so101_bus import SERVO_IDS
+
+NB_SERVOS = len(SERVO_IDS)
+TELEMETRIE = ("temperature", "charge", "tension")
+ABSENT = -1
+
+# Nom de la publication des scripts de téléopération (/dev/shm/sem_so101_etat)
+NOM_PUBLICATION = "sem_so101_etat"
+
+# États conservés dans l'anneau (10 s à 100 Hz)
+CAPACITE = 1024
+
+SIGNATURE = 0x53454D45   # "SEME"
+VERSION = 3
+
+ENTETE = np.dtype([
+    ('signature', '<u4'),
+    ('version', '<u2'),
+    ('pause', 'u1'),
+    ('arret', 'u1'),
+    ('pret', 'u1'),
+    ('pauses', '<u4'),            # numéro de la dernière demande de pause
+    ('pause_acquittee', '<u4'),   # numéro de pause confirmé par la boucle
+    ('pid', '<i4'),
+    ('capacite', '<u4'),
+    ('publies', '<u8'),
+    ('debut', '<f8'),
+    ('source', 'S32'),
+], align=True)
+
+ENTREE = np.dtype([
+    ('sequence', '<u8'),
+    ('horodatage', '<f8'),
+    ('cycles', '<u8'),
+    ('frequence', '<f4'),
+    ('depassements', '<u4'),
+    ('leader', '<i4', NB_SERVOS),
+    ('follower', '<i4', NB_SERVOS),
+    ('consignes', '<i4', NB_SERVOS),
+] + [(nom, '<i4', NB_SERVOS) for nom in TELEMETRIE], align=True)
+
+# L'anneau commence sur une ligne de cache
+DEBUT_ANNEAU = -(-ENTETE.itemsize // 64) * 64
+
+
+def taille_bloc(capacite=CAPACITE):
+    return DEBUT_ANNEAU + capacite * ENTREE.itemsize
+
+
+def _vers_tableau(valeurs, destination):
+    """{id: valeur} → cases du tableau (ABSENT pour les servos manquants)"""
+    destination[:] = ABSENT
+    for servo_id, valeur in valeurs.items():
+        destination[servo_id - 1] = valeur
+
+
+def _vers_dict(tableau):
+    return {servo_id: int(valeur) for servo_id, valeur in zip(SERVO_IDS, tableau)
+            if valeur != ABSENT}
+
+
+def _processus_vivant(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class EtatPartage:
+    """Anneau des derniers états de la boucle Leader → Follower en mémoire partagée"""
+
+    def __init__(self, memoire, buffer, proprietaire):
+        self.memoire = memoire
+        self.proprietaire = proprietaire
+        self.nom = memoire.name if memoire is not None else None
+        self.entete = np.ndarray((), dtype=ENTETE, buffer=buffer)
+        capacite = int(self.entete['capacite']) or CAPACITE
+        # Vue directe sur l'anneau (non modifiable pour un lecteur)
+        self.entrees = np.ndarray((capacite,), dtype=ENTREE, buffer=buffer, offset=DEBUT_ANNEAU)
+        self._buffer = buffer
+
+    @classmethod
+    def creer(cls, nom=None, source="", capacite=CAPACITE):
+        """
+        Crée le bloc (processus principal, qui le détruira). Avec un nom
+        déjà pris par une session vivante : FileExistsError. Un bloc
+        laissé par une session terminée sans nettoyage est remplacé.
+        """
+        try:
+            memoire = shared_memory.SharedMemory(name=nom, create=True, size=taille_bloc(capacite))
+        except FileExistsError:
+            ancien = cls.lecteur(nom)
+            if ancien is not None and ancien.actif():
+                ancien.fermer()
+                raise
+            if ancien is not None:
+                ancien.fermer()
+            perime = shared_memory.SharedMemory(name=nom)
+            perime.close()
+            perime.unlink()
+            memoire = shared_memory.SharedMemory(name=nom, create=True, size=taille_bloc(capacite))
+
+        entete = np.ndarray((), dtype=ENTETE, buffer=memoire.buf)
+        entete[()] = np.zeros((), dtype=ENTETE)
+        entete['capacite'] = capacite
+        entete['pid'] = os.getpid()
+        entete['debut'] = time.time()
+        entete['source'] = source.encode()[:ENTETE['source'].itemsize]
+        etat = cls(memoire, memoire.buf, proprietaire=True)
+        etat.entrees[:] = np.zeros((), dtype=ENTREE)
+        for champ in ('leader', 'follower', 'consignes') + TELEMETRIE:
+            etat.entrees[champ] = ABSENT
+        # Signature en dernier : un lecteur ne voit jamais un bloc à moitié initialisé
+        entete['version'] = VERSION
+        entete['signature'] = SIGNATURE
+        return etat
+
+    @classmethod
+    def publication(cls, source):
+        """Bloc nommé NOM_PUBLICATION pour les outils locaux, None s'il est déjà pris"""
+        try:
+            return cls.creer(NOM_PUBLICATION, source)
+        except FileExistsError:
+            print(f"⚠️  État déjà publié par une autre session : {source} non publiée")
+        except OSError as erreur:
+            print(f"⚠️  Publication de l'état impossible : {erreur}")
+        return None
+
+    @classmethod
+    def attacher(cls, nom):
+        """S'attache en écriture à un bloc existant (processus de la boucle)"""
+        memoire = shared_memory.SharedMemory(name=nom)
+        return cls(memoire, memoire.buf, proprietaire=False)
+
+    @classmethod
+    def lecteur(cls, nom=NOM_PUBLICATION):
+        """
+        S'attache en lecture seule (projection mmap de /dev/shm/nom).
+        None si le bloc n'existe pas ou n'est pas un état SO-ARM 101.
+        """
+        try:
+            fd = os.open(os.path.join("/dev/shm", nom.lstrip("/")), os.O_RDONLY)
+        except OSError:
+            return None
+        try:
+            if os.fstat(fd).st_size < DEBUT_ANNEAU:
+                return None
+            projection = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+        entete = np.ndarray((), dtype=ENTETE, buffer=projection)
+        valide = (int(entete['signature']) == SIGNATURE and int(entete['version']) == VERSION
+                  and len(projection) >= taille_bloc(int(entete['capacite'])))
+        del entete
+        if not valide:
+            projection.close()
+            return None
+        etat = cls(None, projection, proprietaire=False)
+        etat.nom = nom
+        return etat
+
+    # --- Description de la session ---
+
+    @property
+    def source(self):
+        return self.entete['source'].item().decode(errors="ignore")
+
+    @property
+    def pid(self):
+        return int(self.entete['pid'])
+
+    @property
+    def publies(self):
+        """Nombre d'états publiés depuis la création"""
+        return int(self.entete['publies'])
+
+    def actif(self):
+        """True tant que la session qui publie tourne (ni arrêtée, ni disparue)"""
+        return not self.arret and _processus_vivant(self.pid)
+
+    # --- Drapeaux de commande (un octet, pas de séquence) ---
+
+    @property
+    def pause(self):
+        return bool(self.entete['pause'])
+
+    @pause.setter
+    def pause(self, valeur):
+        self.entete['pause'] = valeur
+
+    @property
+    def arret(self):
+        return bool(self.entete['arret'])
+
+    @arret.setter
+    def arret(self, valeur):
+        self.entete['arret'] = valeur
+
+    @property
+    def pret(self):
+        return bool(self.entete['pret'])
+
+    @pret.setter
+    def pret(self, valeur):
+        self.entete['pret'] = valeur
+
+    # --- Pause acquittée ---
+
+    def demander_pause(self, valeur):
+        """Processus principal : pause on/off, chaque nouvelle pause numérotée"""
+        if valeur and not self.pause:
+            self.entete['pauses'] = int(self.entete['pauses']) + 1
+        self.pause = valeur
+
+    def acquitter_pause(self, au_repos):
+        """Boucle : confirme la pause en cours si plus aucun cycle ne touche au bus"""
+        numero = int(self.entete['pauses'])
+        if self.pause and au_repos:
+            self.entete['pause_acquittee'] = numero
+
+    def pause_acquittee(self):
+        """True si la dernière pause demandée est confirmée par la boucle"""
+        return self.pause and int(self.entete['pause_acquittee']) == int(self.entete['pauses'])
+
+    # --- Publication (un seul écrivain : la boucle) ---
+
+    def publier(self, positions_leader, positions_follower, telemetrie=None, cycles=0,
+                consignes=None, frequence=0.0, depassements=0):
+        """Écrit un nouvel état dans la case suivante de l'anneau"""
+        numero = int(self.entete['publies'])
+        entree = self.entrees[numero % len(self.entrees)]
+        entree['sequence'] = 2 * numero + 1          # impaire : écriture en cours
+        _vers_tableau(positions_leader, entree['leader'])
+        _vers_tableau(positions_follower, entree['follower'])
+        _vers_tableau(consignes or {}, entree['consignes'])
+        telemetrie = telemetrie or {}
+        for nom in TELEMETRIE:
+            _vers_tableau(telemetrie.get(nom, {}), entree[nom])
+        entree['cycles'] = cycles
+        entree['frequence'] = frequence
+        entree['depassements'] = depassements
+        entree['horodatage'] = time.perf_counter()
+        entree['sequence'] = 2 * numero + 2          # paire : état cohérent
+        self.entete['publies'] = numero + 1
+
+    def observateur(self, boucle, mapper=None):
+        """
+        Observateur pour BoucleTeleop : publie chaque cycle Follower avec
+        la télémétrie, les cycles et la cadence de la boucle (et les
+        consignes si mapper est donné).
+        """
+        def publier(positions_leader, positions_follower):
+            cadence = boucle.cadence_leader
+            self.publier(positions_leader, positions_follower, boucle.telemetrie(),
+                         boucle.tick_follower,
+                         mapper(positions_leader) if mapper is not None else None,
+                         cadence.frequence_reelle() if cadence else boucle.cadence(),
+                         cadence.depassements if cadence else 0)
+        return publier
+
+    # --- Lecture ---
+
+    def derniere(self):
+        """Copie cohérente du dernier état publié (np.void), None si aucun"""
+        while True:
+            publies = int(self.entete['publies'])
+            if publies == 0:
+                return None
+            entree = self.entrees[(publies - 1) % len(self.entrees)]
+            attendue = 2 * publies
+            if int(entree['sequence']) == attendue:
+                copie = entree.copy()
+                if int(entree['sequence']) == attendue:
+                    return copie
+            # Case réécrite pendant la copie (lecteur dépassé) : relire la plus récente
+            time.sleep(0)
+
+    def instantane(self):
+        """Dernier état en dictionnaires {id: valeur}, None si aucun"""
+        copie = self.derniere()
+        if copie is None:
+            return None
+        return {
+            'leader': _vers_dict(copie['leader']),
+            'follower': _vers_dict(copie['follower']),
+            'consignes': _vers_dict(copie['consignes']),
+            'telemetrie': {nom: _vers_dict(copie[nom]) for nom in TELEMETRIE},
+            'cycles': int(copie['cycles']),
+            'horodatage': float(copie['horodatage']),
+            'frequence': float(copie['frequence']),
+            'depassements': int(copie['depassements']),
+        }
+
+    def lire(self):
+        """(positions_leader, positions_follower, télémétrie, cycles, horodatage)"""
+        instantane = self.instantane()
+        if instantane is None:
+            return {}, {}, {nom: {} for nom in TELEMETRIE}, 0, 0.0
+        return (instantane['leader'], instantane['follower'], instantane['telemetrie'],
+                instantane['cycles'], instantane['horodatage'])
+
+    def fermer(self):
+        """Détache le bloc ; le propriétaire le détruit aussi"""
+        if self.proprietaire:
+            self.arret = True      # les lecteurs voient la fin de la session
+        self.entete = None
+        self.entrees = None
+        if self.memoire is None:
+            self._buffer.close()
+            return
+        self._buffer = None
+        self.memoire.close()
+        if self.proprietaire:
+            self.memoire.unlink()
+
+
+# ============================================
+# DÉMONSTRATION
+# ============================================
+
+def banc_essai(duree=2.0, frequence=100):
+    """Une boucle publie à 100 Hz, un lecteur en lecture seule la suit"""
+    etat = EtatPartage.publication("démonstration")
+    if etat is None:
+        return
+    print(f"\n🧠 Publication « démonstration » dans /dev/shm/{NOM_PUBLICATION} "
+          f"({taille_bloc() // 1024} Ko, {CAPACITE} états)")
+
+    def boucle():
+        debut = time.perf_counter()
+        cycles = 0
+        while time.perf_counter() - debut < duree:
+            cycles += 1
+            positions = {i: 2048 + (cycles + 10 * i) % 100 for i in SERVO_IDS}
+            etat.publier(positions, positions, {"temperature": {i: 30 for i in SERVO_IDS}},
+                         cycles, positions, float(frequence))
+            time.sleep(1.0 / frequence)
+
+    ecrivain = threading.Thread(target=boucle, daemon=True)
+    ecrivain.start()
+
+    session = EtatPartage.lecteur()
+    lectures, incoherences, ages = 0, 0, []
+    while ecrivain.is_alive():
+        copie = session.derniere()
+        if copie is not None:
+            lectures += 1
+            ages.append(time.perf_counter() - float(copie['horodatage']))
+            leader = copie['leader']
+            if int(leader[1]) - int(leader[0]) not in (10, -90):
+                incoherences += 1
+        time.sleep(0.001)
+    ecrivain.join()
+
+    print(f"   source « {session.source} », PID {session.pid}, {session.publies} états publiés")
+    print(f"   {lectures} lectures, {incoherences} incohérentes, "
+          f"âge moyen {sum(ages) / max(len(ages), 1) * 1000:.2f} ms")
+    try:
+        session.pause = True
+    except ValueError:
+        print("   lecteur en lecture seule : écriture refusée ✅")
+    session.fermer()
+    etat.fermer()
+
+
+if __name__ == "__main__":
+    banc_essai()
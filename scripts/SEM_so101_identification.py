@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Module SEM_so101_identification.py
+Service Ecoles Médias - Identité USB mémorisée du Leader et du Follower
+
+Chaque adaptateur USB a un numéro de série, visible dans /dev/serial/by-id.
+Après une identification guidée réussie (débrancher, brancher, pince qui
+bouge), les scripts 5 à 8 mémorisent quel adaptateur est le Leader et
+lequel est le Follower. Aux lancements suivants :
+
+  identification_rapide() : retrouve les deux adaptateurs par leur identité,
+                            ouvre les bras et vérifie que les 6 servos
+                            de chacun répondent (une lecture groupée)
+
+Si un adaptateur manque, n'a pas de numéro de série ou si un servo ne
+répond pas, le script repasse par l'identification guidée.
+
+Fichier : ~/lerobot/calibration/identification_usb.json
+"""
+import os
+import json
+
+from SEM_so101_bus import detect_ports, ouvrir_bras, SERVO_IDS
+
+REPERTOIRE_BY_ID = "/dev/serial/by-id"
+FICHIER_IDENTIFICATION = os.path.expanduser("~/lerobot/calibration/identification_usb.json")
+
+
+def identite_usb(port):
+    """
+    Identité stable d'un port série : nom dans /dev/serial/by-id
+    (contient le numéro de série), sinon numéro de série lu dans /sys.
+    Retourne None si l'adaptateur n'en a pas.
+    """
+    cible = os.path.realpath(port)
+    if os.path.isdir(REPERTOIRE_BY_ID):
+        for nom in sorted(os.listdir(REPERTOIRE_BY_ID)):
+            if os.path.realpath(os.path.join(REPERTOIRE_BY_ID, nom)) == cible:
+                return nom
+
+    # Sans udev : /sys/class/tty/ttyACM0/device → interface USB, le parent a le n° de série
+    interface = os.path.realpath(f"/sys/class/tty/{os.path.basename(cible)}/device")
+    fichier_serie = os.path.join(os.path.dirname(interface), "serial")
+    if os.path.exists(fichier_serie):
+        with open(fichier_serie) as f:
+            serie = f.read().strip()
+        if serie:
+            return f"serial:{serie}"
+    return None
+
+
+def charger_identification():
+    """Retourne {'leader': identité, 'follower': identité} ou None"""
+    if not os.path.exists(FICHIER_IDENTIFICATION):
+        return None
+    try:
+        with open(FICHIER_IDENTIFICATION, 'r') as f:
+            identification = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if identification.get('leader') and identification.get('follower'):
+        return identification
+    return None
+
+
+def memoriser_identification(leader_port, follower_port):
+    """Mémorise l'identité USB des deux bras après une identification guidée"""
+    leader = identite_usb(leader_port)
+    follower = identite_usb(follower_port)
+    if not leader or not follower or leader == follower:
+        print("⚠️  Adaptateurs USB sans numéro de série : identification non mémorisée")
+        return False
+    os.makedirs(os.path.dirname(FICHIER_IDENTIFICATION), exist_ok=True)
+    with open(FICHIER_IDENTIFICATION, 'w') as f:
+        json.dump({'leader': leader, 'follower': follower}, f, indent=2)
+    print("💾 Identification USB mémorisée (lancements suivants sans débrancher)")
+    return True
+
+
+def _verifier(bras):
+    """Vérification rapide : les 6 servos répondent à une lecture groupée"""
+    positions, _ = bras.read_positions()
+    return all(servo_id in positions for servo_id in SERVO_IDS)
+
+
+def identification_rapide():
+    """
+    Ouvre Leader et Follower d'après l'identité USB mémorisée.
+    Retourne (leader, follower) ou None s'il faut l'identification guidée.
+    """
+    identification = charger_identification()
+    if identification is None:
+        return None
+
+    ports = {identite_usb(port): port for port in detect_ports()}
+    leader_port = ports.get(identification['leader'])
+    follower_port = ports.get(identification['follower'])
+    if not leader_port or not follower_port:
+        print("⚠️  Adaptateurs mémorisés non trouvés → identification guidée")
+        return None
+
+    leader = ouvrir_bras(leader_port, "LEADER")
+    if leader is None:
+        return None
+    follower = ouvrir_bras(follower_port, "FOLLOWER")
+    if follower is None:
+        leader.disconnect()
+        return None
+
+    if not _verifier(leader) or not _verifier(follower):
+        print("⚠️  Servos manquants sur un bras → identification guidée")
+        leader.disconnect()
+        follower.disconnect()
+        return None
+
+    print(f"✅ LEADER sur {leader_port}, FOLLOWER sur {follower_port} (identité USB mémorisée)")
+    return leader, follower
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Module SEM_so101_mapping.py
+Service Ecoles Médias - Correspondance Leader → Follower précompilée
+
+La correspondance d'une position Leader vers une consigne Follower ne
+dépend que des deux calibrations et des servos en MIROIR. Elle est donc
+calculée une fois pour les 4096 positions possibles de chaque servo :
+
+  MappingTeleop(calib_l, calib_f, servos_miroir)
+      .tables         : tableau (6, 4096) de consignes Follower
+      .appliquer(v)   : vecteur des 6 positions Leader → 6 consignes
+      mapping(lues)   : {id: position Leader} → {id: consigne Follower}
+
+Avec une calibration multi-points (points de référence relevés aux mêmes
+angles sur les deux bras), la table interpole par morceaux : position
+Leader → fraction de course (courbe du Leader) → position Follower
+(courbe du Follower). Le coût par tick reste une indexation de table.
+
+Les lectures du bus arrivent en dictionnaire : mapping(lues) indexe
+directement une liste par servo (plus rapide qu'un passage par NumPy
+pour 6 valeurs) ; appliquer() sert aux positions déjà en vecteur.
+
+Le basculement CÔTÉ À CÔTÉ ↔ FACE À FACE (touche F) échange deux
+MappingTeleop construits au démarrage, sans relire de JSON.
+
+    python SEM_so101_mapping.py  → vérifie les tables et compare les durées
+"""
+import time
+import random
+
+import numpy as np
+
+from SEM_so101_bus import SERVO_IDS
+from SEM_so101_calibration import Calibration
+
+# Positions possibles d'un servo (12 bits)
+RESOLUTION = 4096
+
+
+def _bornes(calib, servo_id):
+    """(min, max) calibrés d'un servo, course complète sans calibration"""
+    if calib and servo_id in calib:
+        return calib.min[servo_id], calib.max[servo_id]
+    return 0, RESOLUTION - 1
+
+
+def mapper_position(pos_leader, servo_id, calib_leader, calib_follower, servos_miroir):
+    """Mapping proportionnel avec gestion COPIE/MIROIR (calcul direct, sert de référence)"""
+    min_l, max_l = _bornes(calib_leader, servo_id)
+    min_f, max_f = _bornes(calib_follower, servo_id)
+
+    ratio = (pos_leader - min_l) / (max_l - min_l) if max_l > min_l else 0.5
+    ratio = max(0, min(1, ratio))
+
+    if servo_id in servos_miroir:
+        ratio = 1 - ratio
+
+    pos_follower = int(min_f + ratio * (max_f - min_f))
+    return max(min_f, min(max_f, pos_follower))
+
+
+def _multipoints(calib, servo_id):
+    return bool(calib) and servo_id in calib and calib.multipoints(servo_id)
+
+
+def _courbe(calib, servo_id):
+    """Points de référence d'un servo et fractions de course correspondantes"""
+    points = np.asarray(calib.points[servo_id], dtype=np.float64)
+    return points, np.linspace(0.0, 1.0, len(points))
+
+
+def compiler_table(servo_id, calib_leader, calib_follower, miroir):
+    """Consigne Follower pour chacune des 4096 positions Leader d'un servo"""
+    min_l, max_l = _bornes(calib_leader, servo_id)
+    min_f, max_f = _bornes(calib_follower, servo_id)
+
+    positions = np.arange(RESOLUTION, dtype=np.float64)
+    if _multipoints(calib_leader, servo_id):
+        # np.interp borne déjà aux extrémités (comme le clip du cas linéaire)
+        ratio = np.interp(positions, *_courbe(calib_leader, servo_id))
+    elif max_l > min_l:
+        ratio = np.clip((positions - min_l) / (max_l - min_l), 0.0, 1.0)
+    else:
+        ratio = np.full(RESOLUTION, 0.5)
+    if miroir:
+        ratio = 1 - ratio
+
+    if _multipoints(calib_follower, servo_id):
+        points_f, fractions_f = _courbe(calib_follower, servo_id)
+        table = np.trunc(np.interp(ratio, fractions_f, points_f))
+    else:
+        # Même troncature que int() : les consignes sont positives
+        table = np.trunc(min_f + ratio * (max_f - min_f))
+    return np.clip(table, min_f, max_f).astype(np.int16)
+
+
+class MappingTeleop:
+    """
+    Correspondance Leader → Follower compilée en tables de 4096 entrées.
+
+    calib_leader, calib_follower : Calibration (SEM_so101_calibration.py) ou None
+    servos_miroir : servos dont le sens est inversé
+    """
+
+    def __init__(self, calib_leader, calib_follower, servos_miroir=(), ids=SERVO_IDS):
+        self.ids = tuple(ids)
+        self.servos_miroir = list(servos_miroir)
+        self.tables = np.stack([compiler_table(servo_id, calib_leader, calib_follower,
+                                               servo_id in self.servos_miroir)
+                                for servo_id in self.ids])
+        self._decalages = np.arange(len(self.ids)) * RESOLUTION
+        self._listes = {servo_id: table.tolist() for servo_id, table in zip(self.ids, self.tables)}
+
+    def appliquer(self, positions):
+        """Positions Leader dans l'ordre de self.ids → consignes Follower (vecteur)"""
+        positions = np.clip(np.asarray(positions, dtype=np.intp), 0, RESOLUTION - 1)
+        return self.tables.take(self._decalages + positions)
+
+    def __call__(self, lues_leader):
+        """{id: position Leader} → {id: consigne Follower} (servos lus seulement)"""
+        listes = self._listes
+        return {servo_id: listes[servo_id][min(position, RESOLUTION - 1)]
+                for servo_id, position in lues_leader.items() if servo_id in listes}
+
+
+# ============================================
+# VÉRIFICATION ET BANC D'ESSAI
+# ============================================
+
+def _calibration_aleatoire():
+    bornes = {}
+    for servo_id in SERVO_IDS:
+        mini = random.randint(0, 1500)
+        maxi = random.randint(2500, 4095)
+        bornes[servo_id] = (mini, (mini + maxi) // 2, maxi, None)
+    return Calibration("SIMULÉ", bornes)
+
+
+def _calibration_multipoints(calib, points=5):
+    """Même course avec des points de référence décalés (tringlerie non linéaire)"""
+    bornes = {}
+    for servo_id in SERVO_IDS:
+        mini, maxi = calib.min[servo_id], calib.max[servo_id]
+        fractions = np.linspace(0.0, 1.0, points)
+        references = mini + (maxi - mini) * fractions ** 1.5
+        bornes[servo_id] = (mini, calib.center[servo_id], maxi,
+                            tuple(int(p) for p in references))
+    return Calibration("SIMULÉ", bornes)
+
+
+def banc_essai(ticks=20000):
+    """Vérifie les tables contre le calcul direct puis compare le coût par tick"""
+    calib_l, calib_f = _calibration_aleatoire(), _calibration_aleatoire()
+    servos_miroir = [1, 5]
+    mapping = MappingTeleop(calib_l, calib_f, servos_miroir)
+
+    ecarts = sum(mapping({servo_id: position})[servo_id]
+                 != mapper_position(position, servo_id, calib_l, calib_f, servos_miroir)
+                 for servo_id in SERVO_IDS for position in range(RESOLUTION))
+    print(f"\n🔍 Tables comparées au calcul direct : {ecarts} écart(s) sur {6 * RESOLUTION} positions")
+
+    lectures = [{servo_id: random.randint(0, RESOLUTION - 1) for servo_id in SERVO_IDS}
+                for _ in range(ticks)]
+
+    debut = time.perf_counter()
+    for lues in lectures:
+        {servo_id: mapper_position(position, servo_id, calib_l, calib_f, servos_miroir)
+         for servo_id, position in lues.items()}
+    direct = (time.perf_counter() - debut) / ticks
+
+    debut = time.perf_counter()
+    for lues in lectures:
+        mapping(lues)
+    tables = (time.perf_counter() - debut) / ticks
+
+    vecteurs = np.array([[lues[servo_id] for servo_id in SERVO_IDS] for lues in lectures])
+    debut = time.perf_counter()
+    for vecteur in vecteurs:
+        mapping.appliquer(vecteur)
+    vecteur_seul = (time.perf_counter() - debut) / ticks
+
+    # Multi-points : mêmes tables, même coût par tick
+    multipoints = MappingTeleop(calib_l, _calibration_multipoints(calib_f), servos_miroir)
+    debut = time.perf_counter()
+    for lues in lectures:
+        multipoints(lues)
+    tables_multipoints = (time.perf_counter() - debut) / ticks
+    sens = [-1 if servo_id in servos_miroir else 1 for servo_id in SERVO_IDS]
+    monotones = all(np.all(signe * np.diff(table.astype(int)) >= 0)
+                    for signe, table in zip(sens, multipoints.tables))
+
+    debut = time.perf_counter()
+    modes = {"cote": mapping, "face": MappingTeleop(calib_l, calib_f, [2, 3])}
+    compilation = (time.perf_counter() - debut) / 2
+
+    print(f"⏱️  Mapping de 6 servos par tick ({ticks} ticks) :")
+    print(f"   calcul direct : {direct * 1e6:.1f} µs")
+    print(f"   tables        : {tables * 1e6:.1f} µs (dictionnaire du bus)")
+    print(f"   appliquer()   : {vecteur_seul * 1e6:.1f} µs (vecteur déjà construit)")
+    print(f"   multi-points  : {tables_multipoints * 1e6:.1f} µs "
+          f"(tables {'monotones' if monotones else 'NON monotones'})")
+    print(f"   compilation d'un mode : {compilation * 1000:.2f} ms ({len(modes)} modes au démarrage)")
+
+
+if __name__ == "__main__":
+    banc_essai()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Module SEM_so101_planificateur.py
+Service Ecoles Médias - Planificateur multi-cadence du bus SO-ARM 101
+
+Le bus d'un bras est découpé en ticks (ex: 10 ms). À chaque tick :
+
+  1. l'échange de contrôle (lecture des positions / écriture des consignes)
+     passe en premier, à la cadence de contrôle
+  2. le temps restant dans le budget du tick sert aux lectures de
+     télémétrie (charge, tension, température), chacune à sa propre
+     cadence, la plus en retard d'abord
+
+Une lecture de télémétrie n'est lancée que si sa durée estimée tient dans
+ce qui reste du budget : le contrôle garde sa cadence, la télémétrie
+prend du retard si le bus est plein (compté dans le bilan). Une lecture en
+retard de plus de FAMINE_PERIODES ticks passe quand même (tick compté
+hors budget) : une alerte de température ne reste jamais muette.
+
+Utilisation :
+    planificateur = PlanificateurBus(bras, periode=0.01)
+    lues = planificateur.tick(bras.read_positions)  # contrôle + télémétrie
+    planificateur.attendre()                         # jusqu'au tick suivant
+    planificateur.valeurs()                          # dernières valeurs lues
+
+ou, dans une boucle qui gère déjà sa cadence (BoucleTeleop) :
+    planificateur.completer(debut_tick, duree)       # télémétrie seule
+
+    python SEM_so101_planificateur.py  → démonstration sur bras simulé
+"""
+import time
+import threading
+
+from SEM_so101_bus import (So101ArmSimule, ADDR_RETURN_DELAY, ADDR_PRESENT_LOAD,
+                           ADDR_PRESENT_VOLTAGE, ADDR_PRESENT_TEMPERATURE)
+
+# (nom, adresse, longueur, fréquence en Hz)
+TELEMETRIE_DEFAUT = (
+    ("charge", ADDR_PRESENT_LOAD, 2, 20),
+    ("temperature", ADDR_PRESENT_TEMPERATURE, 1, 5),
+    ("tension", ADDR_PRESENT_VOLTAGE, 1, 1),
+)
+
+# Part du tick réservée au bus (le reste absorbe la gigue)
+BUDGET_DEFAUT = 0.8
+
+# Lissage de la durée estimée de chaque lecture
+LISSAGE = 0.2
+
+# Retard (en ticks) au-delà duquel une lecture passe même hors budget
+FAMINE_PERIODES = 50
+
+
+def decoder_charge(valeur):
+    """Charge brute (bit 10 = sens) → charge signée en % du couple max"""
+    charge = (valeur & 0x3FF) / 10
+    return -charge if valeur & 0x400 else charge
+
+
+class TacheTelemetrie:
+    """Lecture périodique d'un registre sur tous les servos du bras"""
+
+    def __init__(self, nom, adresse, longueur, frequence):
+        self.nom = nom
+        self.adresse = adresse
+        self.longueur = longueur
+        self.intervalle = 1.0 / frequence
+        self.echeance = 0.0
+        self.duree = None       # durée estimée d'une lecture (s)
+        self.lectures = 0
+        self.forcees = 0        # lectures passées hors budget (famine)
+        self.retard_max = 0.0
+
+
+class PlanificateurBus:
+    """
+    Répartit contrôle et télémétrie d'un bras sur des ticks de durée fixe.
+
+    periode : durée d'un tick (s), cadence de contrôle
+    budget  : part du tick utilisable sur le bus (0-1)
+    taches  : tuples (nom, adresse, longueur, fréquence)
+    """
+
+    def __init__(self, bras, periode=0.01, budget=BUDGET_DEFAUT,
+                 taches=TELEMETRIE_DEFAUT, ids=None):
+        self.bras = bras
+        self.periode = periode
+        self.budget = periode * budget
+        self.ids = ids
+        self.taches = [TacheTelemetrie(*tache) for tache in taches]
+        self.lock = threading.Lock()
+        self.telemetrie = {tache.nom: {} for tache in self.taches}
+
+        self.debut_tick = None
+        self.duree_controle = 0.0
+        self.famine = FAMINE_PERIODES * periode
+        self.ticks = 0
+        self.depassements = 0
+
+        # Décaler les premières échéances pour ne pas tout lire au même tick
+        maintenant = time.perf_counter()
+        for rang, tache in enumerate(self.taches):
+            tache.echeance = maintenant + rang * periode
+
+    # --- Ticks ---
+
+    def tick(self, controle=None):
+        """
+        Exécute un tick : controle() puis télémétrie dans le budget restant.
+        Retourne le résultat de controle().
+        """
+        debut = time.perf_counter()
+        resultat = controle() if controle is not None else None
+        self.completer(debut, time.perf_counter() - debut)
+        return resultat
+
+    def completer(self, debut_tick, duree_controle=None):
+        """
+        Lance les lectures de télémétrie dues qui tiennent dans le budget du tick.
+        duree_controle : durée de l'échange de contrôle du tick (s), sert
+        d'estimation pour une lecture jamais encore mesurée.
+        """
+        self.debut_tick = debut_tick
+        if duree_controle is not None:
+            self.duree_controle = duree_controle
+        limite = debut_tick + self.budget
+        while True:
+            maintenant = time.perf_counter()
+            dues = [t for t in self.taches if t.echeance <= maintenant]
+            if not dues:
+                break
+            tache = min(dues, key=lambda t: t.echeance)
+            # Durée inconnue : on l'estime comme l'échange de contrôle
+            estimee = tache.duree if tache.duree is not None else self.duree_controle
+            if maintenant + estimee > limite:
+                # Famine : la plus en retard passe une fois, le tick déborde
+                if maintenant - tache.echeance > self.famine:
+                    tache.forcees += 1
+                    self._lire(tache, maintenant)
+                break
+            self._lire(tache, maintenant)
+
+        self.ticks += 1
+        if time.perf_counter() - debut_tick > self.budget:
+            self.depassements += 1
+
+    def _lire(self, tache, maintenant):
+        valeurs, _ = self.bras.read_register(tache.adresse, tache.longueur, self.ids)
+        fin = time.perf_counter()
+        duree = fin - maintenant
+        tache.duree = duree if tache.duree is None else tache.duree + LISSAGE * (duree - tache.duree)
+        tache.retard_max = max(tache.retard_max, maintenant - tache.echeance)
+        tache.lectures += 1
+        # Trop en retard : repartir de maintenant plutôt que rattraper en rafale
+        tache.echeance = max(tache.echeance + tache.intervalle, fin)
+        with self.lock:
+            self.telemetrie[tache.nom].update(valeurs)
+
+    def attendre(self):
+        """Dort jusqu'au début du tick suivant"""
+        if self.debut_tick is not None:
+            reste = self.periode - (time.perf_counter() - self.debut_tick)
+            if reste > 0:
+                time.sleep(reste)
+
+    # --- Résultats ---
+
+    def valeurs(self):
+        """Copie des dernières valeurs lues {nom: {id: valeur brute}}"""
+        with self.lock:
+            return {nom: dict(valeurs) for nom, valeurs in self.telemetrie.items()}
+
+    def resume(self):
+        """Bilan affichable du planificateur"""
+        lignes = [f"🗓️  Planificateur {self.bras.robot_name} : {self.ticks} ticks de "
+                  f"{self.periode * 1000:.0f} ms, {self.depassements} hors budget"]
+        for tache in self.taches:
+            duree = (tache.duree or 0.0) * 1000
+            lignes.append(f"   {tache.nom:<12} {tache.lectures:>6} lectures "
+                          f"({duree:.2f} ms, retard max {tache.retard_max * 1000:.0f} ms, "
+                          f"{tache.forcees} hors budget)")
+        forcees = sum(tache.forcees for tache in self.taches)
+        if forcees:
+            lignes.append(f"   ⚠️  {forcees} lectures passées hors budget (télémétrie affamée) : "
+                          f"délai de réponse à régler (script 1, option R)")
+        muettes = [tache.nom for tache in self.taches if not tache.lectures]
+        if muettes and self.ticks * self.periode > self.famine:
+            lignes.append(f"   ⚠️  JAMAIS LU : {', '.join(muettes)} - budget trop court pour le bus "
+                          f"(délai de réponse à régler : script 1, option R)")
+        return "\n".join(lignes)
+
+
+# ============================================
+# DÉMONSTRATION SUR BRAS SIMULÉ
+# ============================================
+
+def banc_essai(duree=2.0):
+    """Contrôle à 100 Hz + télémétrie sur un bras simulé, avant / après réglage de latence"""
+    print(f"\n⏱️  Planificateur sur bras simulé ({duree:.0f} s, contrôle à 100 Hz)")
+    for delai, libelle in ((250, "délai de réponse usine (500 µs)"),
+                           (0, "délai de réponse 0 (script 1, option R)")):
+        bras = So101ArmSimule(robot_name="SIMULÉ")
+        for registres in bras.registres.values():
+            registres[ADDR_RETURN_DELAY] = delai
+        planificateur = PlanificateurBus(bras, periode=0.01)
+        debut = time.perf_counter()
+        while time.perf_counter() - debut < duree:
+            planificateur.tick(bras.read_positions)
+            planificateur.attendre()
+        cadence = planificateur.ticks / (time.perf_counter() - debut)
+        print(f"\n  {libelle} : contrôle à {cadence:.0f} ticks/s")
+        print(planificateur.resume())
+
+
+if __name__ == "__main__":
+    banc_essai()
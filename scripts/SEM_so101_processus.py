@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Module SEM_so101_processus.py
+Service Ecoles Médias - Boucle Leader → Follower dans un processus dédié
+
+Dans le script 8, la boucle de téléopération partage le GIL avec les
+threads caméra, l'affichage, le clavier et l'encodage vidéo : sa cadence
+s'effondre pendant l'encodage. BoucleProcessus lance la même BoucleTeleop
+dans un processus à part :
+
+  - épinglé sur un cœur (dernier cœur par défaut)
+  - priorité temps réel (SCHED_FIFO) si autorisé, sinon nice -10,
+    sinon priorité normale (affiché dans le bilan)
+  - ses propres connexions aux deux ports série
+  - état publié en mémoire partagée (SEM_so101_etat.py), dans le bloc
+    nommé du script s'il est fourni : le moniteur peut le suivre
+
+BoucleProcessus a la même interface que BoucleTeleop (start, stop, etat,
+telemetrie, resume) : le script 8 l'utilise sans autre changement.
+
+Pendant une pause, la boucle ne touche plus au bus : le processus
+principal peut alors utiliser ses propres connexions (position repos
+entre deux épisodes), comme avec la boucle en threads, une fois la pause
+confirmée par attendre_pause() (cycle en cours terminé côté processus).
+
+    python SEM_so101_processus.py  → boucle en processus sur bras simulés
+"""
+import io
+import os
+import time
+import threading
+import contextlib
+import multiprocessing
+
+from SEM_so101_bus import ouvrir_bras, So101ArmSimule
+from SEM_so101_etat import EtatPartage
+from SEM_so101_teleop import BoucleTeleop, FiltreConsignes
+from SEM_so101_planificateur import PlanificateurBus
+
+# Priorité SCHED_FIFO demandée (1-99), à défaut valeur de nice
+PRIORITE_FIFO = 50
+NICE = -10
+
+# Délai de démarrage du processus (ouverture des ports comprise) et
+# intervalle de recopie du drapeau de pause
+DELAI_DEMARRAGE = 15.0
+INTERVALLE_PAUSE = 0.005
+
+# Délai maximal de confirmation d'une pause (un cycle ralenti par des
+# timeouts série peut durer plusieurs dizaines de ms)
+DELAI_PAUSE = 1.0
+
+
+def epingler(coeur):
+    """
+    Épingle le processus courant sur un cœur et augmente sa priorité.
+    Retourne un texte décrivant ce qui a été obtenu.
+    """
+    obtenu = []
+    if coeur is not None and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, {coeur})
+            obtenu.append(f"cœur {coeur}")
+        except OSError:
+            obtenu.append("cœur non épinglé")
+    try:
+        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(PRIORITE_FIFO))
+        obtenu.append(f"temps réel (FIFO {PRIORITE_FIFO})")
+    except (AttributeError, OSError):
+        try:
+            os.nice(NICE)
+            obtenu.append(f"nice {NICE}")
+        except OSError:
+            obtenu.append("priorité normale")
+    return ", ".join(obtenu)
+
+
+def coeur_par_defaut():
+    """Dernier cœur autorisé (le premier reste au système et à l'interface)"""
+    if hasattr(os, "sched_getaffinity"):
+        coeurs = sorted(os.sched_getaffinity(0))
+        return coeurs[-1] if len(coeurs) > 1 else None
+    return None
+
+
+def _processus_boucle(nom_etat, ports, mapper, reglages, coeur, ouvrir, connexion):
+    """Point d'entrée du processus dédié"""
+    priorite = epingler(coeur)
+    etat = EtatPartage.attacher(nom_etat)
+
+    leader = ouvrir(ports[0], "LEADER")
+    follower = ouvrir(ports[1], "FOLLOWER") if leader is not None else None
+    if follower is None:
+        if leader is not None:
+            leader.disconnect()
+        connexion.send(("erreur", "ouverture des ports impossible dans le processus dédié"))
+        etat.fermer()
+        return
+
+    planificateur = PlanificateurBus(follower, periode=reglages['periode'])
+    boucle = BoucleTeleop(leader, follower, mapper,
+                          en_pause=lambda: etat.pause, periode=reglages['periode'],
+                          periode_follower=reglages['periode_follower'],
+                          filtre=FiltreConsignes(reglages['zone_morte'], reglages['maintien']),
+                          planificateur=planificateur)
+    boucle.observateur = etat.observateur(boucle, mapper)
+    boucle.start()
+    etat.pret = True
+    connexion.send(("pret", os.getpid(), priorite))
+
+    # Pause confirmée au processus principal une fois le cycle en cours terminé
+    while not etat.arret:
+        etat.acquitter_pause(boucle.au_repos())
+        time.sleep(INTERVALLE_PAUSE)
+    boucle.stop()
+
+    # Bilan complet (y compris erreurs de communication) renvoyé au processus principal
+    sortie = io.StringIO()
+    with contextlib.redirect_stdout(sortie):
+        print(boucle.resume())
+        leader.afficher_erreurs()
+        follower.afficher_erreurs()
+    connexion.send(("bilan", sortie.getvalue().rstrip("\n")))
+
+    leader.disconnect()
+    follower.disconnect()
+    etat.fermer()
+
+
+class BoucleProcessus:
+    """
+    BoucleTeleop exécutée dans un processus dédié, même interface.
+
+    ports    : (port Leader, port Follower), rouverts par le processus
+    mapper   : correspondance Leader → Follower (doit pouvoir être picklée,
+               ex: MappingTeleop)
+    coeur    : cœur d'épinglage (None = dernier cœur, s'il y en a plusieurs)
+    ouvrir   : fonction d'ouverture d'un bras (port, nom) → bras
+    etat_partage : bloc d'état du script (ex: EtatPartage.publication),
+                   fermé par le script ; None = bloc anonyme propre à la boucle
+    """
+
+    def __init__(self, ports, mapper, en_pause=None, periode=0.01,
+                 periode_follower=0.0, zone_morte=2, maintien=0.5, coeur=None,
+                 ouvrir=ouvrir_bras, etat_partage=None):
+        self.ports = tuple(ports)
+        self.mapper = mapper
+        self.en_pause = en_pause or (lambda: False)
+        self.reglages = {'periode': periode, 'periode_follower': periode_follower,
+                         'zone_morte': zone_morte, 'maintien': maintien}
+        self.coeur = coeur if coeur is not None else coeur_par_defaut()
+        self.ouvrir = ouvrir
+
+        self.etat_partage = etat_partage
+        self.etat_propre = etat_partage is None
+        self.processus = None
+        self.connexion = None
+        self.thread_pause = None
+        self.verrou_pause = threading.Lock()
+        self.running = False
+        self.pid = None
+        self.priorite = ""
+        self.bilan = None
+
+    # --- Cycle de vie ---
+
+    def start(self):
+        """Lance le processus ; RuntimeError s'il ne démarre pas"""
+        if self.etat_propre:
+            self.etat_partage = EtatPartage.creer()
+        self.etat_partage.demander_pause(self.en_pause())
+        contexte = multiprocessing.get_context("spawn")
+        self.connexion, connexion_enfant = contexte.Pipe(duplex=False)
+        self.processus = contexte.Process(
+            target=_processus_boucle,
+            args=(self.etat_partage.nom, self.ports, self.mapper, self.reglages,
+                  self.coeur, self.ouvrir, connexion_enfant),
+            daemon=True)
+        self.processus.start()
+        connexion_enfant.close()
+
+        message = self._recevoir(DELAI_DEMARRAGE)
+        if not message or message[0] != "pret":
+            erreur = message[1] if message else "processus dédié sans réponse"
+            self._terminer()
+            raise RuntimeError(erreur)
+        _, self.pid, self.priorite = message
+
+        # Recopie du drapeau de pause du script vers le processus
+        self.running = True
+        self.thread_pause = threading.Thread(target=self._recopier_pause, daemon=True)
+        self.thread_pause.start()
+
+    def stop(self):
+        """Arrête la boucle et récupère son bilan"""
+        if self.processus is None:
+            return
+        self.running = False
+        if self.thread_pause is not None:
+            self.thread_pause.join(timeout=1.0)
+        self.etat_partage.arret = True
+        message = self._recevoir(5.0)
+        if message and message[0] == "bilan":
+            self.bilan = message[1]
+        self._terminer()
+
+    def _recevoir(self, delai):
+        """Message du processus dédié, None s'il n'arrive pas (ou processus terminé)"""
+        try:
+            return self.connexion.recv() if self.connexion.poll(delai) else None
+        except EOFError:
+            return None
+
+    def _terminer(self):
+        self.processus.join(timeout=2.0)
+        if self.processus.is_alive():
+            self.processus.terminate()
+        self.processus = None
+        if self.etat_propre:
+            self.etat_partage.fermer()
+
+    def _recopier_pause(self):
+        while self.running:
+            with self.verrou_pause:
+                self.etat_partage.demander_pause(self.en_pause())
+            time.sleep(INTERVALLE_PAUSE)
+
+    def attendre_pause(self, delai=DELAI_PAUSE):
+        """
+        Pendant une pause : attend que le processus confirme n'avoir plus de
+        cycle en cours (au plus delai s) avant d'utiliser les connexions du
+        processus principal. Retourne False sans confirmation.
+        """
+        if self.processus is None:
+            return self.en_pause()
+        with self.verrou_pause:
+            self.etat_partage.demander_pause(self.en_pause())
+        limite = time.perf_counter() + delai
+        while self.en_pause() and not self.etat_partage.pause_acquittee():
+            if time.perf_counter() > limite or not self.processus.is_alive():
+                return False
+            time.sleep(0.002)
+        return self.en_pause()
+
+    # --- État (même interface que BoucleTeleop) ---
+
+    def etat(self):
+        """Retourne une copie de (positions_leader, positions_follower)"""
+        if self.processus is None:
+            return {}, {}
+        leader, follower, _, _, _ = self.etat_partage.lire()
+        return leader, follower
+
+    def telemetrie(self):
+        """Dernière télémétrie Follower {nom: {id: valeur brute}}"""
+        if self.processus is None:
+            return {}
+        return self.etat_partage.lire()[2]
+
+    def resume(self):
+        """Bilan affichable de la boucle (calculé dans le processus dédié)"""
+        entete = f"🧵 Boucle en processus dédié (PID {self.pid}, {self.priorite})"
+        return entete + "\n" + (self.bilan or "⚠️  Bilan du processus dédié indisponible")
+
+
+# ============================================
+# DÉMONSTRATION SUR BRAS SIMULÉS
+# ============================================
+
+def ouvrir_simule(port_name, robot_name):
+    """Ouverture de bras simulés (démonstration sans matériel)"""
+    bras = So101ArmSimule(port_name, robot_name)
+    bras.set_torque(True)
+    return bras
+
+
+def banc_essai(duree=2.0):
+    """Boucle en processus dédié pendant que le processus principal est chargé"""
+    print(f"\n🧵 Boucle Leader → Follower en processus dédié ({duree:.0f} s, 100 Hz)")
+    print("   processus principal occupé à calculer en parallèle (comme l'encodage vidéo)")
+    pause = [False]
+    boucle = BoucleProcessus(("sim-leader", "sim-follower"), dict, ouvrir=ouvrir_simule,
+                             en_pause=lambda: pause[0])
+    boucle.start()
+    debut = time.perf_counter()
+    lectures = 0
+    while time.perf_counter() - debut < duree:
+        sum(i * i for i in range(20000))   # charge CPU sous le GIL du processus principal
+        leader, _ = boucle.etat()
+        lectures += bool(leader)
+
+    # Pause confirmée avant de reprendre le bus (position repos du script 8)
+    pause[0] = True
+    debut = time.perf_counter()
+    confirmee = boucle.attendre_pause()
+    attente = (time.perf_counter() - debut) * 1000
+    pause[0] = False
+    boucle.stop()
+    print(f"   {lectures} états lus en mémoire partagée")
+    print(f"   pause {'confirmée' if confirmee else 'NON confirmée'} en {attente:.1f} ms")
+    print(boucle.resume())
+
+
+if __name__ == "__main__":
+    banc_essai()
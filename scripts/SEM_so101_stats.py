@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Module SEM_so101_stats.py
+Service Ecoles Médias - Statistiques de latence du bus SO-ARM 101
+
+Histogramme : histogramme de taille fixe (échelle logarithmique, 10 µs à
+              10 s), ajout en temps constant, percentiles approchés,
+              affichage en barres
+InstrumentationBus : une instance par bras (So101Arm.instrumentation),
+              latence par opération et par registre, compteurs par servo
+              (timeouts, paquets corrompus, erreurs servo, relectures)
+EcartsSuivi : écart Follower - consigne par servo (pas), percentiles
+              exacts, pour juger la qualité de la téléopération
+
+Activation :
+    SEM_BUS_STATS=1 python SEM_so101_6_teleoperation.py
+ou bras.activer_instrumentation() ; le bilan s'affiche avec afficher_erreurs().
+"""
+import math
+import threading
+
+# Noms lisibles des registres instrumentés
+NOMS_REGISTRES = {3: "modèle", 7: "délai réponse", 8: "niveau statut",
+                  40: "couple", 41: "accélération", 42: "consigne", 46: "vitesse",
+                  55: "verrou", 56: "position", 60: "charge", 62: "tension",
+                  63: "température", 66: "en mouvement"}
+
+
+class Histogramme:
+    """Histogramme de durées à classes logarithmiques fixes"""
+
+    MINIMUM = 1e-5          # s, borne basse de la première classe
+    CLASSES_PAR_DECADE = 20
+    DECADES = 6             # 10 µs → 10 s
+
+    def __init__(self, classes_par_decade=None):
+        # Classes plus fines possibles (ex: périodes d'une boucle à cadence fixe)
+        if classes_par_decade is not None:
+            self.CLASSES_PAR_DECADE = classes_par_decade
+        self.classes = [0] * (self.CLASSES_PAR_DECADE * self.DECADES + 1)
+        self.nombre = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def ajouter(self, duree):
+        """Ajoute une durée (s)"""
+        if duree <= self.MINIMUM:
+            indice = 0
+        else:
+            indice = int(math.log10(duree / self.MINIMUM) * self.CLASSES_PAR_DECADE) + 1
+            indice = min(indice, len(self.classes) - 1)
+        self.classes[indice] += 1
+        self.nombre += 1
+        self.total += duree
+        self.maximum = max(self.maximum, duree)
+
+    def borne(self, indice):
+        """Borne haute d'une classe (s)"""
+        return self.MINIMUM * 10 ** (indice / self.CLASSES_PAR_DECADE)
+
+    def percentile(self, p):
+        """Percentile approché (borne haute de la classe, plafonnée au max)"""
+        if not self.nombre:
+            return 0.0
+        seuil = p / 100 * self.nombre
+        cumul = 0
+        for indice, compte in enumerate(self.classes):
+            cumul += compte
+            if cumul >= seuil:
+                return min(self.borne(indice), self.maximum)
+        return self.maximum
+
+    def moyenne(self):
+        return self.total / self.nombre if self.nombre else 0.0
+
+    def barres(self, largeur=30, lignes_max=10):
+        """
+        Histogramme en barres horizontales (ms), une chaîne par ligne.
+        Les classes voisines sont regroupées pour tenir en lignes_max lignes.
+        """
+        occupees = [i for i, compte in enumerate(self.classes) if compte]
+        if not occupees:
+            return []
+        groupe = -(-(occupees[-1] - occupees[0] + 1) // lignes_max)
+        regroupees = []
+        for premiere in range(occupees[0], occupees[-1] + 1, groupe):
+            derniere = min(premiere + groupe, len(self.classes)) - 1
+            compte = sum(self.classes[premiere:derniere + 1])
+            if compte:
+                regroupees.append((premiere, derniere, compte))
+        plus_grand = max(compte for _, _, compte in regroupees)
+        lignes = []
+        for premiere, derniere, compte in regroupees:
+            basse = self.borne(premiere - 1) if premiere else 0.0
+            barre = "█" * max(1, round(compte / plus_grand * largeur))
+            lignes.append(f"{basse * 1000:7.2f}-{self.borne(derniere) * 1000:<7.2f} {barre:<{largeur}} {compte}")
+        return lignes
+
+
+class InstrumentationBus:
+    """Latences et erreurs du bus d'un bras"""
+
+    CATEGORIES = ("timeout", "crc", "erreur", "relecture")
+
+    def __init__(self, robot_name):
+        self.robot_name = robot_name
+        self.lock = threading.Lock()
+        self.latences = {}   # {(opération, adresse): Histogramme}
+        self.servos = {}     # {id: {catégorie: nombre}}
+
+    def enregistrer(self, operation, adresse, duree):
+        """Enregistre la durée d'un appel au bus"""
+        with self.lock:
+            cle = (operation, adresse)
+            if cle not in self.latences:
+                self.latences[cle] = Histogramme()
+            self.latences[cle].ajouter(duree)
+
+    def compter(self, servo_id, categorie):
+        """Compte un incident pour un servo (timeout, crc, erreur, relecture)"""
+        with self.lock:
+            compteurs = self.servos.setdefault(servo_id, dict.fromkeys(self.CATEGORIES, 0))
+            compteurs[categorie] += 1
+
+    def lignes(self):
+        """Tableau des percentiles et des incidents, une chaîne par ligne"""
+        with self.lock:
+            lignes = [f"{'Appel':<22} {'Nb':>7} {'p50':>7} {'p95':>7} {'p99':>7} {'max':>7}  (ms)"]
+            for (operation, adresse), histo in sorted(self.latences.items(),
+                                                      key=lambda e: (e[0][0], e[0][1] or 0)):
+                nom = operation
+                if adresse is not None:
+                    nom += f" {NOMS_REGISTRES.get(adresse, adresse)}"
+                lignes.append(f"{nom:<22} {histo.nombre:>7} "
+                              f"{histo.percentile(50) * 1000:>7.2f} "
+                              f"{histo.percentile(95) * 1000:>7.2f} "
+                              f"{histo.percentile(99) * 1000:>7.2f} "
+                              f"{histo.maximum * 1000:>7.2f}")
+            if self.servos:
+                lignes.append(f"{'Servo':<8}" + "".join(f"{c:>11}" for c in self.CATEGORIES))
+                for servo_id in sorted(self.servos):
+                    compteurs = self.servos[servo_id]
+                    lignes.append(f"{servo_id:<8}" + "".join(f"{compteurs[c]:>11}" for c in self.CATEGORIES))
+            return lignes
+
+    def resume(self):
+        """Bilan affichable en fin de session"""
+        return "\n".join([f"\n📈 Statistiques du bus {self.robot_name} :"]
+                         + [f"   {ligne}" for ligne in self.lignes()])
+
+
+class EcartsSuivi:
+    """
+    Écart de suivi par servo : position Follower - consigne issue du Leader.
+    Un compteur par valeur d'écart absolu (0 à 4095 pas) : percentiles exacts.
+    """
+
+    ECART_MAX = 4095
+
+    def __init__(self, ids=(1, 2, 3, 4, 5, 6)):
+        self.ids = tuple(ids)
+        self.lock = threading.Lock()
+        self.comptes = {i: [0] * (self.ECART_MAX + 1) for i in self.ids}
+        self.nombre = dict.fromkeys(self.ids, 0)
+        self.somme = dict.fromkeys(self.ids, 0)          # écarts signés (biais)
+        self.somme_carres = dict.fromkeys(self.ids, 0)
+        self.somme_abs = dict.fromkeys(self.ids, 0)
+        self.maximum = dict.fromkeys(self.ids, 0)
+        self.derniers = {}
+
+    def ajouter(self, cibles, positions):
+        """Ajoute un échantillon ({id: consigne}, {id: position Follower})"""
+        with self.lock:
+            for servo_id in self.ids:
+                if servo_id not in cibles or servo_id not in positions:
+                    continue
+                ecart = positions[servo_id] - cibles[servo_id]
+                absolu = min(abs(ecart), self.ECART_MAX)
+                self.comptes[servo_id][absolu] += 1
+                self.nombre[servo_id] += 1
+                self.somme[servo_id] += ecart
+                self.somme_carres[servo_id] += ecart * ecart
+                self.somme_abs[servo_id] += absolu
+                self.maximum[servo_id] = max(self.maximum[servo_id], absolu)
+                self.derniers[servo_id] = ecart
+
+    def percentile(self, servo_id, p):
+        """Percentile p de l'écart absolu d'un servo (pas)"""
+        nombre = self.nombre[servo_id]
+        if not nombre:
+            return 0
+        seuil, cumul = p / 100 * nombre, 0
+        for ecart, compte in enumerate(self.comptes[servo_id]):
+            cumul += compte
+            if cumul >= seuil:
+                return ecart
+        return self.maximum[servo_id]
+
+    def instantane(self):
+        """{id: (dernier écart, écart absolu moyen, écart max)} pour l'affichage"""
+        with self.lock:
+            resultat = {}
+            for servo_id in self.ids:
+                nombre = self.nombre[servo_id]
+                if nombre:
+                    resultat[servo_id] = (self.derniers[servo_id], self.somme_abs[servo_id] / nombre,
+                                          self.maximum[servo_id])
+            return resultat
+
+    def lignes(self):
+        """Tableau par servo : échantillons, biais, RMS, p50/p95/p99, max (pas)"""
+        with self.lock:
+            lignes = [f"{'Servo':<6} {'Nb':>7} {'biais':>7} {'RMS':>7} {'p50':>5} {'p95':>5} "
+                      f"{'p99':>5} {'max':>5}"]
+            for servo_id in self.ids:
+                nombre = self.nombre[servo_id]
+                if not nombre:
+                    lignes.append(f"{servo_id:<6} {0:>7}")
+                    continue
+                lignes.append(f"{servo_id:<6} {nombre:>7} {self.somme[servo_id] / nombre:>+7.1f} "
+                              f"{math.sqrt(self.somme_carres[servo_id] / nombre):>7.1f} "
+                              f"{self.percentile(servo_id, 50):>5} {self.percentile(servo_id, 95):>5} "
+                              f"{self.percentile(servo_id, 99):>5} {self.maximum[servo_id]:>5}")
+            return lignes
+
+    def resume(self):
+        """Bilan affichable en fin de session"""
+        return "\n".join(["\n🎯 Écart de suivi Follower - consigne (pas) :"]
+                         + [f"   {ligne}" for ligne in self.lignes()])
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Module SEM_so101_teleop.py
+Service Ecoles Médias - Boucle de téléopération Leader → Follower
+
+Le Leader et le Follower sont sur deux ports USB distincts. Un seul
+worker enchaîne lecture Leader, écriture Follower, lecture Follower :
+la consigne part dès que la lecture Leader est faite.
+
+BoucleTeleop tourne en arrière-plan ; le script appelant récupère le
+dernier état avec etat() et affiche le bilan avec resume().
+
+La relecture des positions Follower occupe son port aussi longtemps que
+la lecture Leader : periode_follower permet de ne la faire qu'au rythme
+où elle est utilisée (ex: 30 Hz pour l'enregistrement du script 8).
+
+FiltreConsignes (zone morte) ne laisse passer vers le Follower que les
+consignes qui ont bougé de plus de quelques pas, plus un renvoi de
+maintien périodique : un bras immobile n'occupe presque plus le bus.
+
+Avec une période, la lecture Leader est cadencée par une Cadence
+(SEM_so101_cadence.py) : échéances fixes, dépassements comptés,
+histogrammes de période et de gigue dans le bilan.
+
+Un PlanificateurBus (SEM_so101_planificateur.py) peut occuper le temps
+libre du port Follower avec des lectures de télémétrie (charge,
+température, tension) sans dépasser le budget de chaque cycle.
+
+    python SEM_so101_teleop.py  → mesure la réaction sur bras simulés
+"""
+import sys
+import time
+import random
+import threading
+
+from SEM_so101_bus import So101ArmSimule, ADDR_PRESENT_POSITION, ADDR_GOAL_POSITION
+from SEM_so101_cadence import Cadence
+
+# Zone morte par défaut (pas, 4096 pas par tour) et intervalle de maintien (s)
+ZONE_MORTE_DEFAUT = 2
+MAINTIEN_DEFAUT = 0.5
+
+
+class FiltreConsignes:
+    """
+    Écriture sur changement : filtre les consignes Follower avant write_goals.
+
+    zone_morte : écart minimal (pas) avec la dernière consigne envoyée,
+                 un nombre pour tous les servos ou {id: pas}
+    maintien   : une consigne inchangée est renvoyée après ce délai (s)
+                 pour rattraper une écriture perdue (None = jamais)
+    """
+
+    def __init__(self, zone_morte=ZONE_MORTE_DEFAUT, maintien=MAINTIEN_DEFAUT):
+        self.zone_morte = zone_morte
+        self.maintien = maintien
+        self.envoyees = {}      # {id: (position, instant)}
+        self.nb_envoyees = 0
+        self.nb_ignorees = 0
+        self.paquets_evites = 0
+
+    def seuil(self, servo_id):
+        if isinstance(self.zone_morte, dict):
+            return self.zone_morte.get(servo_id, ZONE_MORTE_DEFAUT)
+        return self.zone_morte
+
+    def filtrer(self, cibles):
+        """Retourne les consignes {id: position} à envoyer (éventuellement vide)"""
+        maintenant = time.perf_counter()
+        a_envoyer = {}
+        for servo_id, position in cibles.items():
+            precedente = self.envoyees.get(servo_id)
+            if (precedente is None
+                    or abs(position - precedente[0]) > self.seuil(servo_id)
+                    or (self.maintien is not None and maintenant - precedente[1] >= self.maintien)):
+                a_envoyer[servo_id] = position
+                self.envoyees[servo_id] = (position, maintenant)
+        self.nb_envoyees += len(a_envoyer)
+        self.nb_ignorees += len(cibles) - len(a_envoyer)
+        if cibles and not a_envoyer:
+            self.paquets_evites += 1
+        return a_envoyer
+
+    def oublier(self):
+        """Force le renvoi de toutes les consignes (ex: après une pause)"""
+        self.envoyees.clear()
+
+    def resume(self):
+        """Bilan affichable du filtre"""
+        total = self.nb_envoyees + self.nb_ignorees
+        part = 100 * self.nb_ignorees / total if total else 0.0
+        return (f"🎯 Zone morte : {self.nb_envoyees} consignes envoyées, "
+                f"{self.nb_ignorees} ignorées ({part:.0f}%), "
+                f"{self.paquets_evites} paquets évités")
+
+
+class BoucleTeleop:
+    """
+    Téléopération Leader → Follower dans un thread dédié.
+
+    mapper(positions_leader) → cibles_follower ({id: position})
+    en_pause() → True pour suspendre les commandes (ex: repos entre épisodes)
+    periode : période des cycles Leader, sur échéances fixes (0 = aussi vite que le bus)
+    periode_follower : intervalle entre deux relectures Follower
+                       (0 = à chaque cycle, None = jamais)
+    filtre : FiltreConsignes appliqué entre mapper et write_goals (optionnel)
+    planificateur : PlanificateurBus du Follower, complète chaque cycle par
+                    la télémétrie due (optionnel)
+    observateur(positions_leader, positions_follower) : appelé à la fin de
+                    chaque cycle Follower, ex: publication en mémoire partagée
+                    (optionnel)
+    """
+
+    def __init__(self, leader, follower, mapper, en_pause=None, periode=0.0,
+                 periode_follower=0.0, filtre=None, planificateur=None, observateur=None):
+        self.leader = leader
+        self.follower = follower
+        self.mapper = mapper
+        self.periode_follower = periode_follower
+        self.en_pause = en_pause or (lambda: False)
+        self.periode = periode
+        self.cadence_leader = Cadence(1.0 / periode, "téléopération") if periode else None
+        self.filtre = filtre
+        self.planificateur = planificateur
+        self.observateur = observateur
+
+        self.running = False
+        self.thread = None
+        self.condition = threading.Condition()
+
+        # Dernier état connu (protégé par self.condition)
+        self.positions_leader = {}
+        self.positions_follower = {}
+        self.debut_lecture = 0.0
+        self.tick_leader = 0
+        self.derniere_lecture_follower = 0.0
+        self.repos = False          # hors cycle, pause vue
+
+        # Statistiques
+        self.tick_follower = 0
+        self.latence_totale = 0.0
+        self.latence_max = 0.0
+        self.debut = 0.0
+        self.fin = 0.0
+
+    # --- Cycle de vie ---
+
+    def start(self):
+        """Démarre le worker"""
+        self.running = True
+        self.debut = time.perf_counter()
+        self.repos = False
+        self.thread = threading.Thread(target=self._worker, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Arrête le worker et attend sa fin"""
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+        self.fin = time.perf_counter()
+
+    def etat(self):
+        """Retourne une copie de (positions_leader, positions_follower)"""
+        with self.condition:
+            return dict(self.positions_leader), dict(self.positions_follower)
+
+    def au_repos(self):
+        """True si le worker a vu la pause et est sorti de son cycle"""
+        return self.repos
+
+    def attendre_pause(self, delai=1.0):
+        """
+        Pendant une pause : attend que plus aucun cycle ne touche au bus
+        (au plus delai s). Retourne False si la boucle ne s'est pas arrêtée.
+        """
+        limite = time.perf_counter() + delai
+        while self.en_pause() and not self.au_repos():
+            if time.perf_counter() > limite:
+                return False
+            time.sleep(0.002)
+        return self.en_pause()
+
+    def telemetrie(self):
+        """Dernière télémétrie Follower {nom: {id: valeur brute}} ({} sans planificateur)"""
+        return self.planificateur.valeurs() if self.planificateur is not None else {}
+
+    # --- Étapes d'un cycle ---
+
+    def _lire_leader(self):
+        debut = time.perf_counter()
+        positions, _ = self.leader.read_positions()
+        with self.condition:
+            self.positions_leader = positions
+            self.debut_lecture = debut
+            self.tick_leader += 1
+
+    def _commander_follower(self, positions, debut_lecture):
+        debut_cycle = self._ecrire_follower(positions, debut_lecture)
+        self._relire_follower(positions, debut_cycle)
+
+    def _ecrire_follower(self, positions, debut_lecture):
+        """Consigne Follower ; retourne le début du cycle"""
+        debut_cycle = time.perf_counter()
+        cibles = self.mapper(positions)
+        if self.filtre is not None:
+            cibles = self.filtre.filtrer(cibles)
+        if cibles:
+            self.follower.write_goals(cibles)
+        latence = time.perf_counter() - debut_lecture
+        self.latence_totale += latence
+        self.latence_max = max(self.latence_max, latence)
+        self.tick_follower += 1
+        return debut_cycle
+
+    def _relire_follower(self, positions, debut_cycle):
+        """Fin de cycle : relecture Follower, télémétrie, observateur"""
+        maintenant = time.perf_counter()
+        if (self.periode_follower is not None
+                and maintenant - self.derniere_lecture_follower >= self.periode_follower):
+            self.derniere_lecture_follower = maintenant
+            positions_follower, _ = self.follower.read_positions()
+            with self.condition:
+                self.positions_follower = positions_follower
+        if self.planificateur is not None:
+            self.planificateur.completer(debut_cycle, time.perf_counter() - debut_cycle)
+        if self.observateur is not None:
+            self.observateur(positions, self.positions_follower)
+
+    def _attendre(self):
+        if self.cadence_leader is not None:
+            self.cadence_leader.attendre()
+
+    # --- Workers ---
+
+    def _pause(self):
+        """Attente pendant une pause ; les consignes seront toutes renvoyées à la reprise"""
+        if self.filtre is not None:
+            self.filtre.oublier()
+        if self.cadence_leader is not None:
+            self.cadence_leader.reinitialiser()
+        time.sleep(0.05)
+
+    def _hors_pause(self):
+        """Début de cycle : False (worker noté au repos) si la boucle est en pause"""
+        self.repos = False
+        if self.en_pause():
+            self.repos = True
+            return False
+        return True
+
+    def _worker(self):
+        while self.running:
+            if not self._hors_pause():
+                self._pause()
+                continue
+            self._lire_leader()
+            self._commander_follower(self.positions_leader, self.debut_lecture)
+            self._attendre()
+
+    # --- Bilan ---
+
+    def cadence(self):
+        """Cycles Follower par seconde depuis le démarrage"""
+        duree = (self.fin if not self.running and self.fin else time.perf_counter()) - self.debut
+        return self.tick_follower / duree if duree > 0 else 0.0
+
+    def latence_moyenne(self):
+        """Âge moyen de la lecture Leader quand la commande Follower part (s)"""
+        return self.latence_totale / self.tick_follower if self.tick_follower else 0.0
+
+    def resume(self):
+        """Bilan affichable de la boucle"""
+        texte = (f"📡 Téléopération : {self.cadence():.0f} cycles/s, "
+                 f"lecture Leader→commande Follower {self.latence_moyenne() * 1000:.1f} ms "
+                 f"(max {self.latence_max * 1000:.1f} ms)")
+        if self.cadence_leader is not None:
+            texte += "\n" + self.cadence_leader.resume()
+        if self.filtre is not None:
+            texte += "\n" + self.filtre.resume()
+        if self.planificateur is not None:
+            texte += "\n" + self.planificateur.resume()
+        return texte
+
+
+# ============================================
+# BANC D'ESSAI
+# ============================================
+
+def mesurer_reaction(leader, follower, essais):
+    """
+    Déplace brusquement le servo 1 du Leader simulé et mesure le délai
+    jusqu'à ce que la consigne correspondante arrive au Follower.
+    """
+    delais = []
+    for k in range(essais):
+        time.sleep(random.uniform(0.005, 0.015))
+        cible = 1000 if k % 2 else 3000
+        leader.registres[1][ADDR_PRESENT_POSITION:ADDR_PRESENT_POSITION + 2] = cible.to_bytes(2, 'little')
+        debut = time.perf_counter()
+        while int.from_bytes(follower.registres[1][ADDR_GOAL_POSITION:ADDR_GOAL_POSITION + 2], 'little') != cible:
+            time.sleep(0.0001)
+        delais.append(time.perf_counter() - debut)
+    return sum(delais) / len(delais)
+
+
+def banc_essai(essais=200):
+    """Réaction du Follower selon la cadence et la relecture, sur deux bras simulés"""
+    print(f"\n⏱️  Banc d'essai téléopération (bras simulés, {essais} mouvements Leader)")
+    for periode, cadence in ((0.0, "aussi vite que le bus"), (0.01, "à 100 Hz")):
+        print(f"\n  Cycles {cadence} :")
+        for periode_follower, libelle in ((0.0, "à chaque cycle"), (1 / 30, "à 30 Hz")):
+            leader = So101ArmSimule(robot_name="LEADER")
+            follower = So101ArmSimule(robot_name="FOLLOWER")
+            follower.set_torque(True)
+
+            boucle = BoucleTeleop(leader, follower, dict, periode=periode,
+                                  periode_follower=periode_follower)
+            boucle.start()
+            reaction = mesurer_reaction(leader, follower, essais)
+            boucle.stop()
+            print(f"    Relecture Follower {libelle} :")
+            print(f"    {boucle.resume().splitlines()[0]}")
+            print(f"       → réaction Follower à un mouvement Leader : {reaction * 1000:.1f} ms")
+
+    # Bras immobile : part du bus Follower libérée par la zone morte
+    print("\n  Leader immobile, 1 s à 100 Hz :")
+    for filtre in (None, FiltreConsignes()):
+        leader = So101ArmSimule(robot_name="LEADER")
+        follower = So101ArmSimule(robot_name="FOLLOWER")
+        instrumentation = follower.activer_instrumentation()
+        boucle = BoucleTeleop(leader, follower, dict, periode=0.01,
+                              periode_follower=None, filtre=filtre)
+        boucle.start()
+        time.sleep(1.0)
+        boucle.stop()
+        occupation = sum(h.total for h in instrumentation.latences.values())
+        print(f"    {'avec' if filtre else 'sans'} zone morte : "
+              f"bus Follower occupé {occupation * 1000:.0f} ms/s")
+        if filtre:
+            print(f"    {filtre.resume()}")
+
+
+if __name__ == "__main__":
+    banc_essai(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
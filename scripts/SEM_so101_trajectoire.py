@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Module SEM_so101_trajectoire.py
+Service Ecoles Médias - Trajectoires multi-servos précalculées (NumPy)
+
+Une Trajectoire calcule en une fois le tableau (steps+1) × servos de toutes
+les consignes d'un mouvement, puis le convertit en paquets prêts à envoyer
+({id: position} par ligne). executer() rejoue ces lignes à cadence fixe
+sur un ou plusieurs bras : aucun calcul ni accès à la calibration pendant
+le mouvement. Les pas suivent des échéances absolues : un mouvement de
+2 s dure 2 s, quel que soit le temps passé sur le bus.
+
+Profils de vitesse :
+  "cosinus"  : (1 - cos(πt)) / 2, profil historique des scripts
+  "min_jerk" : 10t³ - 15t⁴ + 6t⁵, départ et arrivée sans à-coup
+  "trapeze"  : accélération constante, palier de vitesse, décélération
+
+Profil servo (executer_profil) : au lieu de diffuser les consignes, on
+écrit une fois vitesse et accélération dans chaque servo puis une seule
+consigne ; le servo calcule sa rampe et le drapeau Moving (66) indique
+l'arrivée de chaque articulation. Le profil d'avant est rétabli ensuite.
+
+Mouvement par étapes (mouvement_par_etapes) : des contraintes d'ordre
+(avant, après) entre servos donnent des étapes successives ; dans une
+étape, tous les servos libres bougent ensemble.
+
+Exemple :
+    trajectoire = Trajectoire.depuis_bras(bras, centres(calib), duree=2.0)
+    executer([(bras, trajectoire)])
+"""
+import time
+
+import numpy as np
+
+PROFILS = ("cosinus", "min_jerk", "trapeze")
+
+# Consignes par seconde
+FREQUENCE = 50
+
+# Part de la durée passée à accélérer (et à décélérer) en profil trapèze
+ACCELERATION_TRAPEZE = 0.25
+
+# Profil servo : accélération (unité 100 pas/s²), vitesse max (pas/s),
+# intervalle de lecture du drapeau Moving (s)
+ACCELERATION_PROFIL = 50
+VITESSE_PROFIL_MAX = 3000
+INTERVALLE_ARRIVEE = 0.05
+ATTENTE_ARRIVEE = 0.9     # part de la durée prévue avant la première lecture
+TOLERANCE_ARRIVEE = 20    # écart (pas) sous lequel le profil d'avant peut être rendu
+
+
+def profil(nom, steps):
+    """Avancement 0 → 1 sur steps+1 instants régulièrement espacés"""
+    t = np.linspace(0.0, 1.0, steps + 1)
+    if nom == "cosinus":
+        return (1 - np.cos(t * np.pi)) / 2
+    if nom == "min_jerk":
+        return t ** 3 * (10 - 15 * t + 6 * t ** 2)
+    if nom == "trapeze":
+        a = ACCELERATION_TRAPEZE
+        vitesse = 1 / (1 - a)
+        return np.where(t < a, vitesse * t ** 2 / (2 * a),
+                        np.where(t <= 1 - a, vitesse * (t - a / 2),
+                                 1 - vitesse * (1 - t) ** 2 / (2 * a)))
+    raise ValueError(f"Profil de trajectoire inconnu : {nom}")
+
+
+# ============================================
+# POSES DEPUIS LA CALIBRATION
+# ============================================
+
+def centres(calib, ids=range(1, 7)):
+    """Position centrale de chaque servo (2048 sans calibration)"""
+    return {i: calib.center[i] if calib and i in calib else 2048 for i in ids}
+
+
+def pose_pourcentage(calib, pourcentages):
+    """
+    Pose exprimée en % de l'amplitude calibrée de chaque servo
+    ({id: %}) → positions absolues (2048 sans calibration).
+    """
+    pose = {}
+    for i, pct in pourcentages.items():
+        if calib and i in calib:
+            pose[i] = int(calib.min[i] + calib.amplitude[i] * pct / 100.0)
+        else:
+            pose[i] = 2048
+    return pose
+
+
+# ============================================
+# TRAJECTOIRE ET EXÉCUTION
+# ============================================
+
+class Trajectoire:
+    """
+    Consignes précalculées d'un mouvement multi-servos.
+
+    depart, arrivee : {id: position} ; un servo absent du départ (lecture
+                      ratée) n'est pas déplacé, il est listé dans ignores
+    consignes       : tableau NumPy (steps+1) × len(ids)
+    lignes          : une consigne {id: position} par pas, prête pour write_goals
+    """
+
+    def __init__(self, depart, arrivee, duree, profil_vitesse="cosinus", steps=None):
+        # Départ inconnu : partir d'une position supposée ferait sauter le servo
+        self.ignores = tuple(sorted(i for i in arrivee if i not in depart))
+        self.ids = tuple(sorted(i for i in arrivee if i in depart))
+        self.duree = duree
+        self.steps = max(1, steps if steps is not None else int(duree * FREQUENCE))
+        self.periode = duree / self.steps
+
+        debut = np.array([depart[i] for i in self.ids], dtype=float)
+        fin = np.array([arrivee[i] for i in self.ids], dtype=float)
+        avancement = profil(profil_vitesse, self.steps)
+        self.consignes = (debut + np.outer(avancement, fin - debut)).astype(np.int32)
+        self.lignes = [dict(zip(self.ids, ligne)) for ligne in self.consignes.tolist()]
+
+    @classmethod
+    def depuis_bras(cls, bras, arrivee, duree, profil_vitesse="cosinus", steps=None):
+        """Trajectoire depuis les positions actuelles du bras (une lecture groupée)"""
+        depart, _ = bras.read_positions(list(arrivee))
+        return cls(depart, arrivee, duree, profil_vitesse, steps)
+
+
+class BilanMouvement:
+    """Durée demandée / réelle d'un mouvement et consignes envoyées / sautées"""
+
+    def __init__(self, demandee=0.0, reelle=0.0, envoyees=0, sautees=0, arrivees=None,
+                 ignores=None):
+        self.demandee = demandee
+        self.reelle = reelle
+        self.envoyees = envoyees
+        self.sautees = sautees
+        self.arrivees = arrivees or {}   # profil servo : {(bras, id): instant d'arrivée (s)}
+        self.ignores = ignores or []     # [(bras, id)] non déplacés : position de départ illisible
+
+    def __add__(self, autre):
+        arrivees = dict(self.arrivees)
+        arrivees.update({cle: None if t is None else self.reelle + t
+                         for cle, t in autre.arrivees.items()})
+        return BilanMouvement(self.demandee + autre.demandee, self.reelle + autre.reelle,
+                              self.envoyees + autre.envoyees, self.sautees + autre.sautees,
+                              arrivees, self.ignores + autre.ignores)
+
+    def __str__(self):
+        texte = f"⏱️  {self.reelle:.2f} s (demandé {self.demandee:.2f} s)"
+        if self.sautees:
+            texte += f", {self.sautees} consignes en retard sautées"
+        if self.arrivees:
+            texte += f", {self.envoyees} paquets de consignes"
+            non_arrives = [cle for cle, t in self.arrivees.items() if t is None]
+            if non_arrives:
+                texte += ", pas arrivés : " + " ".join(f"{nom}/{i}" for nom, i in non_arrives)
+        if self.ignores:
+            texte += ", ⚠️  non déplacés (départ illisible) : " + " ".join(
+                f"{nom}/{i}" for nom, i in self.ignores)
+        return texte
+
+
+def executer(mouvements):
+    """
+    Rejoue des trajectoires sur leurs bras, en parallèle : [(bras, trajectoire)].
+    Un paquet groupé par bras et par pas ; une trajectoire plus courte
+    que les autres reste sur sa dernière consigne.
+
+    Chaque pas a une échéance absolue (début + k × période) : si le bus a
+    pris du retard, les consignes déjà dépassées sont sautées et seule la
+    plus récente est envoyée, le mouvement garde sa durée.
+    Retourne un BilanMouvement.
+    """
+    if not mouvements:
+        return BilanMouvement()
+    nb_lignes = max(len(trajectoire.lignes) for _, trajectoire in mouvements)
+    periode = max(trajectoire.periode for _, trajectoire in mouvements)
+    bilan = BilanMouvement(demandee=(nb_lignes - 1) * periode,
+                           ignores=[(bras.robot_name, i) for bras, trajectoire in mouvements
+                                    for i in trajectoire.ignores])
+
+    envoyee = [-1] * len(mouvements)   # dernière ligne envoyée par bras
+    debut = time.perf_counter()
+    k = 0
+    while k < nb_lignes:
+        # Dernier pas dont l'échéance est passée : les précédents sont périmés
+        en_retard = min(nb_lignes - 1, int((time.perf_counter() - debut) / periode))
+        if en_retard > k:
+            bilan.sautees += en_retard - k
+            k = en_retard
+        for rang, (bras, trajectoire) in enumerate(mouvements):
+            ligne = min(k, len(trajectoire.lignes) - 1)
+            if ligne != envoyee[rang] and trajectoire.ids:
+                bras.write_goals(trajectoire.lignes[ligne])
+                envoyee[rang] = ligne
+                bilan.envoyees += 1
+        k += 1
+        if k < nb_lignes:
+            reste = debut + k * periode - time.perf_counter()
+            if reste > 0:
+                time.sleep(reste)
+    bilan.reelle = time.perf_counter() - debut
+    return bilan
+
+
+# ============================================
+# PROFIL DE MOUVEMENT CALCULÉ PAR LES SERVOS
+# ============================================
+
+def vitesse_profil(distance, duree, acceleration=ACCELERATION_PROFIL):
+    """
+    Vitesse max (pas/s) d'un profil trapèze qui parcourt distance (pas)
+    en duree (s) avec l'accélération du servo (unité 100 pas/s²).
+    """
+    a = acceleration * 100
+    distance = abs(distance)
+    if distance == 0:
+        return 1
+    discriminant = (a * duree) ** 2 - 4 * a * distance
+    if discriminant < 0:
+        vitesse = np.sqrt(a * distance)     # profil triangle, durée dépassée
+    else:
+        vitesse = (a * duree - np.sqrt(discriminant)) / 2
+    return int(min(max(vitesse, 1), VITESSE_PROFIL_MAX))
+
+
+def executer_profil(mouvements, duree, acceleration=ACCELERATION_PROFIL):
+    """
+    Mouvement confié aux servos : [(bras, {id: position cible})].
+    Une vitesse par articulation pour que toutes arrivent ensemble en
+    duree, une seule consigne par bras, puis lecture du drapeau Moving
+    jusqu'à l'arrivée. Le profil lu avant le mouvement (registres 41 / 46)
+    est réécrit à la fin, même après une interruption.
+
+    Articulation dont le départ ou le profil n'a pas pu être lu : pas
+    déplacée (vitesse fausse, ou profil impossible à rendre), signalée dans
+    le bilan. Articulation encore loin de sa cible à la fin du délai :
+    arrêtée sur place avant de rendre son profil, sinon elle finirait le
+    mouvement sans sa rampe ; position illisible : elle garde le profil
+    du mouvement.
+    Retourne un BilanMouvement (instant d'arrivée de chaque articulation).
+    """
+    bilan = BilanMouvement(demandee=duree)
+    debut = time.perf_counter()
+    en_cours = {}
+    deplaces = {}
+    anciens = {}    # {bras: {id: (vitesse, accélération)}} à réécrire à la fin
+    try:
+        for bras, cibles in mouvements:
+            depart, _ = bras.read_positions(list(cibles))
+            profils, _ = bras.read_profile([i for i in cibles if i in depart])
+            bilan.ignores += [(bras.robot_name, i) for i in sorted(cibles) if i not in profils]
+            cibles = {i: position for i, position in cibles.items() if i in profils}
+            deplaces[bras] = cibles
+            en_cours[bras] = set(cibles)
+            if not cibles:
+                continue
+            anciens[bras] = profils
+            vitesses = {i: vitesse_profil(cibles[i] - depart[i], duree, acceleration) for i in cibles}
+            bras.set_profile(vitesses, acceleration, list(cibles))
+            bras.write_goals(cibles)
+            bilan.envoyees += 1
+            for i in cibles:
+                bilan.arrivees[(bras.robot_name, i)] = None
+
+        # Le bus reste libre jusqu'à l'arrivée prévue, puis lecture du drapeau
+        # Moving jusqu'à 0 pour chaque articulation (servo muet = on réessaie)
+        reste = debut + duree * ATTENTE_ARRIVEE - time.perf_counter()
+        if reste > 0:
+            time.sleep(reste)
+        limite = debut + 2 * duree + 1.0
+        while any(en_cours.values()) and time.perf_counter() < limite:
+            for bras, ids in en_cours.items():
+                if ids:
+                    bouge, _ = bras.read_moving(sorted(ids))
+                    instant = time.perf_counter() - debut
+                    for i, actif in bouge.items():
+                        if not actif:
+                            bilan.arrivees[(bras.robot_name, i)] = instant
+                            ids.discard(i)
+            if any(en_cours.values()):
+                time.sleep(INTERVALLE_ARRIVEE)
+    finally:
+        for bras, profils in anciens.items():
+            cibles = deplaces[bras]
+            rendus = [i for i in cibles if i not in en_cours[bras]]
+            if en_cours[bras]:
+                # Pas arrivée : arrêter sur place ce qui est loin de la cible, puis seulement rendre le profil
+                positions, _ = bras.read_positions(sorted(en_cours[bras]))
+                arrets = {i: p for i, p in positions.items() if abs(p - cibles[i]) > TOLERANCE_ARRIVEE}
+                if arrets:
+                    bras.write_goals(arrets)
+                rendus += list(positions)
+            # Une écriture par accélération d'origine (en général une seule)
+            for acceleration_avant in sorted({profils[i][1] for i in rendus}):
+                ids = [i for i in rendus if profils[i][1] == acceleration_avant]
+                bras.set_profile({i: profils[i][0] for i in ids}, acceleration_avant, ids)
+    bilan.reelle = time.perf_counter() - debut
+    return bilan
+
+
+# ============================================
+# MOUVEMENT PAR ÉTAPES (ORDRE ANTI-COLLISION)
+# ============================================
+
+def etapes(ids, contraintes):
+    """
+    Regroupe les servos en étapes successives.
+    contraintes : [(avant, après)], le servo "après" ne démarre qu'une fois
+    le servo "avant" arrivé. Un servo sans contrainte part dès la 1re étape.
+    """
+    ids = list(ids)
+    restants = set(ids)
+    resultat = []
+    while restants:
+        prets = [i for i in ids if i in restants
+                 and not any(apres == i and avant in restants for avant, apres in contraintes)]
+        if not prets:
+            raise ValueError(f"Contraintes d'ordre circulaires entre les servos {sorted(restants)}")
+        resultat.append(prets)
+        restants.difference_update(prets)
+    return resultat
+
+
+def mouvement_par_etapes(bras, cibles, contraintes, duree_etape, profil_vitesse="cosinus",
+                         steps=None, profil_servo=False):
+    """
+    Amène le bras sur cibles ({id: position}) étape par étape.
+    profil_servo : chaque étape est confiée aux servos (executer_profil)
+    au lieu de diffuser les consignes pas à pas.
+    Retourne (positions finales {id: position}, BilanMouvement).
+    """
+    positions, _ = bras.read_positions(list(cibles))
+    bilan = BilanMouvement()
+    for etape in etapes(sorted(cibles), contraintes):
+        cibles_etape = {i: cibles[i] for i in etape}
+        if profil_servo:
+            bilan += executer_profil([(bras, cibles_etape)], duree_etape)
+        else:
+            trajectoire = Trajectoire(positions, cibles_etape, duree_etape, profil_vitesse, steps)
+            bilan += executer([(bras, trajectoire)])
+        positions.update(cibles_etape)
+    return {i: positions.get(i, cibles[i]) for i in cibles}, bilan